@@ -0,0 +1,526 @@
+#  gcompris - anim : export
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+# Render anim files to images without the canvas nor the GTK main loop.
+#
+# The items are read from the AnimFile records and drawn with cairo on an
+# image surface, one image per frame, like the activity displays them
+# when playing: anim_speed timeline marks per second shown in render_fps
+# images per second, tweened between their keyframes. The frames are
+# rendered by a pool of processes and saved as a PNG sequence, or put
+# together in an animated PNG or, when PIL is installed, a GIF.
+#
+#   python AnimExport.py [options] ANIMFILE...
+
+import bisect
+import math
+import multiprocessing
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import zlib
+
+import cairo
+
+import AnimFile
+from AnimTween import tween
+
+# The board size and the area the animation is played in, like in anim.py
+BOARD_WIDTH = 800
+BOARD_HEIGHT = 520
+PLAYING_AREA = (124.0, 20.0, BOARD_WIDTH - 15, BOARD_HEIGHT - 40)
+
+FORMATS = ("png", "apng", "gif")
+
+# The gtk.AnchorType of a text as the fraction of its width and height
+# that is left and above its (x, y) point
+TEXT_ANCHORS = {0: (0.5, 0.5),                   # CENTER
+                1: (0.5, 0.0),                   # NORTH
+                2: (0.0, 0.0),                   # NORTH_WEST
+                3: (1.0, 0.0),                   # NORTH_EAST
+                4: (0.5, 1.0),                   # SOUTH
+                5: (0.0, 1.0),                   # SOUTH_WEST
+                6: (1.0, 1.0),                   # SOUTH_EAST
+                7: (0.0, 0.5),                   # WEST
+                8: (1.0, 0.5)}                   # EAST
+
+class ExportError(Exception):
+    pass
+
+class Options:
+    """ How an animation is rendered """
+    def __init__(self):
+        self.fps = 25
+        self.speed = 5
+        self.tweening = True
+        self.area = PLAYING_AREA
+        self.data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                     os.pardir, "boards")
+
+#
+# The animation state
+#
+
+class Item:
+    """ An item of an anim file, as seen by the exporter """
+    def __init__(self, record):
+        self.klass = record['class']
+        self.id = record['id']
+        self.visible = sorted(record['visible'])
+        self.filled = record['filled']
+        self.addon = record['addon']
+        self.timeline = record['timeline']
+        self.times = sorted(self.timeline.keys())
+
+    def visible_until(self, time):
+        i = bisect.bisect_right(self.visible, (time, sys.maxint)) - 1
+        if i >= 0 and self.visible[i][1] >= time:
+            return self.visible[i][1]
+        return -1
+
+    def state_at(self, time, tweening=True):
+        """ Return the (properties, transformation) displayed at time, None
+        if the item is hidden. Same rules as AnimItem.display_at_time. """
+        if self.visible_until(time) < time or not self.times:
+            return None
+        i = max(bisect.bisect_right(self.times, time) - 1, 0)
+        start = self.times[i]
+        if (tweening
+            and start < time
+            and i + 1 < len(self.times)
+            and self.visible_until(time) >= self.times[i + 1]):
+            end = self.times[i + 1]
+            return tween(self.timeline[start], self.timeline[end],
+                         float(time - start) / (end - start))
+        return self.timeline[start]
+
+class Animation:
+    """ The content of an anim file """
+    def __init__(self, filename):
+        file = open(filename, 'rb')
+        try:
+            if not AnimFile.is_anim_file(file):
+                raise ExportError("%s is not in the current anim format, "
+                                  "load and save it again in the activity"
+                                  %(filename,))
+            try:
+                (self.lastmark, zorder, records) = AnimFile.read(file)
+            except AnimFile.FormatError, e:
+                raise ExportError("%s: %s" %(filename, e))
+        finally:
+            file.close()
+        self.items = [Item(record) for record in records]
+        self.zorder = zorder
+        self.zorder_times = sorted(zorder.keys())
+
+    def frame_count(self, options):
+        # From the first mark to the last one included
+        return int(self.lastmark * options.fps / options.speed) + 1
+
+    def frame_time(self, frame, options):
+        return float(frame) * options.speed / options.fps
+
+    def items_at(self, time):
+        """ Return the items in their z order at time: the latest saved
+        order, the items it does not know staying below in file order """
+        i = bisect.bisect_right(self.zorder_times, int(time)) - 1
+        if i < 0:
+            return self.items
+        rank = dict([(item_id, r) for (r, item_id)
+                     in enumerate(self.zorder[self.zorder_times[i]])])
+        return sorted(self.items, key = lambda item: rank.get(item.id, -1))
+
+#
+# Drawing
+#
+
+def set_source_rgba(cr, rgba):
+    cr.set_source_rgba(((rgba >> 24) & 0xFF) / 255.0,
+                       ((rgba >> 16) & 0xFF) / 255.0,
+                       ((rgba >> 8) & 0xFF) / 255.0,
+                       (rgba & 0xFF) / 255.0)
+
+# Fill and stroke the current path like a goocanvas shape
+def paint_shape(cr, item, props):
+    if item.filled and props.get('fill_color_rgba') != None:
+        set_source_rgba(cr, props['fill_color_rgba'])
+        cr.fill_preserve()
+    if props.get('stroke_color_rgba') != None:
+        set_source_rgba(cr, props['stroke_color_rgba'])
+        cr.set_line_width(props.get('line_width', 2.0))
+        cr.stroke_preserve()
+    cr.new_path()
+
+def draw_rect(cr, item, props, images):
+    cr.rectangle(props.get('x', 0), props.get('y', 0),
+                 props.get('width', 0), props.get('height', 0))
+    paint_shape(cr, item, props)
+
+def draw_ellipse(cr, item, props, images):
+    rx = props.get('radius_x', 0)
+    ry = props.get('radius_y', 0)
+    if not rx or not ry:
+        return
+    cr.save()
+    cr.translate(props.get('center_x', 0), props.get('center_y', 0))
+    cr.scale(rx, ry)
+    cr.arc(0, 0, 1, 0, 2 * math.pi)
+    cr.restore()
+    paint_shape(cr, item, props)
+
+def draw_line(cr, item, props, images):
+    points = item.addon[0]
+    cr.move_to(points[0][0], points[0][1])
+    for point in points[1:]:
+        cr.line_to(point[0], point[1])
+    cr.set_line_cap(cairo.LINE_CAP_ROUND)
+    paint_shape(cr, item, props)
+
+def draw_pixmap(cr, item, props, images):
+    surface = images.get(item.addon[0])
+    if not surface:
+        return
+    x = props.get('x', 0)
+    y = props.get('y', 0)
+    # Like goocanvas, a width and height crop the image
+    if props.get('width') and props.get('height'):
+        cr.rectangle(x, y, props['width'], props['height'])
+        cr.clip()
+    cr.set_source_surface(surface, x, y)
+    cr.paint()
+
+def draw_text(cr, item, props, images):
+    text = props.get('text')
+    if not text or props.get('fill_color_rgba') == None:
+        return
+    # The activity uses a "Sans <size>" font, sizes are points at 96 dpi
+    cr.select_font_face("Sans")
+    cr.set_font_size(item.addon[0] * 96.0 / 72.0)
+    (ascent, descent, height) = cr.font_extents()[:3]
+    lines = text.split("\n")
+    widths = [cr.text_extents(line)[4] for line in lines]
+    width = max(widths)
+
+    (ax, ay) = TEXT_ANCHORS.get(props.get('anchor'), (0.5, 0.5))
+    left = props.get('x', 0) - ax * width
+    top = props.get('y', 0) - ay * height * len(lines)
+    set_source_rgba(cr, props['fill_color_rgba'])
+    for (i, line) in enumerate(lines):
+        # Lines are centered, the only alignment the activity uses
+        cr.move_to(left + (width - widths[i]) / 2, top + i * height + ascent)
+        cr.show_text(line)
+
+DRAWERS = {"AnimItemRect": draw_rect,
+           "AnimItemEllipse": draw_ellipse,
+           "AnimItemLine": draw_line,
+           "AnimItemPixmap": draw_pixmap,
+           "AnimItemText": draw_text}
+
+class ImageCache:
+    """ The images of the pixmap items, loaded once per process """
+    def __init__(self, data_dir):
+        self.data_dir = data_dir
+        self.surfaces = {}
+
+    def get(self, image):
+        if not image in self.surfaces:
+            self.surfaces[image] = self.load(os.path.join(self.data_dir,
+                                                          image))
+        return self.surfaces[image]
+
+    def load(self, filename):
+        try:
+            if filename.lower().endswith(".png"):
+                return cairo.ImageSurface.create_from_png(filename)
+            if filename.lower().endswith(".svg"):
+                # Optional, librsvg python bindings
+                import rsvg
+                handle = rsvg.Handle(filename)
+                (width, height) = handle.get_dimension_data()[:2]
+                surface = cairo.ImageSurface(cairo.FORMAT_ARGB32,
+                                             width, height)
+                handle.render_cairo(cairo.Context(surface))
+                return surface
+        except (ImportError, IOError, MemoryError, cairo.Error), e:
+            print >> sys.stderr, "AnimExport: cannot load %s: %s" %(filename, e)
+        return None
+
+def render(animation, time, options, images):
+    """ Return an image surface of the animation at time """
+    (x1, y1, x2, y2) = options.area
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32,
+                                 int(math.ceil(x2 - x1)),
+                                 int(math.ceil(y2 - y1)))
+    cr = cairo.Context(surface)
+    cr.set_source_rgb(1, 1, 1)
+    cr.paint()
+    cr.translate(-x1, -y1)
+
+    for item in animation.items_at(time):
+        state = item.state_at(time, options.tweening)
+        if not state:
+            continue
+        (props, matrix) = state
+        cr.save()
+        if matrix:
+            cr.transform(cairo.Matrix(*matrix))
+        DRAWERS[item.klass](cr, item, props, images)
+        cr.restore()
+    return surface
+
+#
+# The rendering processes
+#
+
+# Each process keeps the animations and images it has already loaded
+_animations = {}
+_images = None
+_options = None
+
+def _init_worker(options):
+    global _images, _options
+    _options = options
+    _images = ImageCache(options.data_dir)
+
+def _render_batch(batch):
+    """ Render the frames of a batch, a tuple (animation file, directory,
+    first frame, last frame), and return their file names """
+    (filename, directory, first, last) = batch
+    if not filename in _animations:
+        _animations[filename] = Animation(filename)
+    animation = _animations[filename]
+    names = []
+    for frame in range(first, last):
+        name = os.path.join(directory, "frame-%05d.png" %(frame,))
+        surface = render(animation, animation.frame_time(frame, _options),
+                         _options, _images)
+        surface.write_to_png(name)
+        names.append(name)
+    return names
+
+#
+# Animated files
+#
+
+def png_chunks(filename):
+    """ Return the list of the (type, data) chunks of a PNG file """
+    data = open(filename, 'rb').read()
+    if data[:8] != "\x89PNG\r\n\x1a\n":
+        raise ExportError("%s is not a PNG file" %(filename,))
+    chunks = []
+    position = 8
+    while position < len(data):
+        (length, kind) = struct.unpack(">I4s", data[position:position + 8])
+        chunks.append((kind, data[position + 8:position + 8 + length]))
+        position += 12 + length
+    return chunks
+
+def png_chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+def write_apng(output, frames, fps):
+    """ Put the PNG files frames together in the animated PNG output """
+    if not frames:
+        raise ExportError("No frame to put in %s" %(output,))
+    file = open(output, 'wb')
+    try:
+        file.write("\x89PNG\r\n\x1a\n")
+        sequence = 0
+        for (index, frame) in enumerate(frames):
+            chunks = png_chunks(frame)
+            header = [data for (kind, data) in chunks if kind == "IHDR"][0]
+            if index == 0:
+                file.write(png_chunk("IHDR", header))
+                # Number of frames, played forever
+                file.write(png_chunk("acTL", struct.pack(">II",
+                                                         len(frames), 0)))
+            (width, height) = struct.unpack(">II", header[:8])
+            file.write(png_chunk("fcTL",
+                                 struct.pack(">IIIIIHHBB", sequence,
+                                             width, height, 0, 0, 1, fps,
+                                             0, 0)))
+            sequence += 1
+            for (kind, data) in chunks:
+                if kind != "IDAT":
+                    continue
+                if index == 0:
+                    file.write(png_chunk("IDAT", data))
+                else:
+                    file.write(png_chunk("fdAT",
+                                         struct.pack(">I", sequence) + data))
+                    sequence += 1
+        file.write(png_chunk("IEND", ""))
+    finally:
+        file.close()
+
+def write_gif(output, frames, fps):
+    """ Put the PNG files frames together in the animated GIF output """
+    try:
+        import Image
+    except ImportError:
+        try:
+            from PIL import Image
+        except ImportError:
+            raise ExportError("PIL is needed to write GIF files")
+    if not frames:
+        raise ExportError("No frame to put in %s" %(output,))
+    # Old PIL versions ignore save_all and write the first frame only
+    Image.init()
+    if len(frames) > 1 and not "GIF" in getattr(Image, "SAVE_ALL", {}):
+        raise ExportError("This PIL version cannot write animated GIF "
+                          "files, Pillow is needed")
+    images = [Image.open(frame).convert("RGB").convert("P",
+                                                       palette = Image.ADAPTIVE)
+              for frame in frames]
+    images[0].save(output, save_all = True, append_images = images[1:],
+                   duration = 1000 / fps, loop = 0)
+
+#
+# Export
+#
+
+def output_name(filename, output_dir, format):
+    base = os.path.splitext(os.path.basename(filename))[0]
+    if output_dir == None:
+        output_dir = os.path.dirname(filename)
+    if format == "png":
+        return os.path.join(output_dir, base)
+    return os.path.join(output_dir, base + "." + format)
+
+def export(filenames, format="png", output_dir=None, options=None,
+           jobs=None, batch_size=10, verbose=False):
+    """
+    Export the anim files filenames, return the list of the files or
+    directories written.
+      format : 'png' for a directory of images, 'apng' or 'gif'
+      output_dir : where they are written, next to the anim files if None
+      jobs : the number of processes, the number of processors if None
+      batch_size : the number of frames a process renders at once
+    Raise ExportError if an animation cannot be exported.
+    """
+    if not format in FORMATS:
+        raise ExportError("Unknown format %s" %(format,))
+    if options == None:
+        options = Options()
+
+    # The frames of all the animations share the processes
+    batches = []
+    directories = []
+    temporaries = []
+    for filename in filenames:
+        animation = Animation(filename)
+        if animation.lastmark < 0:
+            raise ExportError("%s has no frame" %(filename,))
+        if format == "png":
+            directory = output_name(filename, output_dir, format)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+        else:
+            directory = tempfile.mkdtemp(prefix = "anim-")
+            temporaries.append(directory)
+        directories.append(directory)
+        count = animation.frame_count(options)
+        for first in range(0, count, batch_size):
+            batches.append((filename, directory, first,
+                            min(first + batch_size, count)))
+
+    frames = dict([(filename, []) for filename in filenames])
+    pool = multiprocessing.Pool(jobs, _init_worker, (options,))
+    try:
+        for (batch, names) in zip(batches,
+                                  pool.imap(_render_batch, batches)):
+            frames[batch[0]] += names
+            if verbose:
+                print "%s: %d frames" %(batch[0], len(frames[batch[0]]))
+        pool.close()
+    except:
+        pool.terminate()
+        for directory in temporaries:
+            shutil.rmtree(directory, True)
+        raise
+    pool.join()
+
+    written = []
+    try:
+        for (filename, directory) in zip(filenames, directories):
+            if format == "png":
+                written.append(directory)
+                continue
+            output = output_name(filename, output_dir, format)
+            if format == "apng":
+                write_apng(output, frames[filename], options.fps)
+            else:
+                write_gif(output, frames[filename], options.fps)
+            written.append(output)
+    finally:
+        for directory in temporaries:
+            shutil.rmtree(directory, True)
+    return written
+
+def main(argv):
+    import optparse
+    parser = optparse.OptionParser(usage='%prog [options] ANIMFILE...')
+    parser.add_option('-f', '--format', choices=FORMATS, default='png',
+                      help='png (a directory of images per animation), '
+                      'apng or gif')
+    parser.add_option('-o', '--output', default=None,
+                      help='directory the exports are written in, '
+                      'next to each animation by default')
+    parser.add_option('-r', '--fps', type='int', default=25,
+                      help='images per second')
+    parser.add_option('-s', '--speed', type='int', default=5,
+                      help='timeline marks per second, like the speed '
+                      'of the activity')
+    parser.add_option('-j', '--jobs', type='int', default=None,
+                      help='number of rendering processes')
+    parser.add_option('-d', '--data-dir', default=None,
+                      help='directory the images of the animations '
+                      'are taken from')
+    parser.add_option('--no-tweening', action='store_false',
+                      dest='tweening', default=True,
+                      help='jump from a keyframe to the next one')
+    parser.add_option('--board', action='store_true', default=False,
+                      help='render the whole board, not only the '
+                      'playing area')
+    (options, args) = parser.parse_args(argv[1:])
+    if not args:
+        parser.error('an anim file name is required')
+    if options.fps < 1 or options.speed < 1:
+        parser.error('the fps and the speed must be positive')
+
+    render_options = Options()
+    render_options.fps = options.fps
+    render_options.speed = options.speed
+    render_options.tweening = options.tweening
+    if options.board:
+        render_options.area = (0, 0, BOARD_WIDTH, BOARD_HEIGHT)
+    if options.data_dir:
+        render_options.data_dir = options.data_dir
+
+    try:
+        for name in export(args, options.format, options.output,
+                           render_options, options.jobs, verbose=True):
+            print name
+    except ExportError, e:
+        print >> sys.stderr, e
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,292 @@
+#  gcompris - anim : file format
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+# The anim file format.
+#
+# A text file made of one JSON document per line, so that it can be read
+# item by item and nothing in it is ever executed:
+#
+#   GCompris anim 4
+#   {"version": 1, "lastmark": <time>, "items": <number of items>}
+#   <one line per item>
+#   {"zorder": {<time>: [<item id>, ...], ...}}
+#
+# An item line holds its class name, id, visible sets, filled flag, the
+# addon data of its class and its keyframes. The keyframe times are
+# stored as differences from the previous one, and each property and the
+# transformation as a column of [value, count] runs since most of them
+# do not change from one keyframe to the next.
+#
+# This module does not need the canvas, an item is exchanged as a record:
+# a dictionary with the keys 'class', 'id', 'visible', 'filled', 'addon'
+# and 'timeline', the timeline being {time: (properties, matrix)} with
+# matrix a list of 6 numbers or None.
+
+import json
+
+MAGIC = "GCompris anim 4"
+VERSION = 1
+
+# The item classes a file may use
+ITEM_CLASSES = ("AnimItemRect", "AnimItemEllipse", "AnimItemLine",
+                "AnimItemPixmap", "AnimItemText")
+
+# The keyframe properties of each item class, as returned by the
+# get_properties of its AnimItem class
+PROPERTIES = {
+    "AnimItemRect": ('x', 'y', 'width', 'height', 'fill_color_rgba',
+                     'stroke_color_rgba', 'line_width'),
+    "AnimItemEllipse": ('center_x', 'center_y', 'radius_x', 'radius_y',
+                        'fill_color_rgba', 'stroke_color_rgba',
+                        'line_width'),
+    "AnimItemLine": ('stroke_color_rgba', 'line_width'),
+    "AnimItemPixmap": ('x', 'y', 'width', 'height'),
+    "AnimItemText": ('x', 'y', 'fill_color_rgba', 'anchor', 'alignment',
+                     'text'),
+    }
+
+# The properties that are not numbers: colors and enums are integers
+INTEGER_PROPERTIES = ('fill_color_rgba', 'stroke_color_rgba',
+                      'anchor', 'alignment')
+STRING_PROPERTIES = ('text',)
+
+class FormatError(Exception):
+    pass
+
+def is_anim_file(file):
+    """ Return True if file starts like an anim file of this format,
+    file is rewinded """
+    file.seek(0)
+    magic = file.read(len(MAGIC))
+    file.seek(0)
+    return magic == MAGIC
+
+# Return a JSON friendly copy of value, enums becoming plain numbers
+def plain(value):
+    if isinstance(value, bool) or value == None:
+        return value
+    if isinstance(value, (int, long)):
+        return int(value)
+    if isinstance(value, float):
+        return value
+    if isinstance(value, basestring):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [plain(v) for v in value]
+    if isinstance(value, dict):
+        return dict([(k, plain(v)) for (k, v) in value.iteritems()])
+    raise FormatError("Cannot save a value of type %s" %(type(value),))
+
+def is_integer(value):
+    return isinstance(value, (int, long)) and not isinstance(value, bool)
+
+def is_number(value):
+    return is_integer(value) or isinstance(value, float)
+
+# Return value if it suits the property name, texts as UTF-8 like the
+# canvas gives them
+def check_property(name, value):
+    if name in STRING_PROPERTIES:
+        if isinstance(value, basestring):
+            if isinstance(value, unicode):
+                return value.encode('UTF-8')
+            return value
+    elif name in INTEGER_PROPERTIES:
+        if is_integer(value):
+            return value
+    elif is_number(value):
+        return value
+    raise FormatError("Bad value %r for %s" %(value, name))
+
+# The addon data each class needs in load_addon
+def check_addon(item_class, addon):
+    if item_class == "AnimItemLine":
+        if isinstance(addon, list) and addon \
+                and isinstance(addon[0], list) and len(addon[0]) == 2 \
+                and not [p for p in addon[0]
+                         if not isinstance(p, list) or len(p) != 2
+                         or not is_number(p[0]) or not is_number(p[1])]:
+            return
+    elif item_class == "AnimItemPixmap":
+        if isinstance(addon, list) and addon \
+                and isinstance(addon[0], basestring):
+            return
+    elif item_class == "AnimItemText":
+        if isinstance(addon, list) and addon and is_number(addon[0]):
+            return
+    else:
+        return
+    raise FormatError("Bad data %r for %s" %(addon, item_class))
+
+def runs(values):
+    result = []
+    for value in values:
+        if result and result[-1][0] == value:
+            result[-1][1] += 1
+        else:
+            result.append([value, 1])
+    return result
+
+def unruns(column, count):
+    if not isinstance(column, list):
+        raise FormatError("Bad column %r" %(column,))
+    values = []
+    for run in column:
+        if not isinstance(run, list) or len(run) != 2 \
+                or not isinstance(run[1], int) or run[1] < 1:
+            raise FormatError("Bad run %r" %(run,))
+        values += [run[0]] * run[1]
+    if len(values) != count:
+        raise FormatError("A column does not match the keyframes")
+    return values
+
+def encode_item(record):
+    times = sorted(record['timeline'].keys())
+    deltas = [b - a for (a, b) in zip([0] + times, times)]
+
+    names = set()
+    for time in times:
+        names.update(record['timeline'][time][0].keys())
+    properties = {}
+    for name in names:
+        properties[name] = runs([plain(record['timeline'][t][0].get(name))
+                                 for t in times])
+
+    transforms = runs([plain(record['timeline'][t][1]) for t in times])
+
+    return {'class': record['class'],
+            'id': record['id'],
+            'visible': plain(record['visible']),
+            'filled': bool(record['filled']),
+            'addon': plain(record['addon']),
+            'times': deltas,
+            'properties': properties,
+            'transforms': transforms}
+
+def decode_item(data):
+    if not isinstance(data, dict):
+        raise FormatError("An item is not an object")
+    if not data.get('class') in ITEM_CLASSES:
+        raise FormatError("Unknown item class %r" %(data.get('class'),))
+    if not isinstance(data.get('id'), int):
+        raise FormatError("Bad item id")
+
+    if not isinstance(data.get('visible', []), list):
+        raise FormatError("Bad visible sets")
+    visible = []
+    for visset in data.get('visible', []):
+        if not isinstance(visset, list) or len(visset) != 2 \
+                or not isinstance(visset[0], (int, long)) \
+                or not isinstance(visset[1], (int, long)):
+            raise FormatError("Bad visible set %r" %(visset,))
+        visible.append(tuple(visset))
+
+    deltas = data.get('times', [])
+    if not isinstance(deltas, list) \
+            or [d for d in deltas if not isinstance(d, int) or d < 0]:
+        raise FormatError("Bad keyframe times")
+    times = []
+    time = 0
+    for delta in deltas:
+        time += delta
+        times.append(time)
+
+    columns = data.get('properties', {})
+    if not isinstance(columns, dict):
+        raise FormatError("Bad properties")
+    properties = {}
+    for (name, column) in columns.iteritems():
+        if not name in PROPERTIES[data['class']]:
+            raise FormatError("Unknown property %r" %(name,))
+        values = unruns(column, len(times))
+        properties[str(name)] = [value if value == None
+                                 else check_property(name, value)
+                                 for value in values]
+
+    transforms = unruns(data.get('transforms', []), len(times))
+    for matrix in transforms:
+        if matrix != None and (not isinstance(matrix, list)
+                               or len(matrix) != 6
+                               or [v for v in matrix if not is_number(v)]):
+            raise FormatError("Bad transformation %r" %(matrix,))
+
+    check_addon(data['class'], data.get('addon'))
+
+    timeline = {}
+    for (i, time) in enumerate(times):
+        props = {}
+        for (name, values) in properties.iteritems():
+            if values[i] != None:
+                props[name] = values[i]
+        timeline[time] = (props, transforms[i])
+
+    return {'class': str(data['class']),
+            'id': data['id'],
+            'visible': visible,
+            'filled': bool(data.get('filled')),
+            'addon': data.get('addon'),
+            'timeline': timeline}
+
+def write(file, lastmark, zorder, records):
+    """ Write an animation in file """
+    file.write(MAGIC + "\n")
+    file.write(json.dumps({'version': VERSION,
+                           'lastmark': lastmark,
+                           'items': len(records)}) + "\n")
+    for record in records:
+        file.write(json.dumps(encode_item(record)) + "\n")
+    file.write(json.dumps({'zorder': plain(zorder)}) + "\n")
+
+def read(file):
+    """
+    Return the (lastmark, zorder, records) of the animation in file
+    Raise FormatError if it is not a valid anim file
+    """
+    if file.readline().rstrip("\r\n") != MAGIC:
+        raise FormatError("Not a GCompris animation")
+
+    try:
+        header = json.loads(file.readline())
+        if not isinstance(header, dict):
+            raise FormatError("Bad header")
+        if header.get('version') != VERSION:
+            raise FormatError("Unsupported version %r"
+                              %(header.get('version'),))
+        lastmark = header.get('lastmark')
+        count = header.get('items')
+        if not isinstance(lastmark, int) or not isinstance(count, int):
+            raise FormatError("Bad header")
+
+        records = []
+        for i in range(count):
+            records.append(decode_item(json.loads(file.readline())))
+
+        footer = json.loads(file.readline())
+        if not isinstance(footer, dict) \
+                or not isinstance(footer.get('zorder'), dict):
+            raise FormatError("Bad z order")
+        zorder = {}
+        for (time, ids) in footer['zorder'].iteritems():
+            if not isinstance(ids, list) \
+                    or [i for i in ids if not isinstance(i, int)]:
+                raise FormatError("Bad z order")
+            zorder[int(time)] = ids
+    except ValueError, e:
+        # Truncated lines and JSON syntax errors
+        raise FormatError(str(e))
+
+    return (lastmark, zorder, records)
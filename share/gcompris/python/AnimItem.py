@@ -28,6 +28,9 @@ import math
 import cairo
 import pango
 import sys
+import bisect
+
+from AnimTween import tween
 
 class AnimItem:
     anim = None
@@ -40,13 +43,15 @@ class AnimItem:
         self.init(anim_)
         gcompris.sound.play_ogg("sounds/bleep.wav")
         # We keep the timeline index to which we are visible
-        # This is a list of tuple (from, to)
+        # This is a sorted list of non overlapping tuple (from, to)
         self.visible = []
 
         # The timeline store the state of this item in time.
         # The key is the time (number) and the value is a tuple
         # (properties, transformation).
         self.timeline = {}
+        # The sorted keys of the timeline
+        self.times = []
 
         # Wether an item is filled or not
         self.filled = False
@@ -67,6 +72,9 @@ class AnimItem:
 
         self.rootitem.set_data("id", self.id)
 
+        # What display_at_time() last displayed, -1 if unknown
+        self.shown = -1
+
         AnimItem.anim.doc.zorder_dirty()
 
     # Return the type name of the managed object
@@ -116,9 +124,19 @@ class AnimItem:
         self.visible = dict[1]
         self.filled = dict[2]
         self.timeline = self.timelineRestore(dict[3])
+        self.times = sorted(self.timeline.keys())
         self.load_addon(dict[4])
         self.anchor = None
 
+    # Return this item as a record of the AnimFile format
+    def get_record(self):
+        return {'class': self.__class__.__name__,
+                'id': self.id,
+                'visible': self.visible,
+                'filled': self.filled,
+                'addon': self.save_addon(),
+                'timeline': self.timelineDump(self.timeline)}
+
     # Some item types need to save/load more
     # than the item properties
     def save_addon(self):
@@ -150,18 +168,14 @@ class AnimItem:
         self.visible.append( (fromtime, totime) )
         self.visible.sort()
 
-        # Reduce the items in the list that overlaps
-        deleteit = []
-        for index in range(0, len(self.visible)-1):
-            # Overlap set
-            if self.visible[index][1] >= self.visible[index+1][0] - 1:
-                self.visible[index] = \
-                    (min (self.visible[index][0], self.visible[index+1][0]),
-                     max (self.visible[index][1], self.visible[index+1][1]) )
-                deleteit.append(index+1)
-
-        for i in deleteit:
-            del self.visible[i]
+        # Merge the sets that overlap or follow each other
+        merged = [self.visible[0]]
+        for visset in self.visible[1:]:
+            if merged[-1][1] >= visset[0] - 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], visset[1]))
+            else:
+                merged.append(visset)
+        self.visible = merged
 
     # Mark this object to be visible from fromtime to the end
     # of the timeline.
@@ -195,12 +209,16 @@ class AnimItem:
 
     # Given a timeline index, return True if it is visible
     def is_visible(self, index):
-        for visset in self.visible:
-            if ( visset[0] <= index and
-                 visset[1] >= index ):
-                return True
+        return self.visible_until(index) >= index
 
-        return False
+    # Given a timeline index, return the end of the visible set
+    # holding it, -1 if it is not visible
+    def visible_until(self, index):
+        # The last set starting before index is the only candidate
+        i = bisect.bisect_right(self.visible, (index, sys.maxint)) - 1
+        if i >= 0 and self.visible[i][1] >= index:
+            return self.visible[i][1]
+        return -1
 
     # Given x,y return a new x,y snapped to the grid
     def snap_to_grid(self, x, y):
@@ -410,34 +428,59 @@ class AnimItem:
 
     # Save the current place of the object for the given time
     def save_at_time(self, time):
+        if not self.timeline.has_key(time):
+            bisect.insort(self.times, time)
         self.timeline[time] = self.get()
 
     def display_at_time(self, time):
 
-        if self.is_visible(time):
-            self.show(True)
+        # Find what we have to display: None when hidden, () when there
+        # is no keyframe, the time of a keyframe or the (start, time) of
+        # a tween starting at the keyframe start
+        if not self.is_visible(time):
+            shown = None
+        elif not self.times:
+            shown = ()
         else:
+            # The latest closest time for this object, or the first one
+            # if we are before it
+            i = max(bisect.bisect_right(self.times, time) - 1, 0)
+            shown = self.times[i]
+
+            # Between two keyframes, tween them if we stay visible till
+            # the next one and it is not the same
+            if (AnimItem.anim.doc.tweening
+                and shown < time
+                and i + 1 < len(self.times)
+                and self.visible_until(time) >= self.times[i + 1]):
+                start = self.timeline[shown]
+                end = self.timeline[self.times[i + 1]]
+                if start[0] != end[0] or start[1] != end[1]:
+                    shown = (shown, time)
+
+        # While playing, nothing else changes the items, so there is
+        # nothing to do if we already display the same thing
+        if AnimItem.anim.running and shown == self.shown:
+            return
+        self.shown = shown
+
+        if shown == None:
             self.show(False)
-            # No need to waste more time there
             return
 
-        # If we have a value at that time, use it.
-        if self.timeline.has_key(time):
-            self.set(self.timeline[time][0], self.timeline[time][1])
+        self.show(True)
+        if shown == ():
             return
 
-        # We have to find the latest closest time for this object
-        lastval = []
-        for k, v in self.timeline.iteritems():
-            lastval = v
-            break
-        for k, v in self.timeline.iteritems():
-            if(k > time):
-                self.set(lastval[0],
-                         lastval[1])
-                break
-            lastkey = k
-            lastval = v
+        if type(shown) == tuple:
+            (start, time) = shown
+            end = self.times[bisect.bisect_right(self.times, start)]
+            state = tween(self.timeline[start], self.timeline[end],
+                          float(time - start) / (end - start))
+        else:
+            state = self.timeline[shown]
+
+        self.set(state[0], state[1])
 
     # Return the (properties, transformation) of this
     # object.
@@ -1204,3 +1247,19 @@ class AnimItemText(AnimItem):
         if self.text_size < 40:
             self.text_size += 1
         self.set_size(self.text_size)
+
+
+class _EmptyItem:
+    pass
+
+# Create an item from a record of the AnimFile format, like pickle does
+# it still has to be restored to be displayed
+def item_from_record(record):
+    item = _EmptyItem()
+    item.__class__ = globals()[record['class']]
+    item.__setstate__([record['id'],
+                       record['visible'],
+                       record['filled'],
+                       record['timeline'],
+                       record['addon']])
+    return item
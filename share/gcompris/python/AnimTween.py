@@ -0,0 +1,85 @@
+#  gcompris - anim : tweening
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+# Tweening: the state of an item between two keyframes.
+#
+# This module only needs cairo so that the animations can also be
+# rendered without the canvas, see AnimExport.
+
+import math
+import cairo
+
+
+# Return the value of the property name at the fraction f of the way
+# from a to b. Only numbers and colors change smoothly, the other
+# properties keep the value of the first keyframe.
+def tween_property(name, a, b, f):
+    if a == b or a == None or b == None:
+        return a
+    # Enums are int subclasses, only real numbers are tweened
+    if type(a) != type(b) or not type(a) in (int, long, float):
+        return a
+    if name.endswith("_rgba"):
+        value = 0L
+        for shift in (24, 16, 8, 0):
+            ca = (a >> shift) & 0xFF
+            cb = (b >> shift) & 0xFF
+            value |= long(round(ca + (cb - ca) * f)) << shift
+        return value
+    if type(a) == float:
+        return a + (b - a) * f
+    return type(a)(round(a + (b - a) * f))
+
+# Split a matrix in rotation, scales, shear and translation so that
+# a rotation is tweened as a rotation and not as a shrinking
+def matrix_split(m):
+    (xx, yx, xy, yy, x0, y0) = m
+    sx = math.hypot(xx, yx)
+    if sx == 0:
+        return None
+    angle = math.atan2(yx, xx)
+    shear = (xx * xy + yx * yy) / sx
+    sy = (xx * yy - yx * xy) / sx
+    return (angle, sx, sy, shear, x0, y0)
+
+def tween_matrix(m1, m2, f):
+    if not m1 or not m2:
+        return m1
+    s1 = matrix_split(m1)
+    s2 = matrix_split(m2)
+    # A flip happens at once
+    if not s1 or not s2 or (s1[2] < 0) != (s2[2] < 0):
+        return m1
+    # Turn the shortest way
+    dangle = (s2[0] - s1[0] + math.pi) % (2 * math.pi) - math.pi
+    angle = s1[0] + dangle * f
+    (sx, sy, shear, x0, y0) = [v1 + (v2 - v1) * f
+                               for (v1, v2) in zip(s1[1:], s2[1:])]
+    c = math.cos(angle)
+    s = math.sin(angle)
+    return cairo.Matrix(sx * c, sx * s,
+                        shear * c - sy * s, shear * s + sy * c,
+                        x0, y0)
+
+# Return the (properties, transformation) at the fraction f of the way
+# from the keyframe state1 to the keyframe state2
+def tween(state1, state2, f):
+    prop = {}
+    for (name, value) in state1[0].iteritems():
+        prop[name] = tween_property(name, value, state2[0].get(name), f)
+    return (prop, tween_matrix(state1[1], state2[1], f))
+
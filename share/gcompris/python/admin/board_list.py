@@ -24,8 +24,15 @@ import gcompris.admin
 import gtk
 import gtk.gdk
 import gobject
+import os
 from gcompris import gcompris_gettext as _
 
+import board_tree
+import thumbnail_cache
+
+# Height of the board icons in the list
+ICON_HEIGHT = 24
+
 # Board Management
 (
    COLUMN_BOARDICON,
@@ -59,10 +66,19 @@ class Board_list:
       if not self.profiles_list:
         return
 
+      # The boards out of each profile, kept in sync with activities_out
       self.out_dict = self.get_boards_out_by_profile()
+      # The {(board_id, profile_id): out} changes not saved yet
+      self.pending_out = {}
 
       self.difficulty = [1, 6]
 
+      # The board icons are rendered once and kept on disk
+      prop = gcompris.get_properties()
+      user_dir = getattr(prop, 'user_dir', None) or os.path.expanduser('~')
+      self.thumbnails = thumbnail_cache.ThumbnailCache(
+        os.path.join(user_dir, '.thumbnails', 'boards'))
+
       # Main box is vertical
       top_box = gtk.VBox(False, 8)
       top_box.show()
@@ -99,12 +115,6 @@ class Board_list:
       self.active_profile = filter(lambda x:
               x.profile_id == self.default_profile_id, self.profiles_list)[0]
 
-      self.progressbar_box = gtk.Alignment(0.5, 0.5, 0.5, 0)
-      self.progressbar = gtk.ProgressBar(adjustment=None)
-      self.progressbar.show();
-      self.progressbar_box.add(self.progressbar)
-      box2.pack_start(self.progressbar_box)
-
       # Create the table
       sw = gtk.ScrolledWindow()
       sw.set_shadow_type(gtk.SHADOW_ETCHED_IN)
@@ -188,87 +198,46 @@ class Board_list:
   # -------------------
 
   # Add boards in the model
-  def get_board_by_name(self, name, list):
-    for board in list:
-      if (board.section + '/' + board.name) == name:
-        return board
-    return None
-
-  def get_board_from_menu(self, menu, list):
-    if menu.name =='':
-      section = ''
-    else:
-      section = menu.section + '/' + menu.name
-    return_list = []
-    for board in list:
-      if board.section == section:
-        return_list.append([section, board])
-
-    return return_list
-
   def add_boards_in_model(self, model, boards_list):
-    root_menu = '/'
-    root = self.get_board_by_name(root_menu, boards_list)
-    boards_list.remove(root)
-    menu_list = [[ None,  root ]]
-
-    list = menu_list[:]
-    while len(list) > 0:
-      menu = list.pop(0)[1]
-      list_board = self.get_board_from_menu(menu, boards_list)
-      menu_list = menu_list + list_board
-
-      for board_cell in list_board:
-        if board_cell[1].type == 'menu':
-          list.append(board_cell)
-
+    self.board_tree = board_tree.BoardTree(boards_list)
+    self.board_dict = self.board_tree.boards
 
+    boards_out = self.out_dict[self.active_profile.profile_id]
     row_dict = {}
-    self.board_dict = {}
-    height = 24
-
-    self.progressbar_box.show()
-    index = 0.0
-    for board_cell in menu_list:
-      self.board_dict['%s/%s' % (board_cell[1].section,board_cell[1].name)] = board_cell[1]
-
-      self.progressbar.set_fraction(index / len(menu_list))
-      index = index + 1
-      while gtk.events_pending():
-        gtk.main_iteration(False)
+    for (menu, board) in self.board_tree.walk():
+      path = board_tree.board_path(board)
 
-      if  board_cell[0] == None:
+      if menu == None:
         row_dict[''] =  \
                      model.append(None,
-                                  [self.pixbuf_admin_at_height('administration/tuxplane.svg', height),
+                                  [None,
                                    _('Main menu') + '\n' + '/',
-                                   not board_cell[1].board_id in self.out_dict[self.active_profile.profile_id],
-                                   '%s/%s' % (board_cell[1].section,board_cell[1].name), self.pixbuf_configurable(board_cell[1])])
+                                   not board.board_id in boards_out,
+                                   path, self.pixbuf_configurable(board)])
 
       else:
-        row_dict['%s/%s' % (board_cell[1].section,board_cell[1].name)] = \
-                         model.append(row_dict[board_cell[1].section],
-                                      [self.pixbuf_at_height(board_cell[1].icon_name, height),
-                                       _(board_cell[1].title) + '\n' + '%s/%s' % (board_cell[1].section,board_cell[1].name),
-                                       not board_cell[1].board_id in self.out_dict[self.active_profile.profile_id],
-                                       '%s/%s' % (board_cell[1].section,board_cell[1].name), self.pixbuf_configurable(board_cell[1])])
-    self.progressbar_box.hide()
+        row_dict[path] = \
+                         model.append(row_dict[board.section],
+                                      [None,
+                                       _(board.title) + '\n' + path,
+                                       not board.board_id in boards_out,
+                                       path, self.pixbuf_configurable(board)])
 
   def pixbuf_admin_at_height(self, file, height):
-    pixbuf = gcompris.utils.load_pixmap(file)
-    width = pixbuf.get_width()* height / pixbuf.get_height()
-    del pixbuf
-    pixbuf = gtk.gdk.pixbuf_new_from_file_at_size(gcompris.DATA_DIR + '/' + file,
-                                                  width, height)
-    return pixbuf
+    return self.thumbnails.get(gcompris.DATA_DIR + '/' + file, height)
 
   def pixbuf_at_height(self, file, height):
-    pixbuf = gcompris.utils.load_pixmap(file)
-    width = pixbuf.get_width()* height / pixbuf.get_height()
-    del pixbuf
-    pixbuf = gtk.gdk.pixbuf_new_from_file_at_size(gcompris.DATA_DIR + '/' + file,
-                                                  width, height)
-    return pixbuf
+    return self.thumbnails.get(gcompris.DATA_DIR + '/' + file, height)
+
+  # The icons are only loaded for the rows displayed
+  def board_icon_data(self, column, cell, model, iter):
+    if model.iter_parent(iter) == None:
+      pixbuf = self.pixbuf_admin_at_height('administration/tuxplane.svg',
+                                           ICON_HEIGHT)
+    else:
+      board = self.board_dict[model[iter][3]]
+      pixbuf = self.pixbuf_at_height(board.icon_name, ICON_HEIGHT)
+    cell.set_property('pixbuf', pixbuf)
 
   def __create_model(self):
     model = gtk.TreeStore(
@@ -317,7 +286,7 @@ class Board_list:
     treeview.append_column(column_active)
     treeview.append_column(column_title)
 
-    column_title.add_attribute(cell_board_icon, 'pixbuf', 0)
+    column_title.set_cell_data_func(cell_board_icon, self.board_icon_data)
     column_title.add_attribute(cell_board_title, 'text', 1)
     column_active.add_attribute(cell_active_board, 'active', 2)
     column_active.set_attributes(cell_board_configure, stock_id=4)
@@ -338,33 +307,61 @@ class Board_list:
       pass
 
     self.update_selected(model, path)
-    self.con.commit()
+    self.flush_changes()
 
+  # Record the active state of the board at path for the active profile.
+  # out_dict is updated at once, the database when flush_changes() is
+  # called.
   def update_selected(self, model, path):
+    board_id = self.board_dict[model[path][3]].board_id
+    profile_id = self.active_profile.profile_id
+    boards_out = self.out_dict[profile_id]
+
     if model[path][2]:
-      self.cur.execute('DELETE FROM activities_out WHERE board_id=%d AND out_id=%d' % (
-        self.board_dict[model[path][3]].board_id,
-        self.active_profile.profile_id
-        ))
+      if not board_id in boards_out:
+        return
+      boards_out.remove(board_id)
     else:
-      self.cur.execute('INSERT INTO activities_out (board_id, out_id) VALUES (%d, %d)' % (
-        self.board_dict[model[path][3]].board_id,
-        self.active_profile.profile_id
-        ))
+      if board_id in boards_out:
+        return
+      boards_out.add(board_id)
 
-    # update infos
-    self.out_dict = self.get_boards_out_by_profile()
+    # Toggled back before being saved, the base is already right
+    key = (board_id, profile_id)
+    if key in self.pending_out:
+      del self.pending_out[key]
+    else:
+      self.pending_out[key] = not model[path][2]
 
-    return
+  # Save the changes recorded by update_selected in a single transaction
+  def flush_changes(self):
+    if not self.pending_out:
+      return
+
+    inserted = [key for (key, out) in self.pending_out.iteritems() if out]
+    deleted = [key for (key, out) in self.pending_out.iteritems() if not out]
+    try:
+      self.cur.executemany('DELETE FROM activities_out WHERE board_id=? AND out_id=?',
+                           deleted)
+      self.cur.executemany('INSERT INTO activities_out (board_id, out_id) VALUES (?, ?)',
+                           inserted)
+      self.con.commit()
+    except:
+      self.con.rollback()
+      # Our sets no longer match the base
+      self.out_dict = self.get_boards_out_by_profile()
+      raise
+    finally:
+      self.pending_out = {}
 
   def dict_from_list(self, list):
     dict = {}
 
     for profile in  self.profiles_list:
-      dict[profile.profile_id] = []
+      dict[profile.profile_id] = set()
 
     for l in list:
-      dict[l[1]].append(l[0])
+      dict.setdefault(l[1], set()).add(l[0])
 
     return dict
 
@@ -411,7 +408,7 @@ class Board_list:
 
   def select_all_boards(self, button, Value):
     self.model.foreach(self.update_all, Value)
-    self.con.commit()
+    self.flush_changes()
 
   def update_all(self, model, path, iter, Value):
     model[path][2] = Value
@@ -562,26 +559,21 @@ class Board_list:
     self.update_arrows_active()
 
   def filter_apply(self, button):
-    self.model.foreach(self.blank)
+    self.filter_selected = self.board_tree.select(self.board_in_difficulty)
     self.model.foreach(self.board_filter)
-    self.con.commit()
+    self.flush_changes()
 
-  # Apply the filter as asked.
-  def board_filter(self,  model, path, iter):
-    if self.board_dict[model[path][3]].type != "menu":
-      model[path][2] = ( eval(self.board_dict[model[path][3]].difficulty) \
-                         in range( self.difficulty[0],
-                                   self.difficulty[1]+1))
+  def board_in_difficulty(self, board):
+    return eval(board.difficulty) in range( self.difficulty[0],
+                                            self.difficulty[1]+1)
 
-    if model[path][2]:
-      self.update_parent(model[path].parent)
+  # Apply the filter as asked, the boards in the difficulty range and
+  # their menus are selected.
+  def board_filter(self,  model, path, iter):
+    model[path][2] = model[path][3] in self.filter_selected
 
     self.update_selected( model, path)
 
-  # toggled off.
-  def blank(self,  model, path, iter):
-    model[path][2] = False
-
   # This function toggles parents when a child is toggled.
   def update_parent( self, row):
     if row == None:
@@ -699,6 +691,6 @@ class Board_list:
 
   def login_configure(self, button):
 
-    board_log = self.get_board_by_name('/login/login', self.boards_list)
+    board_log = self.board_tree.get('/login/login')
     gcompris.admin.board_config_start(board_log, self.active_profile)
 
@@ -0,0 +1,91 @@
+#  gcompris - board_tree.py
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# The menu tree of the boards.
+#
+# A board is in the menu whose path is its section, the path of a board
+# being '<section>/<name>'. The root menu has an empty section and name,
+# its path is '/' and its children have the section ''.
+
+from collections import deque
+
+def board_path(board):
+  return board.section + '/' + board.name
+
+def menu_section(menu):
+  """ Return the section of the boards in the menu """
+  if menu.name == '':
+    return ''
+  return board_path(menu)
+
+class BoardTree:
+  """ The boards of gcompris.admin.get_boards_list() indexed by path and
+  by menu """
+
+  def __init__(self, boards_list):
+    self.boards = {}
+    self.children = {}
+    self.root = None
+
+    for board in boards_list:
+      path = board_path(board)
+      self.boards[path] = board
+      if path == '/':
+        self.root = board
+      else:
+        self.children.setdefault(board.section, []).append(board)
+
+  def get(self, path):
+    """ Return the board of the path, None if there is none """
+    return self.boards.get(path)
+
+  def get_children(self, menu):
+    return self.children.get(menu_section(menu), [])
+
+  def walk(self):
+    """ Return the list of the (menu, board) of the tree in breadth first
+    order, starting with (None, root) """
+    if not self.root:
+      return []
+    result = [(None, self.root)]
+    queue = deque([self.root])
+    while queue:
+      menu = queue.popleft()
+      for board in self.get_children(menu):
+        result.append((menu, board))
+        if board.type == 'menu':
+          queue.append(board)
+    return result
+
+  def select(self, selected):
+    """ Return the set of the paths of the boards that are not menus and
+    for which selected(board) is true, and of the menus holding one of
+    them """
+    paths = set()
+    # Children come after their menu, go backwards so that a menu is
+    # looked at once all its children are
+    for (menu, board) in reversed(self.walk()):
+      path = board_path(board)
+      if board.type != 'menu':
+        if not selected(board):
+          continue
+      elif not path in paths:
+        continue
+      paths.add(path)
+      if menu:
+        paths.add(board_path(menu))
+    return paths
@@ -39,6 +39,22 @@ import constants
   COLUMN_STATUS,
 ) = range(7)
 
+# The SQL sort key of each column. The logs are loaded by pages, so the
+# list is sorted by the query and not by the model.
+SORT_KEYS = {
+  COLUMN_DATE:     'logs.date',
+  COLUMN_USER:     "COALESCE(users.login, '')",
+  COLUMN_BOARD:    "COALESCE(boards.name, '')",
+  COLUMN_LEVEL:    'logs.level',
+  COLUMN_SUBLEVEL: 'logs.sublevel',
+  COLUMN_DURATION: 'logs.duration',
+  COLUMN_STATUS:   'logs.status',
+}
+
+# Number of logs loaded at once, the next ones are loaded when the list
+# is scrolled near its end
+LOG_PAGE_SIZE = 200
+
 class Log_list:
   """GCompris Log List Table"""
 
@@ -50,11 +66,21 @@ class Log_list:
       self.cur = db_cursor
       self.con = db_connect
 
+      # The logs are read by user and date
+      self.cur.execute('CREATE INDEX IF NOT EXISTS logs_user_date ON logs (user_id, date)')
+      self.cur.execute('CREATE INDEX IF NOT EXISTS logs_date ON logs (date)')
+      self.con.commit()
+
   # area is the drawing area for the list
   def init(self):
 
       # The user_id to work on
       self.current_user_id = 0
+
+      # The logs are sorted by this column, then by rowid
+      self.sort_column = COLUMN_DATE
+      self.sort_order = gtk.SORT_ASCENDING
+      self.sort_columns = []
       self.user_list = []
 
       # ---------------
@@ -92,7 +118,10 @@ class Log_list:
       user_label.show()
       label_box.pack_start(user_label, False, False, 0)
 
-      self.cur.execute('SELECT DISTINCT user_id FROM logs')
+      # The users having logs, with their names in the same query
+      self.cur.execute('SELECT logged.user_id, users.login, users.firstname, users.lastname ' +
+                       'FROM (SELECT DISTINCT user_id FROM logs) AS logged ' +
+                       'LEFT JOIN users ON users.user_id = logged.user_id')
       user_list = self.cur.fetchall()
 
       self.combo_user = gtk.combo_box_new_text()
@@ -109,13 +138,13 @@ class Log_list:
           self.user_list.append(-1)
           continue
 
-        self.cur.execute('SELECT login, firstname, lastname FROM users WHERE user_id=?',
-                         (auser[0],) )
-        oneuser = self.cur.fetchall()
-
-        self.combo_user.append_text( (oneuser[0][0] + ' ' +
-                                      oneuser[0][1] + ' ' +
-                                      oneuser[0][2]))
+        if auser[1] == None:
+          # The user has been removed since
+          self.combo_user.append_text(str(auser[0]))
+        else:
+          self.combo_user.append_text( (auser[1] + ' ' +
+                                        auser[2] + ' ' +
+                                        auser[3]))
         # Save in a list the combo index => the user_id
         self.user_list.append(auser[0])
 
@@ -144,6 +173,7 @@ class Log_list:
       sw.show()
       sw.set_shadow_type(gtk.SHADOW_ETCHED_IN)
       sw.set_policy(gtk.POLICY_NEVER, gtk.POLICY_AUTOMATIC)
+      sw.get_vadjustment().connect('value-changed', self.log_scrolled_cb)
 
       # create tree view
       treeview_log = gtk.TreeView(self.log_model)
@@ -194,20 +224,86 @@ class Log_list:
     # Remove all entries in the list
     self.log_model.clear()
 
-    # Grab the log data
-    if self.current_user_id == -2:
-      self.cur.execute('SELECT date, user_id, board_id, level, sublevel, duration, status FROM logs ORDER BY date')
-    elif self.current_user_id == -1:
-      self.cur.execute('SELECT date, user_id, board_id, level, sublevel, duration, status FROM logs ' +
-                       'WHERE user_id=-1 OR user_id is NULL ORDER BY date')
-    else:
-      self.cur.execute('SELECT date, user_id, board_id, level, sublevel, duration, status FROM logs ' +
-                       'WHERE user_id=? ORDER BY date', (self.current_user_id, ) )
-    self.log_data = self.cur.fetchall()
+    # The (sort key, rowid) of the last log loaded
+    self.last_log = None
+    self.log_complete = False
+
+    self.load_log_page()
 
-    for alog in self.log_data:
+  # Load the next LOG_PAGE_SIZE logs in the list, the logs being sorted
+  # by the sort column and rowid so that a page starts right after the
+  # last one
+  def load_log_page(self):
+    if self.log_complete:
+      return
+
+    key = SORT_KEYS[self.sort_column]
+    if self.sort_order == gtk.SORT_ASCENDING:
+      (after, direction) = ('>', '')
+    else:
+      (after, direction) = ('<', ' DESC')
+
+    where = []
+    params = []
+    if self.current_user_id == -1:
+      where.append('(logs.user_id=-1 OR logs.user_id is NULL)')
+    elif self.current_user_id != -2:
+      where.append('logs.user_id=?')
+      params.append(self.current_user_id)
+    if self.last_log:
+      where.append('(%s %s ? OR (%s = ? AND logs.rowid %s ?))'
+                   % (key, after, key, after))
+      params += [self.last_log[0], self.last_log[0], self.last_log[1]]
+
+    query = 'SELECT logs.date, users.login, boards.name, logs.level, logs.sublevel, logs.duration, logs.status, logs.rowid, ' + key + ' ' + \
+        'FROM logs ' + \
+        'LEFT JOIN users ON users.user_id = logs.user_id ' + \
+        'LEFT JOIN boards ON boards.board_id = logs.board_id '
+    if where:
+      query += 'WHERE ' + ' AND '.join(where) + ' '
+    query += 'ORDER BY %s%s, logs.rowid%s LIMIT ?' % (key, direction, direction)
+    params.append(LOG_PAGE_SIZE)
+
+    self.cur.execute(query, params)
+    log_data = self.cur.fetchall()
+
+    for alog in log_data:
       self.add_log_in_model(self.log_model, alog)
 
+    if len(log_data) < LOG_PAGE_SIZE:
+      self.log_complete = True
+    else:
+      self.last_log = (log_data[-1][-1], log_data[-1][-2])
+
+  # Load more logs when the list is scrolled near its end
+  def log_scrolled_cb(self, adjustment):
+    if adjustment.value + 2 * adjustment.page_size >= adjustment.upper:
+      self.load_log_page()
+
+
+  # A click on the column header sorts the logs on it, reversing the
+  # order if it is already the sort column
+  def set_sortable(self, column, column_id):
+    column.set_clickable(True)
+    column.connect('clicked', self.log_column_clicked_cb, column_id)
+    self.sort_columns.append((column, column_id))
+    if column_id == self.sort_column:
+      column.set_sort_indicator(True)
+      column.set_sort_order(self.sort_order)
+
+  def log_column_clicked_cb(self, clicked_column, column_id):
+    if column_id == self.sort_column \
+          and self.sort_order == gtk.SORT_ASCENDING:
+      self.sort_order = gtk.SORT_DESCENDING
+    else:
+      self.sort_order = gtk.SORT_ASCENDING
+    self.sort_column = column_id
+
+    for (column, other_id) in self.sort_columns:
+      column.set_sort_indicator(other_id == column_id)
+    clicked_column.set_sort_order(self.sort_order)
+
+    self.reload_log()
 
   def __add_columns_log(self, treeview):
 
@@ -218,7 +314,7 @@ class Log_list:
     renderer.set_data("column", COLUMN_DATE)
     column = gtk.TreeViewColumn(_('Date'), renderer,
                                 text=COLUMN_DATE)
-    column.set_sort_column_id(COLUMN_DATE)
+    self.set_sortable(column, COLUMN_DATE)
     column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
     column.set_fixed_width(constants.COLUMN_WIDTH_DATE)
     treeview.append_column(column)
@@ -228,7 +324,7 @@ class Log_list:
     renderer.set_data("column", COLUMN_USER)
     column = gtk.TreeViewColumn(_('User'), renderer,
                                 text=COLUMN_USER)
-    column.set_sort_column_id(COLUMN_USER)
+    self.set_sortable(column, COLUMN_USER)
     column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
     column.set_fixed_width(constants.COLUMN_WIDTH_LOGIN)
     treeview.append_column(column)
@@ -238,7 +334,7 @@ class Log_list:
     renderer.set_data("column", COLUMN_BOARD)
     column = gtk.TreeViewColumn(_('Board'), renderer,
                                 text=COLUMN_BOARD)
-    column.set_sort_column_id(COLUMN_BOARD)
+    self.set_sortable(column, COLUMN_BOARD)
     column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
     column.set_fixed_width(constants.COLUMN_WIDTH_LOGIN)
     treeview.append_column(column)
@@ -248,7 +344,7 @@ class Log_list:
     renderer.set_data("column", COLUMN_LEVEL)
     column = gtk.TreeViewColumn(_('Level'), renderer,
                                 text=COLUMN_LEVEL)
-    column.set_sort_column_id(COLUMN_LEVEL)
+    self.set_sortable(column, COLUMN_LEVEL)
     column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
     column.set_fixed_width(constants.COLUMN_WIDTH_NUMBER)
     treeview.append_column(column)
@@ -258,7 +354,7 @@ class Log_list:
     renderer.set_data("column", COLUMN_SUBLEVEL)
     column = gtk.TreeViewColumn(_('Sublevel'), renderer,
                                 text=COLUMN_SUBLEVEL)
-    column.set_sort_column_id(COLUMN_SUBLEVEL)
+    self.set_sortable(column, COLUMN_SUBLEVEL)
     column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
     column.set_fixed_width(constants.COLUMN_WIDTH_NUMBER)
     treeview.append_column(column)
@@ -268,7 +364,7 @@ class Log_list:
     renderer.set_data("column", COLUMN_DURATION)
     column = gtk.TreeViewColumn(_('Duration'), renderer,
                                 text=COLUMN_DURATION)
-    column.set_sort_column_id(COLUMN_DURATION)
+    self.set_sortable(column, COLUMN_DURATION)
     column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
     column.set_fixed_width(constants.COLUMN_WIDTH_NUMBER)
     treeview.append_column(column)
@@ -278,7 +374,7 @@ class Log_list:
     renderer.set_data("column", COLUMN_STATUS)
     column = gtk.TreeViewColumn(_('Status'), renderer,
                                 text=COLUMN_STATUS)
-    column.set_sort_column_id(COLUMN_STATUS)
+    self.set_sortable(column, COLUMN_STATUS)
     column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
     column.set_fixed_width(constants.COLUMN_WIDTH_LOGIN)
     treeview.append_column(column)
@@ -295,17 +391,14 @@ class Log_list:
     elif  alog[COLUMN_STATUS] == gcompris.bonus.COMPLETED:
         status = "Compl."
 
-    login = _("Default")
-    self.cur.execute('SELECT login FROM users WHERE user_id=?', (alog[COLUMN_USER],))
-    result = self.cur.fetchall()
-    if(result):
-        login = result[0][0]
-
-    board = ""
-    self.cur.execute('SELECT name FROM boards WHERE board_id=?', (alog[COLUMN_BOARD],))
-    result = self.cur.fetchall()
-    if(result):
-        board = result[0][0]
+    # The user login and board name come from the log query
+    login = alog[COLUMN_USER]
+    if login == None:
+        login = _("Default")
+
+    board = alog[COLUMN_BOARD]
+    if board == None:
+        board = ""
 
     model.set (iter,
                COLUMN_DATE,     alog[COLUMN_DATE],
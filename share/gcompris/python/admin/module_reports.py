@@ -38,6 +38,7 @@ except:
 
 import module
 import log_list
+import report_list
 
 class Reports(module.Module):
   """Administrating GCompris Reports"""
@@ -61,6 +62,7 @@ class Reports(module.Module):
     if Reports.already_loaded:
       self.rootitem.props.visibility = goocanvas.ITEM_VISIBLE
       self.logList.show(self.con, self.cur)
+      self.reportList.show(self.con, self.cur)
       return
 
     Reports.already_loaded = True
@@ -86,15 +88,36 @@ class Reports(module.Module):
         height=area[3]-area[1]-2*self.module_panel_ofset,
         anchor=gtk.ANCHOR_NW)
 
-    self.logList = log_list.Log_list(frame, self.con, self.cur)
+    # The raw logs and their summary in two pages
+    notebook = gtk.Notebook()
+    notebook.show()
+    frame.add(notebook)
+
+    log_box = gtk.VBox(False, 8)
+    log_box.show()
+    label = gtk.Label(_("Logs"))
+    label.show()
+    notebook.append_page(log_box, label)
+
+    report_box = gtk.VBox(False, 8)
+    report_box.show()
+    label = gtk.Label(_("Summary"))
+    label.show()
+    notebook.append_page(report_box, label)
+
+    self.logList = log_list.Log_list(log_box, self.con, self.cur)
     self.logList.init()
 
+    self.reportList = report_list.Report_list(report_box, self.con, self.cur)
+    self.reportList.init()
+
   def stop(self):
     module.Module.stop(self)
 
     # This module is slow to start, we just hide it
     self.rootitem.props.visibility = goocanvas.ITEM_INVISIBLE
     self.logList.hide()
+    self.reportList.hide()
 
     # Close the database
     self.cur.close()
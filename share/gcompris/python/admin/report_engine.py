@@ -0,0 +1,213 @@
+#  gcompris - report_engine.py
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# Summaries of the logs for the reports.
+#
+# The logs are summed up in two tables, kept in the database:
+#   report_summary : the number of runs, of successful runs and the total
+#                    duration by user, board, level and week
+#   report_durations : the number of runs by user, board, level and
+#                      duration, from which the median durations are
+#                      computed
+# Only the logs added since the last update are read, with GROUP BY
+# queries, and added to the summaries. If logs have been removed the
+# summaries are computed again from scratch.
+
+class ReportEngine:
+  """ Progress reports over the logs table """
+
+  def __init__(self, db_connect, db_cursor, success_status):
+    """
+    Constructor:
+      success_status : the log status values that count as a success
+    """
+    self.con = db_connect
+    self.cur = db_cursor
+    self.success_status = tuple(success_status)
+    self.create_tables()
+
+  def create_tables(self):
+    self.cur.execute('CREATE TABLE IF NOT EXISTS report_state (' +
+                     'name TEXT PRIMARY KEY, value INTEGER)')
+    self.cur.execute('CREATE TABLE IF NOT EXISTS report_summary (' +
+                     'user_id INTEGER, board_id INTEGER, level INTEGER, week TEXT, ' +
+                     'runs INTEGER, wins INTEGER, duration INTEGER, ' +
+                     'PRIMARY KEY (user_id, board_id, level, week))')
+    self.cur.execute('CREATE TABLE IF NOT EXISTS report_durations (' +
+                     'user_id INTEGER, board_id INTEGER, level INTEGER, duration INTEGER, ' +
+                     'runs INTEGER, ' +
+                     'PRIMARY KEY (user_id, board_id, level, duration))')
+    self.con.commit()
+
+  def get_state(self, name):
+    self.cur.execute('SELECT value FROM report_state WHERE name=?', (name,))
+    result = self.cur.fetchone()
+    if result == None:
+      return 0
+    return result[0]
+
+  def set_state(self, name, value):
+    self.cur.execute('INSERT OR REPLACE INTO report_state (name, value) VALUES (?, ?)',
+                     (name, value))
+
+  # -------------------
+  # Update
+  # -------------------
+
+  def clear(self):
+    self.cur.execute('DELETE FROM report_summary')
+    self.cur.execute('DELETE FROM report_durations')
+    self.set_state('last_rowid', 0)
+    self.set_state('log_count', 0)
+
+  def update(self):
+    """ Add the logs written since the last update to the summaries """
+    try:
+      last = self.get_state('last_rowid')
+
+      # Logs removed since, start again
+      self.cur.execute('SELECT count(*) FROM logs WHERE rowid <= ?', (last,))
+      if self.cur.fetchone()[0] != self.get_state('log_count'):
+        self.clear()
+        last = 0
+
+      self.cur.execute('SELECT max(rowid) FROM logs')
+      top = self.cur.fetchone()[0]
+      if top == None or top <= last:
+        self.con.commit()
+        return
+
+      # The new logs, grouped. NULL are replaced by -1 so that they are
+      # equal in the primary keys.
+      success = ', '.join(['?'] * len(self.success_status))
+      self.cur.execute(
+        'INSERT OR REPLACE INTO report_summary ' +
+        '(user_id, board_id, level, week, runs, wins, duration) ' +
+        'SELECT n.user_id, n.board_id, n.level, n.week, ' +
+        'n.runs + IFNULL(s.runs, 0), n.wins + IFNULL(s.wins, 0), ' +
+        'n.duration + IFNULL(s.duration, 0) ' +
+        'FROM (SELECT IFNULL(user_id, -1) AS user_id, IFNULL(board_id, -1) AS board_id, ' +
+        'IFNULL(level, -1) AS level, IFNULL(strftime(\'%Y-%W\', date), \'\') AS week, ' +
+        'count(*) AS runs, sum(status IN (' + success + ')) AS wins, ' +
+        'sum(IFNULL(duration, 0)) AS duration ' +
+        'FROM logs WHERE rowid > ? AND rowid <= ? ' +
+        'GROUP BY 1, 2, 3, 4) AS n ' +
+        'LEFT JOIN report_summary AS s ON s.user_id = n.user_id ' +
+        'AND s.board_id = n.board_id AND s.level = n.level AND s.week = n.week',
+        self.success_status + (last, top))
+
+      self.cur.execute(
+        'INSERT OR REPLACE INTO report_durations ' +
+        '(user_id, board_id, level, duration, runs) ' +
+        'SELECT n.user_id, n.board_id, n.level, n.duration, ' +
+        'n.runs + IFNULL(d.runs, 0) ' +
+        'FROM (SELECT IFNULL(user_id, -1) AS user_id, IFNULL(board_id, -1) AS board_id, ' +
+        'IFNULL(level, -1) AS level, IFNULL(duration, 0) AS duration, ' +
+        'count(*) AS runs ' +
+        'FROM logs WHERE rowid > ? AND rowid <= ? ' +
+        'GROUP BY 1, 2, 3, 4) AS n ' +
+        'LEFT JOIN report_durations AS d ON d.user_id = n.user_id ' +
+        'AND d.board_id = n.board_id AND d.level = n.level AND d.duration = n.duration',
+        (last, top))
+
+      self.cur.execute('SELECT count(*) FROM logs WHERE rowid <= ?', (top,))
+      self.set_state('log_count', self.cur.fetchone()[0])
+      self.set_state('last_rowid', top)
+      self.con.commit()
+    except:
+      self.con.rollback()
+      raise
+
+  # -------------------
+  # Reports
+  # -------------------
+
+  # Return the SQL condition and its parameters restricting a summary
+  # table to a user, the users of a class or a board
+  def scope(self, table, user_id=None, class_id=None, board_id=None):
+    where = []
+    params = []
+    if user_id != None:
+      where.append(table + '.user_id=?')
+      params.append(user_id)
+    if class_id != None:
+      where.append(table + '.user_id IN (SELECT user_id FROM users WHERE class_id=?)')
+      params.append(class_id)
+    if board_id != None:
+      where.append(table + '.board_id=?')
+      params.append(board_id)
+    if not where:
+      return ('', params)
+    return ('WHERE ' + ' AND '.join(where) + ' ', params)
+
+  def level_stats(self, user_id=None, class_id=None, board_id=None):
+    """
+    Return for each board and level the list of
+      (board_id, board name, level, runs, successful runs,
+       median duration, total duration)
+    of the logs of a user, of the users of a class or of a board, of all
+    the logs if none is given
+    """
+    (where, params) = self.scope('s', user_id, class_id, board_id)
+    self.cur.execute('SELECT s.board_id, boards.name, s.level, ' +
+                     'sum(s.runs), sum(s.wins), sum(s.duration) ' +
+                     'FROM report_summary AS s ' +
+                     'LEFT JOIN boards ON boards.board_id = s.board_id ' +
+                     where +
+                     'GROUP BY s.board_id, s.level ' +
+                     'ORDER BY boards.name, s.level', params)
+    stats = self.cur.fetchall()
+
+    medians = self.median_durations(user_id, class_id, board_id)
+    return [(board_id, name, level, runs, wins,
+             medians.get((board_id, level), 0), duration)
+            for (board_id, name, level, runs, wins, duration) in stats]
+
+  def median_durations(self, user_id=None, class_id=None, board_id=None):
+    """ Return the {(board_id, level): median duration} of the logs """
+    (where, params) = self.scope('d', user_id, class_id, board_id)
+    self.cur.execute('SELECT d.board_id, d.level, d.duration, sum(d.runs) ' +
+                     'FROM report_durations AS d ' +
+                     where +
+                     'GROUP BY d.board_id, d.level, d.duration ' +
+                     'ORDER BY d.board_id, d.level, d.duration', params)
+
+    # Group the (duration, runs) by board and level
+    histograms = {}
+    for (board, level, duration, runs) in self.cur.fetchall():
+      histograms.setdefault((board, level), []).append((duration, runs))
+
+    medians = {}
+    for (key, histogram) in histograms.iteritems():
+      total = sum([runs for (duration, runs) in histogram])
+      seen = 0
+      for (duration, runs) in histogram:
+        seen += runs
+        if seen * 2 >= total:
+          medians[key] = duration
+          break
+    return medians
+
+  def weekly_time(self, user_id=None, class_id=None, board_id=None):
+    """ Return the list of the (week, runs, total duration) of the logs,
+    the week being 'YYYY-WW' """
+    (where, params) = self.scope('s', user_id, class_id, board_id)
+    self.cur.execute('SELECT s.week, sum(s.runs), sum(s.duration) ' +
+                     'FROM report_summary AS s ' +
+                     where +
+                     'GROUP BY s.week ORDER BY s.week', params)
+    return self.cur.fetchall()
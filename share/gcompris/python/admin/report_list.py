@@ -0,0 +1,253 @@
+#  gcompris - report_list.py
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+
+import gcompris
+import gcompris.bonus
+import gtk
+import gtk.gdk
+import gobject
+from gcompris import gcompris_gettext as _
+
+import constants
+import report_engine
+
+# Board summary
+(
+  COLUMN_BOARD,
+  COLUMN_LEVEL,
+  COLUMN_RUNS,
+  COLUMN_SUCCESS,
+  COLUMN_MEDIAN,
+  COLUMN_TIME,
+) = range(6)
+
+# Week summary
+(
+  COLUMN_WEEK,
+  COLUMN_WEEK_RUNS,
+  COLUMN_WEEK_TIME,
+) = range(3)
+
+class Report_list:
+  """GCompris Summary of the logs by user or class"""
+
+
+  # frame is the container for the lists
+  def __init__(self, frame, db_connect, db_cursor):
+
+      self.frame = frame
+      self.cur = db_cursor
+      self.con = db_connect
+
+  def init(self):
+
+      # The (user_id, class_id) of each combo entry
+      self.scope_list = []
+      self.current_scope = (None, None)
+
+      self.engine = report_engine.ReportEngine(self.con, self.cur,
+                                               (gcompris.bonus.WIN,
+                                                gcompris.bonus.COMPLETED))
+
+      # create tree models
+      self.board_model = gtk.ListStore(
+          gobject.TYPE_STRING,
+          gobject.TYPE_INT,
+          gobject.TYPE_INT,
+          gobject.TYPE_INT,
+          gobject.TYPE_INT,
+          gobject.TYPE_INT)
+
+      self.week_model = gtk.ListStore(
+          gobject.TYPE_STRING,
+          gobject.TYPE_INT,
+          gobject.TYPE_INT)
+
+      # Main box is vertical
+      top_box = gtk.VBox(False, 8)
+      top_box.show()
+      self.frame.add(top_box)
+
+      # First line label and combo
+      label_box = gtk.HBox(False, 8)
+      label_box.show()
+      top_box.pack_start(label_box, False, False, 0)
+
+      scope_label = gtk.Label(_('Select a class or a user:'))
+      scope_label.show()
+      label_box.pack_start(scope_label, False, False, 0)
+
+      self.combo_scope = gtk.combo_box_new_text()
+      self.combo_scope.show()
+      label_box.pack_end(self.combo_scope, True, True, 0)
+      self.fill_scope_combo()
+      self.scope_handler = self.combo_scope.connect('changed',
+                                                    self.scope_changed_cb)
+
+      # Second line the summaries and button
+      report_hbox = gtk.HBox(False, 8)
+      report_hbox.show()
+      top_box.add(report_hbox)
+
+      lists_box = gtk.VBox(False, 8)
+      lists_box.show()
+      report_hbox.add(lists_box)
+
+      vbox_button = gtk.VBox(False, 8)
+      vbox_button.show()
+      report_hbox.pack_start(vbox_button, False, False, 0)
+
+      treeview = self.create_treeview(lists_box, self.board_model)
+      treeview.set_search_column(COLUMN_BOARD)
+      self.add_column(treeview, _('Board'), COLUMN_BOARD,
+                      constants.COLUMN_WIDTH_LOGIN)
+      self.add_column(treeview, _('Level'), COLUMN_LEVEL,
+                      constants.COLUMN_WIDTH_NUMBER)
+      self.add_column(treeview, _('Runs'), COLUMN_RUNS,
+                      constants.COLUMN_WIDTH_NUMBER)
+      self.add_column(treeview, _('Success %'), COLUMN_SUCCESS,
+                      constants.COLUMN_WIDTH_NUMBER)
+      self.add_column(treeview, _('Median duration'), COLUMN_MEDIAN,
+                      constants.COLUMN_WIDTH_NUMBER)
+      self.add_column(treeview, _('Total duration'), COLUMN_TIME,
+                      constants.COLUMN_WIDTH_NUMBER)
+
+      treeview = self.create_treeview(lists_box, self.week_model)
+      self.add_column(treeview, _('Week'), COLUMN_WEEK,
+                      constants.COLUMN_WIDTH_LOGIN)
+      self.add_column(treeview, _('Runs'), COLUMN_WEEK_RUNS,
+                      constants.COLUMN_WIDTH_NUMBER)
+      self.add_column(treeview, _('Total duration'), COLUMN_WEEK_TIME,
+                      constants.COLUMN_WIDTH_NUMBER)
+
+      # Refresh buttons
+      self.button_refresh = gtk.Button(stock='gtk-refresh')
+      self.button_refresh.connect("clicked", self.on_refresh_clicked)
+      vbox_button.pack_start(self.button_refresh, False, False, 0)
+      self.button_refresh.show()
+
+      self.combo_scope.set_active(0)
+
+  def show(self, db_connect, db_cursor):
+    self.cur = db_cursor
+    self.con = db_connect
+    self.engine.con = db_connect
+    self.engine.cur = db_cursor
+
+    # Users and classes may have been added or removed since, the combo
+    # keeps the same scope if it still exists
+    self.combo_scope.handler_block(self.scope_handler)
+    self.fill_scope_combo()
+    if self.current_scope in self.scope_list:
+      active = self.scope_list.index(self.current_scope)
+    else:
+      active = 0
+    self.current_scope = self.scope_list[active]
+    self.combo_scope.set_active(active)
+    self.combo_scope.handler_unblock(self.scope_handler)
+
+    self.reload_report()
+    self.frame.show()
+
+  def hide(self):
+    self.frame.hide()
+
+  def create_treeview(self, container, model):
+    sw = gtk.ScrolledWindow()
+    sw.show()
+    sw.set_shadow_type(gtk.SHADOW_ETCHED_IN)
+    sw.set_policy(gtk.POLICY_NEVER, gtk.POLICY_AUTOMATIC)
+
+    treeview = gtk.TreeView(model)
+    treeview.show()
+    treeview.set_rules_hint(True)
+    sw.add(treeview)
+
+    container.pack_start(sw, True, True, 0)
+    return treeview
+
+  def add_column(self, treeview, title, column_id, width):
+    renderer = gtk.CellRendererText()
+    renderer.set_data("column", column_id)
+    column = gtk.TreeViewColumn(title, renderer,
+                                text=column_id)
+    column.set_sort_column_id(column_id)
+    column.set_sizing(gtk.TREE_VIEW_COLUMN_FIXED)
+    column.set_fixed_width(width)
+    treeview.append_column(column)
+
+  # Put all users, each class and each user in the combo
+  def fill_scope_combo(self):
+    self.combo_scope.get_model().clear()
+    self.scope_list = []
+
+    self.combo_scope.append_text(_("All users"))
+    self.scope_list.append((None, None))
+
+    self.cur.execute('SELECT class_id, name FROM class ORDER BY name')
+    for (class_id, name) in self.cur.fetchall():
+      self.combo_scope.append_text(_("Class") + ' ' + name)
+      self.scope_list.append((None, class_id))
+
+    self.cur.execute('SELECT user_id, login, firstname, lastname FROM users ORDER BY login')
+    for (user_id, login, firstname, lastname) in self.cur.fetchall():
+      self.combo_scope.append_text(login + ' ' + firstname + ' ' + lastname)
+      self.scope_list.append((user_id, None))
+
+  # -------------------
+  # Report Management
+  # -------------------
+
+  # Update the summaries with the new logs and display them
+  def reload_report(self):
+    self.engine.update()
+
+    (user_id, class_id) = self.current_scope
+
+    self.board_model.clear()
+    for (board_id, name, level, runs, wins, median, duration) in \
+          self.engine.level_stats(user_id, class_id):
+      if name == None:
+        name = ""
+      iter = self.board_model.append()
+      self.board_model.set (iter,
+                            COLUMN_BOARD,   name,
+                            COLUMN_LEVEL,   level,
+                            COLUMN_RUNS,    runs,
+                            COLUMN_SUCCESS, wins * 100 / runs,
+                            COLUMN_MEDIAN,  median,
+                            COLUMN_TIME,    duration,
+                            )
+
+    self.week_model.clear()
+    for (week, runs, duration) in self.engine.weekly_time(user_id, class_id):
+      iter = self.week_model.append()
+      self.week_model.set (iter,
+                           COLUMN_WEEK,      week,
+                           COLUMN_WEEK_RUNS, runs,
+                           COLUMN_WEEK_TIME, duration,
+                           )
+
+  def on_refresh_clicked(self, button):
+    self.reload_report()
+
+  def scope_changed_cb(self, combobox):
+    active = combobox.get_active()
+    if active >= 0:
+      self.current_scope = self.scope_list[active]
+      self.reload_report()
@@ -0,0 +1,91 @@
+#  gcompris - thumbnail_cache.py
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# Small versions of the board icons, kept on disk.
+#
+# Rendering the SVG icons is slow, so each icon is rendered once at the
+# requested height and saved as a PNG file named after the icon path,
+# its modification time and the height. A changed icon gets a new name,
+# the old thumbnail is simply not used anymore.
+
+import os
+import hashlib
+import tempfile
+
+import gtk
+import gtk.gdk
+import gobject
+
+class ThumbnailCache:
+  """ Icons scaled to a height, cached in memory and in cache_dir """
+
+  def __init__(self, cache_dir):
+    self.cache_dir = cache_dir
+    self.pixbufs = {}
+
+  def thumbnail_name(self, filename, mtime, height):
+    key = '%s\0%d\0%d' % (filename, mtime, height)
+    return os.path.join(self.cache_dir,
+                        hashlib.sha1(key).hexdigest() + '.png')
+
+  def get(self, filename, height):
+    """ Return the image filename scaled to height as a pixbuf, None if
+    it cannot be loaded """
+    if (filename, height) in self.pixbufs:
+      return self.pixbufs[(filename, height)]
+
+    try:
+      mtime = int(os.stat(filename).st_mtime)
+    except OSError:
+      self.pixbufs[(filename, height)] = None
+      return None
+
+    thumbnail = self.thumbnail_name(filename, mtime, height)
+    pixbuf = None
+    if os.path.exists(thumbnail):
+      try:
+        pixbuf = gtk.gdk.pixbuf_new_from_file(thumbnail)
+      except gobject.GError:
+        pass
+
+    if not pixbuf:
+      try:
+        # The width follows the aspect ratio
+        pixbuf = gtk.gdk.pixbuf_new_from_file_at_size(filename, -1, height)
+      except gobject.GError:
+        self.pixbufs[(filename, height)] = None
+        return None
+      self.save(pixbuf, thumbnail)
+
+    self.pixbufs[(filename, height)] = pixbuf
+    return pixbuf
+
+  # Write the thumbnail under a temporary name first so that another
+  # process never reads it half written. The cache is only an help,
+  # failing to write it is not an error.
+  def save(self, pixbuf, thumbnail):
+    temporary = None
+    try:
+      if not os.path.isdir(self.cache_dir):
+        os.makedirs(self.cache_dir)
+      (fd, temporary) = tempfile.mkstemp('.png', '', self.cache_dir)
+      os.close(fd)
+      pixbuf.save(temporary, 'png')
+      os.rename(temporary, thumbnail)
+    except (OSError, IOError, gobject.GError):
+      if temporary and os.path.exists(temporary):
+        os.remove(temporary)
@@ -0,0 +1,134 @@
+#  gcompris - user_import.py
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# Import of a user list file in a class.
+#
+# The file has one user per line:
+#   login;First name;Last name;Date of birth
+# the separator being the most used of ',', ';' or ':' on the first line.
+# The whole file is inserted in a single transaction.
+
+import csv
+import time
+
+from gcompris import gcompris_gettext as _
+
+SEPARATORS = (',', ';', ':')
+
+FIELDS = 4
+
+def guess_separator(line):
+  """ Return the most used separator of the line, ';' if none is used """
+  sep = ';'
+  count = 0
+  for asep in SEPARATORS:
+    c = line.count(asep)
+    if(c > count):
+      count = c
+      sep = asep
+  return sep
+
+def read_users(file):
+  """
+  Parse a user list file.
+  Return (users, errors):
+    users : the list of the (login, firstname, lastname, birthdate)
+    errors : the list of the (line number, message) of the bad lines
+  """
+  first = file.readline()
+  file.seek(0)
+  sep = guess_separator(first)
+
+  users = []
+  errors = []
+  reader = csv.reader(file, delimiter = sep)
+  while True:
+    try:
+      row = reader.next()
+    except StopIteration:
+      break
+    except csv.Error, e:
+      errors.append((reader.line_num, _("bad line (%s)") % str(e)))
+      continue
+
+    if not [field for field in row if field.strip()]:
+      continue
+    if len(row) != FIELDS:
+      errors.append((reader.line_num,
+                     _("%d fields instead of %d") % (len(row), FIELDS)))
+      continue
+    try:
+      row = [field.strip().decode('utf-8') for field in row]
+    except UnicodeDecodeError:
+      errors.append((reader.line_num, _("not encoded in UTF-8")))
+      continue
+    if not row[0]:
+      errors.append((reader.line_num, _("empty login")))
+      continue
+    users.append(tuple(row))
+
+  return (users, errors)
+
+def import_users(con, cur, class_id, users):
+  """
+  Insert users, a list of (login, firstname, lastname, birthdate), in
+  the class class_id.
+  Logins must be unique regardless of case, a login already used gets
+  a suffix to make it unique.
+  Return (new_users, rejected):
+    new_users : the inserted (user_id, login, firstname, lastname,
+                birthdate, class_id)
+    rejected : the logins that had to be changed
+  """
+  try:
+    cur.execute('SELECT login FROM users')
+    used_logins = set([x[0].upper() for x in cur.fetchall()])
+
+    # The ids of the new users are a range after the highest one
+    cur.execute('SELECT max(user_id) FROM users')
+    user_id = cur.fetchone()[0]
+    if(user_id == None):
+      user_id = 0
+    else:
+      user_id += 1
+
+    stamp = str(time.time())
+    new_users = []
+    rejected = []
+    for (login, firstname, lastname, birthdate) in users:
+      if login.upper() in used_logins:
+        rejected.append(login)
+        new_login = login + stamp
+        count = 1
+        while new_login.upper() in used_logins:
+          new_login = "%s%s-%d" % (login, stamp, count)
+          count += 1
+        login = new_login
+      used_logins.add(login.upper())
+
+      new_users.append((user_id, login, firstname, lastname, birthdate,
+                        class_id))
+      user_id += 1
+
+    cur.executemany('INSERT OR REPLACE INTO users (user_id, login, firstname, lastname, birthdate, class_id) VALUES (?, ?, ?, ?, ?, ?)',
+                    new_users)
+    con.commit()
+  except:
+    con.rollback()
+    raise
+
+  return (new_users, rejected)
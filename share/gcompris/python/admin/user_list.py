@@ -26,6 +26,7 @@ from gcompris import gcompris_gettext as _
 
 import constants
 import user_edit
+import user_import
 
 # User Management
 (
@@ -309,52 +310,36 @@ class User_list:
 
     dialog.destroy()
 
-    # Parse the file and include each line in the user table
-    file = open(filename, 'r')
-
-    # Determine the separator (the most used in the set ,;:)
-    # Warning, the input file must use the same separator on each line and
-    # between each fields
-    line = file.readline()
-    file.seek(0)
-    sep=''
-    count=0
-    for asep in [',', ';', ':']:
-      c = line.count(asep)
-      if(c>count):
-        count=c
-        sep=asep
-
-    self.cur.execute('SELECT login FROM users')
-
-    passed_upper_login = [x[0].upper() for x in self.cur.fetchall()]
-
-    rejected = []
-
-    for line in file.readlines():
-      line = line.rstrip("\n\r")
-      user_id = self.get_next_user_id()
-      login, firstname, lastname, birthdate = line.split(sep)
-
-      #check uppercase are unique.
-      up_login = login.decode('utf-8').upper()
-      if up_login in passed_upper_login:
-        rejected.append(login.encode('utf-8'))
-        import time
-        login = login + str(time.time())
-      else:
-        passed_upper_login.append(up_login)
-
-      # Save the changes in the base
-      new_user = [user_id, login, firstname, lastname, birthdate, self.class_id]
+    # Parse the file and include all its users in the user table at once
+    file = open(filename, 'rb')
+    try:
+      (users, errors) = user_import.read_users(file)
+    finally:
+      file.close()
+
+    (new_users, rejected) = user_import.import_users(self.con, self.cur,
+                                                     self.class_id, users)
+    for new_user in new_users:
       self.add_user_in_model(model, new_user)
-      self.cur.execute('INSERT OR REPLACE INTO users (user_id, login, firstname, lastname, birthdate, class_id) VALUES (?, ?, ?, ?, ?, ?)', new_user)
-      self.con.commit()
+
+    if len(errors) != 0:
+      p = ''
+      for (line, error) in errors[:10]:
+        p = p + '\n' + (_("line %d: %s") % (line, error))
+      if len(errors) > 10:
+        p = p + '\n...'
+
+      dialog = gtk.MessageDialog(None,
+                               gtk.DIALOG_MODAL | gtk.DIALOG_DESTROY_WITH_PARENT,
+                               gtk.MESSAGE_INFO, gtk.BUTTONS_OK,
+                               _("%d lines could not be imported:%s") % (len(errors), p))
+      dialog.run()
+      dialog.destroy()
 
     if len(rejected) != 0:
       p = ''
       for rej in rejected:
-        p = p + ' ' + rej
+        p = p + ' ' + rej.encode('utf-8')
 
       p.strip()
       dialog = gtk.MessageDialog(None,
@@ -364,8 +349,6 @@ class User_list:
       dialog.run()
       dialog.destroy()
 
-    file.close()
-
 
   # The user is changed ...
   def user_changed_cb(self, selection, treeview):
@@ -46,10 +46,12 @@ import sys
 import tempfile
 import cPickle as pickle
 import base64
+import bisect
 
 from Color import *
 from Timeline import *
 from AnimItem import *
+import AnimFile
 
 fles=None
 
@@ -523,8 +525,12 @@ class Gcompris_anim:
       )
     self.root_playingitem.props.visibility = goocanvas.ITEM_INVISIBLE
 
-    # intervall = 1000 / anim_speed
+    # anim_speed is the number of timeline frames played per second,
+    # render_fps the number of images drawn per second. The images
+    # between two frames are tweened.
     self.anim_speed=5
+    self.render_fps=25
+    self.play_time=0.0
 
     run = \
       goocanvas.Image(
@@ -597,9 +603,6 @@ class Gcompris_anim:
         else:
           self.anim_speed=self.anim_speed-1
 
-      gobject.source_remove(self.timeout)
-      self.timeout = gobject.timeout_add(1000/self.anim_speed,
-                                         self.refresh_loop)
       self.speed_item.set_properties(text = self.anim_speed)
 
   def deselect(self):
@@ -728,7 +731,12 @@ class Gcompris_anim:
     return False
 
   def refresh_loop(self):
-    self.doc.timeline.next()
+    self.play_time += float(self.anim_speed) / self.render_fps
+    if self.play_time >= 1:
+      self.play_time -= 1
+      self.doc.timeline.next()
+    if self.play_time > 0:
+      self.doc.refresh(self.doc.timeline.get_time() + self.play_time)
     return True
 
   def playing_start(self):
@@ -736,7 +744,9 @@ class Gcompris_anim:
       self.running = True
       self.root_toolitem.props.visibility = goocanvas.ITEM_INVISIBLE
       self.root_playingitem.props.visibility = goocanvas.ITEM_VISIBLE
-      self.timeout = gobject.timeout_add(1000/self.anim_speed,
+      self.play_time = 0.0
+      self.doc.invalidate()
+      self.timeout = gobject.timeout_add(1000/self.render_fps,
                                          self.refresh_loop)
       self.color.hide()
 
@@ -789,13 +799,16 @@ class Document:
     # Set to true when the order or the list of object has changed
     self.zorderDirty = False
 
+    # When True, the items move smoothly between their keyframes
+    # instead of jumping from one to the next
+    self.tweening = True
+
     # Create our rootitem. We put each canvas item in it so at the end we
     # only have to kill it. The canvas deletes all the items it contains
     # automaticaly.
     self.rootitem = goocanvas.Group(
       parent =  self.anim.gcomprisBoard.canvas.get_root_item())
 
-    self.pickle_protocol = 2
     self.format_string = { 'gcompris' : 'GCompris anim 3 cPikle file' }
 
   def __del__(self):
@@ -807,7 +820,15 @@ class Document:
     # display them if they have to
     for item in self.animlist:
       item.display_at_time(time)
-    self.restore_zorder()
+
+    # The z order only changes on timeline frames, not while tweening
+    if time == int(time):
+      self.restore_zorder()
+
+  # Forget what the items display, the next refresh sets them all
+  def invalidate(self):
+    for item in self.animlist:
+      item.shown = -1
 
 
   def zorder_dirty(self):
@@ -827,62 +848,119 @@ class Document:
     self.zorderDirty = False
 
   def restore_zorder(self):
-    z_order = []
     if self.timeline.get_time() in self.zorder:
       z_order = self.zorder[self.timeline.get_time()]
     else:
       return
 
-    # Build the list of items_is present in the image
-    present_items = []
+    # The items ids in their current order, None for a missing child so
+    # that the indexes stay those of the canvas
+    ids = []
     for i in range(self.rootitem.get_n_children()):
       item = self.rootitem.get_child(i)
       if item:
-        present_items.append( item.get_data("id") )
-
-    # Remove items in z_order that are not in present_items
-    z_order = [item for item in z_order if item in present_items]
-
-    for z_item_id in z_order:
-      for i in range(self.rootitem.get_n_children()):
-        item = self.rootitem.get_child(i)
-        if item:
-          item_id = item.get_data("id")
-          if ( item_id == z_item_id ):
-            z_index = z_order.index(item_id)
-            if ( i != z_index ):
-              try:
-                self.rootitem.move_child(i, z_index);
-                break
-              except ValueError:
-                pass
+        ids.append(item.get_data("id"))
+      else:
+        ids.append(None)
+
+    # Keep the items of z_order that are present
+    present_items = set(ids)
+    z_order = [item_id for item_id in z_order if item_id in present_items]
+    if len(z_order) < 2:
+      return
+
+    # The items already in the right order are the longest increasing
+    # sequence of their rank in z_order, only the others have to move
+    rank = dict([(item_id, r) for (r, item_id) in enumerate(z_order)])
+    ranks = [rank[item_id] for item_id in ids if item_id in rank]
+    keep = set([z_order[r] for r in longest_increasing(ranks)])
+
+    # Each moved item goes just above the previous one in z_order, the
+    # first ones just below the lowest kept item. The moved items thus
+    # make chains each hanging off a kept item, which gives the final
+    # place of everything as a slot (index, side, rank) where index is
+    # the current index of the kept item.
+    index = dict([(item_id, i) for (i, item_id) in enumerate(ids)
+                  if item_id in rank])
+    source = {}
+    target = {}
+    anchor = (index[z_order[min([rank[i] for i in keep])]], -1)
+    for r in range(len(z_order)):
+      item_id = z_order[r]
+      if item_id in keep:
+        anchor = (index[item_id], 1)
+      else:
+        source[item_id] = (index[item_id], 0, 0)
+        target[item_id] = anchor + (r,)
+
+    # The canvas index of a slot is the count of the used slots before it
+    slots = [(i, 0, 0) for i in range(len(ids))] + target.values()
+    slots.sort()
+    slot_number = dict([(slot, n) for (n, slot) in enumerate(slots)])
+    used = SlotCounter(len(slots))
+    for i in range(len(ids)):
+      used.add(slot_number[(i, 0, 0)], 1)
+
+    for item_id in z_order:
+      if item_id in keep:
+        continue
+      old = used.count_before(slot_number[source[item_id]])
+      used.add(slot_number[source[item_id]], -1)
+      new = used.count_before(slot_number[target[item_id]])
+      used.add(slot_number[target[item_id]], 1)
+      self.rootitem.move_child(old, new)
 
   def anim_to_file(self, filename):
 
     file = open(filename, 'wb')
+    try:
+      AnimFile.write(file,
+                     self.timeline.get_lastmark(),
+                     self.zorder,
+                     [item.get_record() for item in self.animlist])
+    finally:
+      file.close()
 
-    # Save the descriptif frame:
-    pickle.dump(self.format_string['gcompris'], file, self.pickle_protocol)
 
-    # Save the last mark
-    pickle.dump(self.timeline.get_lastmark(), file, self.pickle_protocol)
+  def file_to_anim(self, filename):
 
-    # Save the animation
-    pickle.dump(self.animlist, file, self.pickle_protocol)
+    file = open(filename, 'rb')
+    try:
+      if AnimFile.is_anim_file(file):
+        try:
+          (lastmark, zorder, records) = AnimFile.read(file)
+        except AnimFile.FormatError, e:
+          print "ERROR: Cannot load", filename, ":", e
+          return
+        self.load_anim(lastmark, zorder,
+                       [item_from_record(record) for record in records])
+      else:
+        self.file_to_anim_pickle(filename, file)
+    finally:
+      file.close()
 
-    # Save the z order
-    pickle.dump(self.zorder, file, self.pickle_protocol)
+  # Replace the animation by the given one
+  def load_anim(self, lastmark, zorder, animlist):
+    self.anim.deselect()
+    for item in self.animlist[:]:
+      item.delete()
 
-    file.close()
+    self.timeline.set_lastmark(lastmark)
+    self.animlist = animlist
+    for item in self.animlist:
+      item.restore(self.anim)
 
+    self.zorder = zorder
 
-  def file_to_anim(self, filename):
+    # Restore is complete
+    self.timeline.set_time(0)
+    self.refresh(0)
 
-    file = open(filename, 'rb')
+  # Load the files saved by the previous versions of anim
+  def file_to_anim_pickle(self, filename, file):
     try:
       desc = pickle.load(file)
     except:
-      file.close()
       print 'Cannot load ', filename , " as a GCompris animation"
       return
 
@@ -890,42 +968,75 @@ class Document:
       # string
       if 'desc' != self.format_string['gcompris']:
         if (desc == 'GCompris anim 3 cPikle file'):
-
-          self.anim.deselect()
-          for item in self.animlist[:]:
-            item.delete()
-
-          self.timeline.set_lastmark(pickle.load(file))
-          self.animlist = pickle.load(file)
-          for item in self.animlist:
-            item.restore(self.anim)
-
-          self.zorder = pickle.load(file)
-
-          # Restore is complete
-          self.timeline.set_time(0)
-          self.refresh(0)
+          lastmark = pickle.load(file)
+          animlist = pickle.load(file)
+          zorder = pickle.load(file)
+          self.load_anim(lastmark, zorder, animlist)
         else:
           print "ERROR: Unrecognized file format, file", filename, ' has description : ', desc
-          file.close()
           return
       else:
         print "ERROR: Unrecognized file format (desc), file", filename, ' has description : ', desc
-        file.close()
         return
 
     elif type(desc) == type(1):
       print filename, 'has no description. Are you sure it\'s', \
           self.format_string['gcompris'],'?'
 
-    file.close()
-
 
 ###############################################
 #
 #             GLOBAL functions
 #
 ###############################################
+
+# Return the longest increasing subsequence of the numbers in sequence,
+# in O(n log n)
+def longest_increasing(sequence):
+  # tails[k] is the index of the smallest end of an increasing
+  # subsequence of length k + 1
+  tails = []
+  tail_values = []
+  previous = [None] * len(sequence)
+  for (i, value) in enumerate(sequence):
+    k = bisect.bisect_left(tail_values, value)
+    if k > 0:
+      previous[i] = tails[k - 1]
+    if k == len(tails):
+      tails.append(i)
+      tail_values.append(value)
+    else:
+      tails[k] = i
+      tail_values[k] = value
+
+  result = []
+  if tails:
+    i = tails[-1]
+    while i != None:
+      result.append(sequence[i])
+      i = previous[i]
+  result.reverse()
+  return result
+
+# Counts of used slots, with the count of those before a slot in
+# O(log n) (a Fenwick tree)
+class SlotCounter:
+  def __init__(self, size):
+    self.tree = [0] * (size + 1)
+
+  def add(self, slot, count):
+    slot += 1
+    while slot < len(self.tree):
+      self.tree[slot] += count
+      slot += slot & -slot
+
+  def count_before(self, slot):
+    result = 0
+    while slot > 0:
+      result += self.tree[slot]
+      slot -= slot & -slot
+    return result
+
 def general_save(filename, filetype, fles):
   #print "filename=%s filetype=%s" %(filename, filetype)
   fles.doc.anim_to_file(filename)
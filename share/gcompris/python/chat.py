@@ -41,6 +41,42 @@ import uuid
 
 from socket import gethostname
 
+# The points of a freehand stroke are sent in one packet every
+# STROKE_INTERVAL ms, or as soon as STROKE_MAX_POINTS are waiting.
+# Older versions of the activity only know DRAW, they do not show them.
+STROKE_INTERVAL = 50
+STROKE_MAX_POINTS = 200
+
+# Number of received packets remembered for each sender, the older half
+# is forgotten when it is reached
+STROKE_HISTORY = 1024
+
+def encode_stroke(points):
+  """ Return the points as 'x,y,dx,dy,dx,dy...', each point being given
+  as its move from the previous one """
+  values = []
+  (last_x, last_y) = (0, 0)
+  for (x, y) in points:
+    (x, y) = (int(round(x)), int(round(y)))
+    values.append(str(x - last_x))
+    values.append(str(y - last_y))
+    (last_x, last_y) = (x, y)
+  return ",".join(values)
+
+def decode_stroke(payload):
+  """ Return the points of an encode_stroke() payload, raise ValueError
+  if it is not valid """
+  values = [int(v) for v in payload.split(",")]
+  if not values or len(values) % 2:
+    raise ValueError("bad stroke")
+  points = []
+  (x, y) = (0, 0)
+  for i in range(0, len(values), 2):
+    x += values[i]
+    y += values[i + 1]
+    points.append((x, y))
+  return points
+
 class Gcompris_chat:
   """The chat activity"""
 
@@ -54,9 +90,22 @@ class Gcompris_chat:
     self.port = 15922
     self.mcast_timer = 0
     self.sock = None
+    # The socket our messages are sent with
+    self.send_sock = None
     # Used to recognize our own network message
     self.uuid = uuid.uuid1().hex
 
+    # The stroke being drawn: its number, the number of the next packet,
+    # the points not sent yet and the last point sent
+    self.stroke_id = 0
+    self.stroke_seq = 0
+    self.stroke_points = []
+    self.stroke_last = None
+    self.stroke_color = ""
+    self.stroke_timer = 0
+    # The (stroke, packet) numbers received from each sender
+    self.received_strokes = {}
+
     # These are used to let us restart only after the bonus is displayed.
     # When the bonus is displayed, it call us first with pause(1) and then with pause(0)
     self.board_paused  = 0;
@@ -365,6 +414,8 @@ class Gcompris_chat:
 
 
   def cleanup(self):
+    self.stroke_end()
+
     #tell the others to remove me from the friend-lists of the other clients:
     prop = gcompris.get_properties()
     self.send_message("GCOMPRIS:LEAVE:%s:%s:%s" % (self.channel.get_text(),
@@ -377,6 +428,10 @@ class Gcompris_chat:
     if self.sock:
       self.sock.close()
 
+    if self.send_sock:
+      self.send_sock.close()
+      self.send_sock = None
+
     # Remove the root item removes all the others inside it
     if self.rootitem != None:
      self.rootitem.remove()
@@ -417,7 +472,8 @@ class Gcompris_chat:
       if(textl[0] != "GCOMPRIS"):
           return
 
-      if(textl[1] != "CHAT" and textl[1] != "DRAW" and textl[1] != "LEAVE"):
+      if(textl[1] != "CHAT" and textl[1] != "DRAW" and textl[1] != "STROKE"
+         and textl[1] != "LEAVE"):
           return
       if(textl[2] != self.channel.get_text()):
           return
@@ -460,6 +516,31 @@ class Gcompris_chat:
           x2 = self.convertStr(textl[9])
           y2 = self.convertStr(textl[10])
           self.draw_line(x, y, x2, y2, color)
+      if (textl[1] == "STROKE"):
+        # don't paint our own drawing
+        if self.uuid == textl[5]:
+          return False
+
+        try:
+          packet = (int(textl[6]), int(textl[7]))
+          points = decode_stroke(textl[8])
+        except (IndexError, ValueError):
+          return False
+
+        # Packets stand on their own and can be drawn in any order, only
+        # the duplicates are dropped
+        received = self.received_strokes.setdefault(textl[5], set())
+        if packet in received:
+          return False
+        received.add(packet)
+        if len(received) >= STROKE_HISTORY:
+          self.received_strokes[textl[5]] = \
+              set(sorted(received)[STROKE_HISTORY / 2:])
+
+        if len(points) == 1:
+          self.draw_point(points[0][0], points[0][1], color)
+        else:
+          self.draw_polyline(points, color)
 
       return False
 
@@ -547,12 +628,63 @@ class Gcompris_chat:
   def send_message(self, message):
     """sends the given message."""
 
-    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM,
-                         socket.IPPROTO_UDP)
-    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+    if not self.send_sock:
+      self.send_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM,
+                                     socket.IPPROTO_UDP)
+      self.send_sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+
+    self.send_sock.sendto(message, (self.mcast_adress, self.port))
+
+  def stroke_start(self, x, y, color):
+    """starts sending a freehand stroke at the given point."""
+    self.stroke_end()
+    self.stroke_id += 1
+    self.stroke_seq = 0
+    self.stroke_points = [(x, y)]
+    self.stroke_last = None
+    self.stroke_color = color
+    self.stroke_timer = gobject.timeout_add(STROKE_INTERVAL,
+                                            self.stroke_timeout)
+
+  def stroke_add(self, x, y):
+    """adds a point to the stroke, it is sent with the next packet."""
+    self.stroke_points.append((x, y))
+    if len(self.stroke_points) >= STROKE_MAX_POINTS:
+      self.stroke_flush()
+
+  def stroke_end(self):
+    """sends the remaining points of the stroke."""
+    self.stroke_flush()
+    if self.stroke_timer:
+      gobject.source_remove(self.stroke_timer)
+      self.stroke_timer = 0
+
+  def stroke_timeout(self):
+    self.stroke_flush()
+    return True
+
+  def stroke_flush(self):
+    """sends the points added since the last packet as a polyline."""
+    if not self.stroke_points:
+      return
+
+    # Each packet starts with the last point of the previous one, so it
+    # can be drawn even if the previous one is lost
+    points = self.stroke_points
+    if self.stroke_last:
+      points = [self.stroke_last] + points
+
+    Prop = gcompris.get_properties()
+    message = ("GCOMPRIS:STROKE:" + self.channel.get_text() + ":" +
+               Prop.logged_user.login + ":" + self.stroke_color + ":" +
+               self.uuid + ":" +
+               str(self.stroke_id) + ":" + str(self.stroke_seq) + ":" +
+               encode_stroke(points))
+    self.send_message(message)
 
-    sock.sendto(message, (self.mcast_adress, self.port))
-    sock.close()
+    self.stroke_last = points[-1]
+    self.stroke_points = []
+    self.stroke_seq += 1
 
   def delAllEvent(self, widget, target, event=None):
      """removes the draw board content."""
@@ -575,8 +707,7 @@ class Gcompris_chat:
         self.lastx =self.pos_x
         self.lasty =self.pos_y
         self.draw_point(self.pos_x, self.pos_y, self.get_selectedcolor())
-        self.send_drawboard_content(self.pos_x, self.pos_y,
-                                    None, None, self.get_selectedcolor())
+        self.stroke_start(self.pos_x, self.pos_y, self.get_selectedcolor())
     # do action while mouse button is pressed and in movement
     elif event.type == gtk.gdk.MOTION_NOTIFY \
           and event.state & gtk.gdk.BUTTON1_MASK:
@@ -598,14 +729,8 @@ class Gcompris_chat:
             self.draw_line(self.lastx, self.lasty,
                            event.x, event.y,
                            self.get_selectedcolor())
-            self.send_drawboard_content(self.lastx, self.lasty,
-                                        event.x, event.y,
-                                        self.get_selectedcolor())
-
             self.draw_point(event.x, event.y, self.get_selectedcolor())
-            self.send_drawboard_content(event.x, event.y,
-                                        None, None,
-                                        self.get_selectedcolor())
+            self.stroke_add(event.x, event.y)
             self.lastx = event.x
             self.lasty = event.y
 
@@ -620,6 +745,12 @@ class Gcompris_chat:
                                     self.get_selectedcolor())
         return True
 
+    elif event.type == gtk.gdk.BUTTON_RELEASE \
+          and self.buttondraw.get_active() \
+          and event.button == 1:
+      # send the end of the stroke when mouse button released
+      self.stroke_end()
+
     return False
 
   def draw_point(self, x, y, color):
@@ -638,9 +769,11 @@ class Gcompris_chat:
     return point
 
   def draw_line(self, x, y, destx, desty, color):
+    return self.draw_polyline([(x, y), (destx, desty)], color)
+
+  def draw_polyline(self, points, color):
     line =goocanvas.Polyline(parent = self.rootitem,
-                             points = goocanvas.Points([(x, y),
-                                                        (destx, desty)]),
+                             points = goocanvas.Points(points),
                              stroke_color = color,
                              line_cap = cairo.LINE_CAP_ROUND,
                              line_width = 4.0)
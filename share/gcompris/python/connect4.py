@@ -36,6 +36,8 @@ from  connect4p import rules
 from  connect4p import human
 from  connect4p import minmax
 from  connect4p import board
+from  connect4p import worker
+from  connect4p import book
 # ----------------------------------------
 #
 
@@ -57,6 +59,8 @@ class Gcompris_connect4:
         self.timerAnim = 0
         self.humanVictory = 0
         self.endAnimCallback = None
+        self.job = None
+        self.book = book.OpeningBook(gcompris.DATA_DIR + "/connect4/opening.book")
         self.gcomprisBoard.level=1
         self.gcomprisBoard.maxlevel=9
         self.gcomprisBoard.sublevel=1
@@ -122,6 +126,7 @@ class Gcompris_connect4:
         self.newGame()
 
     def end(self):
+        self.cancelJob()
         if self.timerAnim:
             gobject.source_remove(self.timerAnim)
 
@@ -205,6 +210,7 @@ class Gcompris_connect4:
   # ---------------------
 
     def newGame(self):
+        self.cancelJob()
         if self.timerAnim:
             gobject.source_remove(self.timerAnim)
             self.timerAnim = None
@@ -218,7 +224,7 @@ class Gcompris_connect4:
                                  50.0)
         self.player1 = human.Human(self.gcomprisBoard.level)
         if self.mode == 1:
-            self.player2 = minmax.MinMax(self.gcomprisBoard.level, self.refreshScreen)
+            self.player2 = minmax.MinMax(self.gcomprisBoard.level, self.book)
         self.board = board.Board()
         self.gamewon = False
         self.winLine = None
@@ -266,9 +272,12 @@ class Gcompris_connect4:
         if self.cur_player == 1:
             self.cur_player = 2
             if self.mode == 1:
-                # IA play
+                # IA play, the move is computed in the background
                 self.timericon.goocanvas.props.visibility = goocanvas.ITEM_VISIBLE
-                self.play(self.player2, 2, 0)
+                self.prof.props.visibility = goocanvas.ITEM_INVISIBLE
+                self.job = worker.SearchJob(self.player2, self.board, 2,
+                                            self.aiMoved)
+                self.job.start()
             else:
                 # player 2
                 self.stone_init()
@@ -277,14 +286,23 @@ class Gcompris_connect4:
             self.cur_player = 1
             self.stone_init()
 
-    def refreshScreen(self):
-        gtk.main_iteration(block=False)
-        pass
+    # Called from the main loop when the IA search is over
+    def aiMoved(self, move):
+        self.job = None
+        self.playMove(2, move)
+
+    def cancelJob(self):
+        if self.job:
+            self.job.cancel()
+            self.job = None
 
     def play(self, player, numPlayer, column):
+        move = player.doMove(self.board, numPlayer, column)
+        return self.playMove(numPlayer, move)
+
+    def playMove(self, numPlayer, move):
         if self.mode == 1:
             self.prof.props.visibility = goocanvas.ITEM_INVISIBLE
-        move = player.doMove(self.board, numPlayer, column)
 
         if isinstance(move, int) and rules.isMoveLegal(self.board, move):
             self.board.move(move, numPlayer)
@@ -293,9 +311,9 @@ class Gcompris_connect4:
         return False
 
     def drawBoard(self, board):
-        stone = self.board.state[self.board.last_move][-1]
         x = self.board.last_move
-        y = len(self.board.state[self.board.last_move])-1
+        y = self.board.count(x)-1
+        stone = self.board.cell(x, y)
         file = "connect4/stone_%d.png" % stone
 
         self.stone = \
@@ -1 +1 @@
-__all__ = ["board","human","minmax","player","rules"]
+__all__ = ["board","human","minmax","player","rules","transposition","worker"]
@@ -39,18 +39,143 @@
 # This software is licensed under the GPL - General Public License      #
 #########################################################################
 
+import random
 
+# The board is stored as two bitboards, one per player, with a column
+# heights table. Each column uses 7 bits: 6 playable cells from bottom
+# to top plus one sentinel bit that is always empty, so that shifting a
+# bitboard never carries a stone from one column into the next one.
+#
+#  6 13 20 27 34 41 48   <- sentinel row
+#  5 12 19 26 33 40 47
+#  4 11 18 25 32 39 46
+#  3 10 17 24 31 38 45
+#  2  9 16 23 30 37 44
+#  1  8 15 22 29 36 43
+#  0  7 14 21 28 35 42
+
+WIDTH = 7
+HEIGHT = 6
+H1 = HEIGHT + 1
+
+# Bit shifts to walk along a line: vertical, horizontal and both diagonals
+DIRECTIONS = (1, H1, H1 + 1, H1 - 1)
+
+def bottom_mask():
+  mask = 0
+  for x in range(WIDTH):
+    mask |= 1 << (x * H1)
+  return mask
+
+def column_mask(x):
+  return ((1 << HEIGHT) - 1) << (x * H1)
+
+BOTTOM = bottom_mask()
+FULL = BOTTOM * ((1 << HEIGHT) - 1)
+
+# Zobrist keys, one random 64 bits value per player and cell. They are
+# generated from a fixed seed so that hashes are stable between runs.
+def zobrist_keys():
+  rand = random.Random(4313)
+  keys = []
+  for player in range(2):
+    keys.append([rand.getrandbits(64) for i in range(WIDTH * H1)])
+  return keys
+
+ZOBRIST = zobrist_keys()
+
+# Number of four in a row windows going through each cell, used to value
+# the centre control of a player
+def cell_weights():
+  weights = [0] * (WIDTH * H1)
+  for x in range(WIDTH):
+    for y in range(HEIGHT):
+      for (dx, dy) in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        for start in range(4):
+          x0 = x - start * dx
+          y0 = y - start * dy
+          x3 = x0 + 3 * dx
+          y3 = y0 + 3 * dy
+          if 0 <= x0 < WIDTH and 0 <= x3 < WIDTH and \
+                0 <= y0 < HEIGHT and 0 <= y3 < HEIGHT:
+            weights[x * H1 + y] += 1
+  return weights
+
+WEIGHTS = cell_weights()
+
+# Rows 1, 3 and 5 counting from 1 at the bottom
+ODD_ROWS = BOTTOM * 0x15
+EVEN_ROWS = FULL & ~ODD_ROWS
+
+def popcount(bits):
+  return bin(bits).count('1')
+
+def winning_cells(bits):
+  """Return the cells that would complete a four in a row of bits"""
+  # Vertical, only the cell on top of three stones
+  cells = (bits << 1) & (bits << 2) & (bits << 3)
+  for shift in DIRECTIONS[1:]:
+    pair = (bits << shift) & (bits << (2 * shift))
+    cells |= pair & (bits << (3 * shift))
+    cells |= pair & (bits >> shift)
+    pair = (bits >> shift) & (bits >> (2 * shift))
+    cells |= pair & (bits << shift)
+    cells |= pair & (bits >> (3 * shift))
+  return cells & FULL
+
+def has_four(bits):
+  """Return the direction shift of a four in a row in bits, 0 if none"""
+  for shift in DIRECTIONS:
+    m = bits & (bits >> shift)
+    if m & (m >> (2 * shift)):
+      return shift
+  return 0
+
+def find_four(bits):
+  """Return the ((x1, y1), (x2, y2)) ends of a four in a row, None if none"""
+  for shift in DIRECTIONS:
+    m = bits & (bits >> shift)
+    m &= m >> (2 * shift)
+    if m:
+      start = (m & -m).bit_length() - 1
+      end = start + 3 * shift
+      return ((start // H1, start % H1), (end // H1, end % H1))
+  return None
 
 class Board:
   # Setup an empty board
   def __init__(self):
-    self.state = []
-    for x in range(7):
-      self.state.append([])
+    # stones[0] holds player 1 stones, stones[1] player 2 stones
+    self.stones = [0, 0]
+    self.mask = 0
+    # Zobrist hash of the stones on the board
+    self.hash = 0
+    # Sum of the WEIGHTS of each player stones
+    self.weights = [0, 0]
+    # Next free bit in each column
+    self.height = [x * H1 for x in range(WIDTH)]
+    self.moves = []
     self.last_move = -1
 
+  def copy(self):
+    board = Board()
+    board.stones = self.stones[:]
+    board.mask = self.mask
+    board.hash = self.hash
+    board.weights = self.weights[:]
+    board.height = self.height[:]
+    board.moves = self.moves[:]
+    board.last_move = self.last_move
+    return board
+
   def move(self, move, player):
-    self.state[move].append(player)
+    bit = 1 << self.height[move]
+    self.stones[player - 1] |= bit
+    self.mask |= bit
+    self.hash ^= ZOBRIST[player - 1][self.height[move]]
+    self.weights[player - 1] += WEIGHTS[self.height[move]]
+    self.height[move] += 1
+    self.moves.append(move)
     self.last_move = move
 
   def domoves(self, moves):
@@ -58,5 +183,59 @@ class Board:
       self.move(move, player)
 
   def undomove(self, move):
-    if len(self.state[move]) > 0:
-      del self.state[move][len(self.state[move])-1]
+    if self.height[move] > move * H1:
+      self.height[move] -= 1
+      pos = self.height[move]
+      bit = 1 << pos
+      if self.stones[0] & bit:
+        owner = 0
+      else:
+        owner = 1
+      self.stones[owner] &= ~bit
+      self.hash ^= ZOBRIST[owner][pos]
+      self.weights[owner] -= WEIGHTS[pos]
+      self.mask &= ~bit
+      # Forget the most recent move in this column
+      for i in range(len(self.moves) - 1, -1, -1):
+        if self.moves[i] == move:
+          del self.moves[i]
+          break
+      if self.moves:
+        self.last_move = self.moves[-1]
+      else:
+        self.last_move = -1
+
+  # Number of stones in the column x
+  def count(self, x):
+    return self.height[x] - x * H1
+
+  def isLegal(self, x):
+    return 0 <= x < WIDTH and not (self.mask & (1 << (x * H1 + HEIGHT - 1)))
+
+  def isFull(self):
+    return self.mask == FULL
+
+  # Player who played the first stone, 0 on an empty board
+  def firstPlayer(self):
+    if not self.moves:
+      return 0
+    return self.cell(self.moves[0], 0)
+
+  # Player owning the cell (x, y), 0 if empty
+  def cell(self, x, y):
+    bit = 1 << (x * H1 + y)
+    if self.stones[0] & bit:
+      return 1
+    if self.stones[1] & bit:
+      return 2
+    return 0
+
+  # Column lists of the players stones, bottom first. This is the
+  # historic representation, still used to draw the board.
+  def getState(self):
+    state = []
+    for x in range(WIDTH):
+      state.append([self.cell(x, y) for y in range(self.count(x))])
+    return state
+
+  state = property(getState)
@@ -0,0 +1,201 @@
+#  gcompris - connect4
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+
+# Opening book and endgame cache for the connect4 AI.
+#
+# The book is a binary file made of a header followed by records sorted
+# by key, so that it can be memory mapped and searched by bisection:
+#
+#   header: 'C4BK', version (uint16), search depth (uint16), count (uint32)
+#   record: key (uint64), move (uint8)
+#
+# Positions are keyed by colour and mirror independent canonical keys,
+# see canonicalKey(). The book is built offline by running this module:
+#
+#   python book.py [-p plies] [-d depth] opening.book
+
+import mmap
+import os
+import struct
+import sys
+
+from board import *
+
+MAGIC = 'C4BK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHI')
+RECORD = struct.Struct('<QB')
+
+# Returns the bits of board mirrored around the centre column
+def mirror(bits):
+  result = 0
+  for x in range(WIDTH):
+    column = (bits >> (x * H1)) & ((1 << H1) - 1)
+    result |= column << ((WIDTH - 1 - x) * H1)
+  return result
+
+# Returns (key, mirrored) for board with player to move. The key only
+# depends on which stones belong to the player to move, so it does not
+# matter who started the game, and a position and its mirror image share
+# the same key. mirrored tells the stored move must be mirrored.
+def canonicalKey(board, player):
+  own = board.stones[player - 1]
+  mask = board.mask
+  key = own + mask + BOTTOM
+  mirrored_key = mirror(own) + mirror(mask) + BOTTOM
+  if mirrored_key < key:
+    return (mirrored_key, True)
+  return (key, False)
+
+class OpeningBook:
+  """Read only access to a book file, missing or invalid files give an
+  empty book"""
+
+  def __init__(self, filename):
+    self.data = None
+    self.count = 0
+    self.depth = 0
+    try:
+      f = open(filename, 'rb')
+      try:
+        self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+      finally:
+        f.close()
+    except (IOError, OSError, ValueError):
+      return
+    if len(self.data) < HEADER.size:
+      self.data = None
+      return
+    (magic, version, depth, count) = HEADER.unpack_from(self.data, 0)
+    if magic != MAGIC or version != VERSION or \
+          len(self.data) != HEADER.size + count * RECORD.size:
+      self.data = None
+      return
+    self.depth = depth
+    self.count = count
+
+  # Returns the book move for player on board, -1 if not in the book
+  def lookup(self, board, player):
+    if not self.count:
+      return -1
+    (key, mirrored) = canonicalKey(board, player)
+    low = 0
+    high = self.count
+    while low < high:
+      middle = (low + high) // 2
+      (middle_key, move) = RECORD.unpack_from(self.data,
+                                              HEADER.size + middle * RECORD.size)
+      if middle_key < key:
+        low = middle + 1
+      elif middle_key > key:
+        high = middle
+      else:
+        if mirrored:
+          return WIDTH - 1 - move
+        return move
+    return -1
+
+class EndgameCache:
+  """Moves of positions solved up to the end of the game, shared by all
+  the searches of a session"""
+
+  def __init__(self, size=1 << 14):
+    self.size = size
+    self.moves = {}
+
+  def lookup(self, board, player):
+    (key, mirrored) = canonicalKey(board, player)
+    move = self.moves.get(key, -1)
+    if move >= 0 and mirrored:
+      return WIDTH - 1 - move
+    return move
+
+  def store(self, board, player, move):
+    if len(self.moves) >= self.size:
+      self.moves.clear()
+    (key, mirrored) = canonicalKey(board, player)
+    if mirrored:
+      move = WIDTH - 1 - move
+    self.moves[key] = move
+
+#
+# Book generation
+#
+
+# Returns {key: (board, player)} for all the positions of at most plies
+# stones that are not already won, up to symmetry
+def listPositions(plies):
+  import rules
+  positions = {}
+  def walk(board, player, depth):
+    (key, mirrored) = canonicalKey(board, player)
+    if key in positions:
+      return
+    positions[key] = (board.copy(), player)
+    if depth == plies:
+      return
+    for move in range(WIDTH):
+      if board.isLegal(move):
+        board.move(move, player)
+        if not rules.isWinner(board, player):
+          walk(board, 3 - player, depth + 1)
+        board.undomove(move)
+  walk(Board(), 1, 0)
+  return positions
+
+def writeBook(filename, plies, depth, verbose=False):
+  from minmax import MinMax
+  searcher = MinMax(1)
+  searcher.search_depth = depth
+  searcher.time_budget = None
+  positions = listPositions(plies)
+  records = []
+  for (key, (board, player)) in positions.items():
+    move = searcher.doMove(board, player, 0)
+    (key, mirrored) = canonicalKey(board, player)
+    if mirrored:
+      move = WIDTH - 1 - move
+    records.append((key, move))
+    if verbose:
+      sys.stderr.write('\r%d/%d' % (len(records), len(positions)))
+  if verbose:
+    sys.stderr.write('\n')
+  records.sort()
+
+  f = open(filename, 'wb')
+  try:
+    f.write(HEADER.pack(MAGIC, VERSION, depth, len(records)))
+    for (key, move) in records:
+      f.write(RECORD.pack(key, move))
+  finally:
+    f.close()
+
+def main(argv):
+  import optparse
+  parser = optparse.OptionParser(usage='%prog [options] BOOKFILE')
+  parser.add_option('-p', '--plies', type='int', default=4,
+                    help='store positions with up to PLIES stones')
+  parser.add_option('-d', '--depth', type='int', default=9,
+                    help='search depth used to find the book moves')
+  (options, args) = parser.parse_args(argv[1:])
+  if len(args) != 1:
+    parser.error('a book file name is required')
+  writeBook(args[0], options.plies, options.depth, verbose=True)
+
+if __name__ == '__main__':
+  main(sys.argv)
@@ -41,128 +41,231 @@
 
 import rules
 from player import *
-from random import *
-import copy
 from board import *
+from transposition import *
+from book import EndgameCache
+import random
+import time
 
-class Node:
-  def __init__(self, board, move, player):
-    self.board = board
-    #self.parent = parent
-    self.value = 0
-    self.childs = []
-    self.move = move
-    self.player = player
-
-  def __repr__(self):
-    if self.childs > 1:
-      number=0
-      for child in self.childs:
-        number=number+1
-      return "Has %s child(s)" % number
-    return "STATE"
+# Score of a won position, shortened by the number of moves to get there
+WIN = 10000
+
+# Columns are searched from the centre out, best moves are usually there
+MOVE_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+# Hash key of the player 2 to move positions
+SIDE_KEY = 0x5bd1e9955bd1e995
+
+# Evaluation bonus of each threat, and of each threat on a good row
+THREAT_SCORE = 8
+PARITY_SCORE = 8
+
+# Search depth for each difficulty level
+LEVEL_DEPTHS = (1, 2, 3, 5, 7, 9, 11, 13, 15)
+
+# Solved endgame positions, shared by all the players
+ENDGAME_CACHE = EndgameCache()
+
+class SearchTimeout(Exception):
+  pass
+
+# Raised out of doMove when the job running the search is cancelled
+class SearchCancelled(Exception):
+  pass
 
 class MinMax(Player):
   type = 'AI'
 
-  def __init__(self, difficulty, f):
-    self.search_depth = difficulty
-    self.f = f
+  # Wall clock budget of a move in seconds, None to always search to
+  # the full depth
+  time_budget = 3.0
+
+  # book is an optional book.OpeningBook, it is only used for the level
+  # searching as deep as the book was built with: shallower levels would
+  # play too well and deeper ones too badly
+  def __init__(self, difficulty, book=None):
+    self.setDifficulty(difficulty)
+    self.book = book
+    self.job = None
+    self.table = TranspositionTable()
 
   def setDifficulty(self, difficulty):
-    self.search_depth = difficulty
-
-  def evaluate(self, node, player, opponent, depth):
-    if len(node.childs) > 0:
-      list = []
-      for child in node.childs:
-        list.append(child.value)
-      if node.player != player:
-        node.value = min(list)
-        #print 'min =', node.value,
-      else:
-        node.value = max(list)
-        #print 'max =', node.value,
+    level = max(1, min(difficulty, len(LEVEL_DEPTHS)))
+    self.search_depth = LEVEL_DEPTHS[level - 1]
 
+  # Static evaluation of board for player. Threats are the empty cells
+  # that would complete a four in a row. Those on odd rows are worth
+  # more to the first player and those on even rows to the second
+  # player, since that is where zugzwang lets them be played.
+  def score(self, board, player):
+    opponent = 3 - player
+    empty = FULL & ~board.mask
+    threats = winning_cells(board.stones[player - 1]) & empty
+    opponent_threats = winning_cells(board.stones[opponent - 1]) & empty
+    if board.firstPlayer() == player:
+      (good, opponent_good) = (ODD_ROWS, EVEN_ROWS)
     else:
-      node.value = self.score(node, player, opponent)  / (depth + 1)
-
-  def score(self, node, player, opponent):
-    return int(random() * 100) - 50
+      (good, opponent_good) = (EVEN_ROWS, ODD_ROWS)
 
+    value = board.weights[player - 1] - board.weights[opponent - 1]
+    value += THREAT_SCORE * (popcount(threats) - popcount(opponent_threats))
+    value += PARITY_SCORE * (popcount(threats & good) -
+                             popcount(opponent_threats & opponent_good))
+    return value
 
   def makeBoard(self, move, board, player):
-    temp_board = copy.deepcopy(board)
+    temp_board = board.copy()
     temp_board.move(move, player)
     return temp_board
 
   def listMoves(self, board, player):
-    checkmove = rules.isMoveLegal
-
     options = []
-    for move in range(7):
-      if checkmove(board, move):
+    for move in MOVE_ORDER:
+      if board.isLegal(move):
         options.append(move)
     return options
 
-  def statespace(self, node, depth, current_player, player, opponent):
-    self.f()
-    if rules.isWinner(node.board, opponent):
-      #print "a lose up ahead"
-      node.value = -10000 + depth
-      return node
-    elif rules.isWinner(node.board, player):
-      node.value = 10000 - depth
-      return node
-
-    elif self.listMoves(node.board, 0) < 1:
-      self.evaluate(node, player, opponent, depth)
-      return node
-    elif depth < self.search_depth:
-      if current_player==2:
-        next_player = 1
-      else:
-        next_player = 2
-      for move in self.listMoves(node.board, current_player):
-        node.board.move(move, current_player)
+  # Alpha-beta negamax, returns the value of board for player
+  def negamax(self, board, depth, alpha, beta, player, ply):
+    self.nodes += 1
+    if not self.nodes & 1023:
+      if self.job and self.job.cancelled:
+        raise SearchCancelled
+      if self.deadline and time.time() > self.deadline:
+        raise SearchTimeout
+
+    if board.isFull():
+      return 0
+    if depth == 0:
+      return self.score(board, player)
+
+    key = board.hash
+    if player == 2:
+      key ^= SIDE_KEY
+    tt_move = -1
+    entry = self.table.probe(key)
+    if entry:
+      (tt_depth, flag, value, tt_move) = entry
+      if tt_depth >= depth:
+        # Win scores are stored relative to the stored position
+        if value > WIN - 100:
+          value -= ply
+        elif value < -WIN + 100:
+          value += ply
+        if flag == EXACT:
+          return value
+        elif flag == LOWER:
+          alpha = max(alpha, value)
+        else:
+          beta = min(beta, value)
+        if alpha >= beta:
+          return value
+
+    moves = self.listMoves(board, player)
+    if tt_move in moves:
+      moves.remove(tt_move)
+      moves.insert(0, tt_move)
 
-        node.childs.append(self.statespace(Node( node.board, move, next_player), depth+1, next_player, player, opponent))
-        node.board.undomove(move)
-    self.evaluate(node, player, opponent, depth)
-    #print 'v=%d p=%d' %(node.value,node.player)
-    return node
+    alpha_orig = alpha
+    best = -WIN - 1
+    best_move = moves[0]
+    opponent = 3 - player
+    for move in moves:
+      board.move(move, player)
+      if has_four(board.stones[player - 1]):
+        value = WIN - ply
+      else:
+        value = -self.negamax(board, depth - 1, -beta, -alpha, opponent, ply + 1)
+      board.undomove(move)
+      if value > best:
+        best = value
+        best_move = move
+        if value > alpha:
+          alpha = value
+          if alpha >= beta:
+            break
 
+    if best <= alpha_orig:
+      flag = UPPER
+    elif best >= beta:
+      flag = LOWER
+    else:
+      flag = EXACT
+    value = best
+    if value > WIN - 100:
+      value += ply
+    elif value < -WIN + 100:
+      value -= ply
+    self.table.store(key, depth, flag, value, best_move)
+    return best
 
-  def doMove(self, current_board, player, event):
-    board = copy.deepcopy(current_board)
+  # Searches the root moves to depth, returns (best value, best move).
+  # The other moves are searched with a window one below the best value
+  # so that equal ones are found, one of them is played at random.
+  def searchRoot(self, board, depth, player, first_move):
+    moves = self.listMoves(board, player)
+    if first_move in moves:
+      moves.remove(first_move)
+      moves.insert(0, first_move)
+    alpha = -WIN - 1
+    best_moves = [moves[0]]
+    for move in moves:
+      board.move(move, player)
+      if has_four(board.stones[player - 1]):
+        value = WIN
+      else:
+        value = -self.negamax(board, depth - 1, -WIN - 1, -alpha + 1,
+                              3 - player, 1)
+      board.undomove(move)
+      if value > alpha:
+        alpha = value
+        best_moves = [move]
+      elif value == alpha:
+        best_moves.append(move)
+    return (alpha, random.choice(best_moves))
 
-    if player == 1: opponent = 2
-    else: opponent = 1
+  # Iterative deepening, each iteration starts with the best move of
+  # the previous one. When the time budget is exhausted the move found
+  # by the last complete iteration is played.
+  # job is the worker.SearchJob running this search, if any.
+  def doMove(self, current_board, player, event, job=None):
+    if self.book and self.search_depth == self.book.depth:
+      move = self.book.lookup(current_board, player)
+      if move >= 0 and current_board.isLegal(move):
+        return move
 
-    node = Node(board, 0, player)
+    # Close to the end the search reaches the last move, its result is
+    # exact and worth remembering
+    empty = popcount(FULL & ~current_board.mask)
+    endgame = empty <= self.search_depth
+    if endgame:
+      move = ENDGAME_CACHE.lookup(current_board, player)
+      if move >= 0:
+        return move
 
-    node =  self.statespace( node, 0, player, player, opponent);
+    board = current_board.copy()
+    self.job = job
+    self.nodes = 0
+    self.table.newSearch()
+    if self.time_budget:
+      self.deadline = time.time() + self.time_budget
+    else:
+      self.deadline = None
 
-    bestscore = -100000
-    best_moves = []
-    #print "New Round"
-    for child in node.childs:
-      #print "Child value=", child.value, "move=", child.board.last_move
-      if child.value >= bestscore:
-        #if rules.isMoveLegal(board, child.board.last_move):
-        if bestscore == child.value:
-          #print "Move added"
-          best_moves.append(child.move)
-        else:
-          #print "New best move"
-          bestscore = child.value
-          best_moves = [child.move]
-    return best_moves[int(random()*len(best_moves))]
+    best_move = -1
+    solved = False
+    for depth in range(1, self.search_depth + 1):
+      try:
+        (value, best_move) = self.searchRoot(board, depth, player, best_move)
+      except SearchTimeout:
+        break
+      # No need to look further once the game outcome is known
+      if abs(value) > WIN - 100 or depth >= empty:
+        solved = True
+        break
+    if endgame and solved:
+      ENDGAME_CACHE.store(current_board, player, best_move)
+    return best_move
 
   def gameOver(self, move):
     return None
-#try:
-#  psyco.bind(MinMax)
-#  psyco.bind(Node)
-#except:
-#  pass
@@ -39,87 +39,20 @@
 # This software is licensed under the GPL - General Public License      #
 #########################################################################
 
+
 from board import *
 
 # Checks if the move is legal
 def isMoveLegal(board, selector_pos):
-	return len(board.state[selector_pos]) < 6 and selector_pos >= 0
+  return board.isLegal(selector_pos)
 
 def isBoardFull(board):
-	for pos in range(7):
-		if len(board.state[pos]) < 6:
-			return 0
-	return 1
+  return board.isFull()
 
+# Returns the ((x1, y1), (x2, y2)) ends of the winning line of player,
+# None if player has not won
 def isWinner(board, player):
-	result = _isVerticalWin(board, player)
-        if not result:
-           result =  _isHorizontalWin(board, player)
-	if not result:
-	   result = _isDiagonalWin(board, player)
-        return result
-
-def _isVerticalWin(board, player):
-   x = board.last_move
-   four_in_a_row = [player, player, player, player]
-   if board.state[x][-4:] == four_in_a_row:
-      return ((x,len(board.state[x])-4),(x,len(board.state[x])-1))
-   else:
-      return None
-
-def _isHorizontalWin(board, player):
-        x = board.last_move
-        y = len(board.state[x]) - 1
-        four_in_a_row = [player, player, player, player]
-        row = []
-        for i in range(7):
-                try:
-                        row.append(board.state[i][y])
-                except IndexError:
-                        row.append('s')  # 's' stands for sentinel
-	for i in range(4):
-	  try:
-             if row[x - 3 + i : x + 1 +i] == four_in_a_row:
-	        return ((x -3 + i,y),( x +i,y))
-	  except IndexError:
-	     pass
-
-        return None
-
-def _isDiagonalWin(board, player):
-        x = board.last_move
-        y = len(board.state[x]) - 1
-        four_in_a_row = [player, player, player, player]
-        row = []
-        for i in range(-3, 4):
-                try:
-			if  (x+i < 0) or (y+i < 0):
-				row.append('s')  # 's' stands for sentinel
-			else:
-				row.append(board.state[x+i][y+i])
-                except IndexError:
-                        row.append('s')  # 's' stands for sentinel
-	for i in range(4):
-	  try:
-             if row[i : i + 4] == four_in_a_row:
-	        return ((x -3 + i,y-3+i),( x +i,y+i))
-	  except IndexError:
-	     pass
-
-        row = []
-        for i in range(-3, 4):
-                try:
-			if  (x+i < 0) or (y-i < 0):
-				row.append('s')  # 's' stands for sentinel
-			else:
-				row.append(board.state[x+i][y-i])
-                except IndexError:
-                        row.append('s')  # 's' stands for sentinel
-	for i in range(4):
-	  try:
-             if row[i : i + 4] == four_in_a_row:
-	        return ((x -3 + i , y + 3 - i),( x +i , y - i))
-	  except IndexError:
-	     pass
-
-        return None
+  bits = board.stones[player - 1]
+  if not has_four(bits):
+    return None
+  return find_four(bits)
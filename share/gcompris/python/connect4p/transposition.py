@@ -0,0 +1,58 @@
+#  gcompris - connect4
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+
+# A fixed size transposition table for the connect4 search.
+#
+# Positions are stored in a list of slots indexed by their Zobrist hash.
+# When two positions fall in the same slot, the deepest search wins,
+# unless the stored entry comes from an older search in which case it
+# is always replaced.
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+class TranspositionTable:
+  def __init__(self, size=1 << 16):
+    self.size = size
+    self.slots = [None] * size
+    self.generation = 0
+
+  # Called at the start of each new search, older entries are then
+  # replaced first
+  def newSearch(self):
+    self.generation += 1
+
+  def clear(self):
+    self.slots = [None] * self.size
+    self.generation = 0
+
+  # Returns (depth, flag, value, move) for key, None if not known
+  def probe(self, key):
+    entry = self.slots[key % self.size]
+    if entry and entry[0] == key:
+      return entry[2:]
+    return None
+
+  def store(self, key, depth, flag, value, move):
+    index = key % self.size
+    entry = self.slots[index]
+    if entry and entry[1] == self.generation and entry[2] > depth \
+          and entry[0] != key:
+      return
+    self.slots[index] = (key, self.generation, depth, flag, value, move)
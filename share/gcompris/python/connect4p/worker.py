@@ -0,0 +1,59 @@
+#  gcompris - connect4
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+
+
+# Runs the AI search in a background thread so that the gtk main loop
+# keeps running while the computer is thinking.
+
+import threading
+import gobject
+
+from minmax import SearchCancelled
+
+# Let python threads run while the gtk main loop is waiting for events
+gobject.threads_init()
+
+class SearchJob(threading.Thread):
+  """Computes player's move on a copy of board and hands it to
+  callback(move) from the gtk main loop. A cancelled job never calls
+  back."""
+
+  def __init__(self, player, board, numPlayer, callback):
+    threading.Thread.__init__(self)
+    self.setDaemon(True)
+    self.player = player
+    self.board = board.copy()
+    self.numPlayer = numPlayer
+    self.callback = callback
+    self.cancelled = False
+
+  def run(self):
+    try:
+      move = self.player.doMove(self.board, self.numPlayer, 0, self)
+    except SearchCancelled:
+      return
+    gobject.idle_add(self.done, move)
+
+  def done(self, move):
+    if not self.cancelled:
+      self.callback(move)
+    return False
+
+  # Stops the search as soon as possible, it is safe to call it from the
+  # main loop at any time
+  def cancel(self):
+    self.cancelled = True
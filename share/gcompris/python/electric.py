@@ -27,7 +27,9 @@ import gtk.gdk
 import gobject
 import cairo
 import os
-import tempfile
+
+import electric_gnucap
+import electric_mna
 
 # Set to True to debug
 debug = True
@@ -58,10 +60,14 @@ class Gcompris_electric:
 
     # The list of placed components
     self.components = []
+    # The components changed since the last simulation
+    self.dirty = set()
     self.gnucap_timer = 0
-    self.gnucap_timer_interval = 500
+    # gnucap runs in a session, the timer only groups close changes
+    self.gnucap_timer_interval = 100
 
     self.gnucap_binary = None
+    self.gnucap = None
 
   def start(self):
 
@@ -95,9 +101,8 @@ class Gcompris_electric:
         self.gnucap_binary = binary
         break
 
-    if not self.gnucap_binary:
-      gcompris.utils.dialog(_("Cannot find the 'gnucap' electric simulator.\nYou can download and install it from:\n<http://www.gnu.org/software/gnucap/>\nTo be detected, it must be installed in\n/usr/bin/gnucap or /usr/local/bin/gnucap.\nYou can still use this activity to draw schematics without computer simulation."),
-                            None)
+    # Without gnucap, the circuit is simulated by electric_mna
+    if debug: print "gnucap binary: %s" %(self.gnucap_binary,)
 
 
   def end(self):
@@ -107,6 +112,10 @@ class Gcompris_electric:
     # Remove the root item removes all the others inside it
     self.cleanup_game()
 
+    if self.gnucap:
+      self.gnucap.stop()
+      self.gnucap = None
+
   def ok(self):
     pass
 
@@ -187,6 +196,7 @@ class Gcompris_electric:
 
     # No more component in the simulation set
     self.components = []
+    self.dirty = set()
 
     # Remove the root item removes all the others inside it
     self.rootitem.remove()
@@ -302,133 +312,217 @@ class Gcompris_electric:
 # ----------------------------------------------------------------------
 # ----------------------------------------------------------------------
 
-  def run_simulation(self):
-    if debug: print "run_simulation %s" %(self.gnucap_binary,)
-    if not self.gnucap_binary:
-      return
+  # Ask for a simulation of the circuits holding the given components,
+  # or of all the circuits if none is given
+  def run_simulation(self, *components):
+    if components:
+      self.dirty.update(components)
+    else:
+      self.dirty.update(self.components)
 
     if debug: print "self.gnucap_timer = %d" %(self.gnucap_timer,)
     if not self.gnucap_timer:
       if debug: print "run_simulation timeout_add"
       self.gnucap_timer = gobject.timeout_add(self.gnucap_timer_interval, self.call_gnucap)
 
-  def call_gnucap(self):
-    if not self.components:
-      if debug: print "call_gnucap: No component"
-      self.gnucap_timer = 0
-      return
-
-    self.gnucap_timer = 0
-    connected = False
+  # Split the placed components in independent circuits
+  #
+  # Return a list of tuples (components, nets, members):
+  #   components : the connected components of the circuit
+  #   nets : the net number of each connected Node of the circuit, the
+  #          Nodes linked by wires, even through connection spots, being
+  #          in the same net
+  #   members : all the components of the circuit, connection spots
+  #             included
+  def find_circuits(self):
+    # Walk the wires to find the nets
+    net_of = {}
+    nets = []
     for component in self.components:
-      if component.is_connected():
-        connected = True
-
-    if debug: print "call_gnucap create the tempfile"
+      for node in component.get_nodes():
+        if node in net_of or not node.get_wires():
+          continue
+        net = len(nets)
+        net_of[node] = net
+        nodes = []
+        stack = [node]
+        while stack:
+          node = stack.pop()
+          nodes.append(node)
+          for wire in node.get_wires():
+            for other in (wire.source_node, wire.target_node):
+              if other and not other in net_of:
+                net_of[other] = net
+                stack.append(other)
+        nets.append(nodes)
+
+    # Each component merges the circuits of its nets
+    parent = range(len(nets))
+    def find(net):
+      while parent[net] != net:
+        parent[net] = parent[parent[net]]
+        net = parent[net]
+      return net
+
+    connected = []
+    for component in self.components:
+      if not component.is_connected():
+        continue
+      connected.append(component)
+      roots = [find(net_of[node]) for node in component.get_nodes()
+               if node in net_of]
+      for root in roots[1:]:
+        parent[find(root)] = find(roots[0])
+
+    circuits = {}
+    order = []
+    for component in connected:
+      for node in component.get_nodes():
+        if node in net_of:
+          root = find(net_of[node])
+          break
+      if not root in circuits:
+        circuits[root] = ([], {}, set())
+        order.append(root)
+      circuits[root][0].append(component)
+
+    # Net 0 is the ground, we start at 1. A net only joining partly
+    # wired components is in no circuit.
+    for net in range(len(nets)):
+      root = find(net)
+      if not root in circuits:
+        continue
+      (components, circuit_nets, members) = circuits[root]
+      for node in nets[net]:
+        circuit_nets[node] = net + 1
+        members.add(node.get_component())
+
+    return [circuits[root] for root in order]
 
-    fd, filename = tempfile.mkstemp(".gnucap", "gcompris_electric", None, True)
-    f = os.fdopen(fd, "w+t")
+  def call_gnucap(self):
+    self.gnucap_timer = 0
 
-    gnucap = "Title GCompris\n"
+    dirty = self.dirty
+    self.dirty = set()
 
-    # Ugly hack: connect a 0 ohm (1 fempto) resistor between net 0
-    # and first net found
-    gnucap += "R999999999 0 "
-    found = False
     for component in self.components:
-      if component.is_connected():
-        for node in component.get_nodes():
-          if(node.get_wires()):
-            gnucap += str(node.get_wires()[0].get_wire_id())
-            found = True
-            break
-      if found: break
-    gnucap += " 1f\n"
-
-    gnucap_print = ""
-    for component in self.components:
-      if component.is_connected():
-        thisgnucap = component.to_gnucap("")
-        gnucap += thisgnucap[0]
-        gnucap_print += thisgnucap[1]
-
-    gnucap += gnucap_print
-    gnucap += ".dc\n"
-    gnucap += ".end\n"
-    if debug: print gnucap
-    f.writelines(gnucap)
-    f.close()
+      if component in dirty and not component.is_connected():
+        component.set_voltage_intensity(False, 0.0, 0.0)
+
+    # Only the circuits holding a changed component are simulated again,
+    # the values of the others did not move
+    circuits = [circuit for circuit in self.find_circuits()
+                if circuit[2] & dirty]
+    if not circuits:
+      if debug: print "call_gnucap: No circuit changed"
+      return
 
-    #
-    # Run gnucap with the temporary datafile we created.
-    #
-    if debug: print "calling gnucap: %s -b %s" % (self.gnucap_binary, filename)
-    output = os.popen("%s -b %s" % (self.gnucap_binary, filename))
+    # gnucap is used when it is installed, our own solver otherwise or
+    # if gnucap fails
+    values = None
+    if self.gnucap_binary:
+      values = self.run_gnucap(circuits)
+      if values != None:
+        components = []
+        for circuit in circuits:
+          components += circuit[0]
+        self.set_values(components, values)
+        return
+
+    for (components, nets, members) in circuits:
+      values = self.run_mna(components, nets)
+      if values != None:
+        self.set_values(components, values)
+
+  # Set the simulated values of the components, two per gnucap component
+  def set_values(self, components, values):
+    if debug: print values
+    i = 0
+
+    for component in components:
+      # Each Component class may have several gnucap component to retrieve
+      # data from
+      done = False
+      while not done:
+        if debug: print "Processing component %d" %(i,)
+        try:
+          volt = values[i]
+          amp = values[i+1]
+        except IndexError:
+          if debug: print "Warning: gnucap parsing mismatch"
+          done = True
+          continue
+
+        if volt == None or amp == None:
+          done = component.set_voltage_intensity(False, 0.0, 0.0)
+        else:
+          done = component.set_voltage_intensity(True, volt, amp)
+          if debug: print "Converted U=%sV I=%sA" %(volt, amp)
+
+        i += 2
+
+  # Simulate the circuits with gnucap
+  # Return the list of the voltage and intensity of each gnucap component,
+  # None for the values gnucap gave that cannot be converted
+  # Or None if gnucap failed
+  def run_gnucap(self, circuits):
+    netlist = []
+    probes = []
+    for (components, nets, members) in circuits:
+      # Ugly hack: connect a 0 ohm (1 fempto) resistor between net 0
+      # and first net of each circuit
+      netlist.append("R99999999%d 0 %d 1f" %(len(netlist), min(nets.values())))
+
+      for component in components:
+        thisgnucap = component.to_gnucap(nets)
+        netlist += thisgnucap[0].splitlines()
+        # Each '.print dc + v(x) i(x)' line gives the probes of a component
+        for line in thisgnucap[1].splitlines():
+          probes += line.split()[3:]
 
     #
-    # Read and analyse gnucap result
+    # Run the simulation in our gnucap session
     #
-    if debug: print "---------------- GNUCAP OUTPUT PARSING ---------------------"
-    line = ""
-    for line in output.readlines():
-      if debug: print "==="
-      if debug: print line
-      if(line.split() == " 0."):
-        break
-    if debug: print "------------------------------------------------------------"
-
-    if debug: print "===>"
-    if debug: print line
-    if debug: print "===>"
-
-    # Close it to check errors
-    results = output.close()
-    if results:
-      print('Failed to run gnugap with error ', results)
-      return
+    if not self.gnucap:
+      self.gnucap = electric_gnucap.GnucapSession(self.gnucap_binary, debug)
+    try:
+      output = self.gnucap.simulate(netlist, probes)
+    except electric_gnucap.SimulationError, e:
+      print('Failed to run gnucap with error ', e)
+      return None
 
     values = []
-    if(line.split()[0] == "0."):
-      if debug: print "FOUND 0."
-      values = line.split()
-      del values[0]
-
-    if debug: print values
-    i = 0
+    for value in output:
+      try:
+        values.append(self.convert_gnucap_value(value))
+      except ValueError:
+        if debug: print "Failed to convert %s" %(value,)
+        values.append(None)
+    return values
+
+  # Simulate a circuit with our own solver
+  # Return the list of the voltage and intensity of each element in the
+  # same order as gnucap would give them
+  # Or None if the circuit cannot be solved
+  def run_mna(self, components, nets):
+    circuit = electric_mna.Circuit()
+    names = []
+    try:
+      for component in components:
+        if component.gnucap_model:
+          circuit.add_model(component.gnucap_model)
+        for element in component.get_elements(nets):
+          circuit.add(*element)
+          names.append(element[0])
+      results = circuit.solve()
+    except electric_mna.SolverError, e:
+      print('Failed to solve the circuit with error ', e)
+      return None
 
-    # Set all component values
-    for component in self.components:
-      if not component.is_connected():
-        done = component.set_voltage_intensity(False, 0.0, 0.0)
-      else:
-        # Each Component class may have several gnucap component to retrieve
-        # data from
-        done = False
-        while not done:
-          if debug: print "Processing component %d" %(i,)
-          try:
-            if debug: print values[i]
-            if debug: print values[i+1]
-            dumy = values[i]
-            dumy = values[i+1]
-          except:
-            if debug: print "Warning: gnucap parsing mismatch"
-            done = True
-            continue
-
-          try:
-            volt = self.convert_gnucap_value(values[i])
-            amp = self.convert_gnucap_value(values[i+1])
-            done = component.set_voltage_intensity(True, volt, amp)
-            if debug: print "Converted U=%sV I=%sA" %(volt, amp)
-          except:
-            if debug: print "Failed to convert V=%sV I=%sA" %(values[i], values[i+1])
-            done = component.set_voltage_intensity(False, 0.0, 0.0)
-
-          i += 2
-
-
-    if not debug: os.remove(filename)
+    values = []
+    for name in names:
+      values += results[name]
+    return values
 
   # Convert a gnucap value back in a regular number
   # Return a float value
@@ -577,12 +671,15 @@ class Wire:
       self.wire_item.remove()
       self.wire_id = -1
       self.source_node.remove_wire(self, None)
+      # The circuits of both ends have changed
+      changed = [self.source_node.get_component()]
       if self.target_node:
         self.target_node.remove_wire(self, Wire.counter)
+        changed.append(self.target_node.get_component())
       Wire.counter += 1
       self.source_node = None
       self.target_node = None
-      self.electric.run_simulation()
+      self.electric.run_simulation(*changed)
 
 
     def set_target_node(self, node):
@@ -721,6 +818,8 @@ class Node:
 # nodes is a list of class Node object
 class Component(object):
     counter = 0
+    # The .model line needed by this component, if any
+    gnucap_model = ""
     def __init__(self, electric,
                  gnucap_name, gnucap_value,
                  image, nodes):
@@ -856,35 +955,35 @@ class Component(object):
 
       return True
 
-    # Return the gnucap definition for this component
-    # model is optional
+    # Return the list of the gnucap components this component is made of,
+    # as tuples (gnucap name, net, net, gnucap value)
+    # nets gives the net number of each connected Node
     #
-    def to_gnucap(self, model):
-      gnucap = self.gnucap_name
-
+    # An unconnected component is ignored
+    def get_elements(self, nets):
       # No definition, it happens for connection spot
-      # But in this case, it should not be called at all. it's not in the top level
-      # components list.
-      if gnucap == "":
-        return "* Component ignored\n"
+      if self.gnucap_name == "" or not self.is_connected():
+        return []
 
-      # ignore component if there are some unconnected node.
-      for node in self.nodes:
-        if not node.get_wires():
-          if debug: print "Component ignored"
-          return "* Component ignored\n"
-
-      for node in self.nodes:
-        gnucap += " "
-        if(node.get_wires()):
-          gnucap += str(node.get_wires()[0].get_wire_id())
+      return [(self.gnucap_name,
+               nets[self.nodes[0]],
+               nets[self.nodes[1]],
+               self.gnucap_value)]
 
-      gnucap += " "
-      gnucap += str(self.gnucap_value)
-      gnucap += "\n"
+    # Return the gnucap definition for this component
+    # model is optional
+    #
+    def to_gnucap(self, nets, model=""):
+      gnucap = ""
+      gnucap_print = ""
+      for (name, node1, node2, value) in self.get_elements(nets):
+        gnucap += "%s %s %s %s\n" %(name, node1, node2, value)
+        gnucap_print += ".print dc + v(%s) i(%s)\n" %(name, name)
+
+      gnucap += self.gnucap_model
       gnucap += model
 
-      return [gnucap, ".print dc + v(%s) i(%s)\n" %(self.gnucap_name, self.gnucap_name)]
+      return [gnucap, gnucap_print]
 
     # Callback event to move the component
     def component_move(self, widget, target, event, component):
@@ -940,7 +1039,8 @@ class Component(object):
           else:
             self.wire.set_target_node(node_target)
             node_target.add_wire(self.wire)
-            self.electric.run_simulation()
+            self.electric.run_simulation(node.get_component(),
+                                         node_target.get_component())
 
           return True
 
@@ -984,6 +1084,14 @@ class Resistor(Component):
 class Diode(Component):
   image = "electric/diode.png"
   icon  = "electric/diode_icon.png"
+  # Our 'ddd' Diode model
+  # Idealized diode: ~0V treshold voltage. Characteristic graph
+  # passes through the two points (10 mV, 10 mA) and (20 mV, 2000
+  # mA) => N  = 0.072 IS = 5x10-5 A
+  gnucap_model = \
+      ".model  ddd  d  ( is= 50.u  rs= 0.  n= 0.072  tt= 0.  cjo= 1.p  vj= 1.  m= 0.5" \
+      " eg= 1.11  xti= 3.  kf= 0.  af= 1.  fc= 0.5  bv= 0.  ibv= 0.001 )\n"
+
   def __init__(self, electric,
                x, y, dummy):
     super(Diode, self).__init__(electric,
@@ -1000,21 +1108,6 @@ class Diode(Component):
     self.move(x, y)
     self.show()
 
-
-  # Return the gnucap definition for this component
-  # Here we just add the diode model
-  def to_gnucap(self, model):
-    # Our 'ddd' Diode model
-    # Idealized diode: ~0V treshold voltage. Characteristic graph
-    # passes through the two points (10 mV, 10 mA) and (20 mV, 2000
-    # mA) => N  = 0.072 IS = 5x10-5 A
-    model = ".model  ddd  d  ( is= 50.u  rs= 0.  n= 0.072  tt= 0.  cjo= 1.p  vj= 1.  m= 0.5"
-    model += " eg= 1.11  xti= 3.  kf= 0.  af= 1.  fc= 0.5  bv= 0.  ibv= 0.001 )\n"
-
-    gnucap = []
-    gnucap = super(Diode, self).to_gnucap(model)
-    return gnucap
-
 # ----------------------------------------
 # DIODE
 #
@@ -1022,6 +1115,11 @@ class Diode(Component):
 class RedLed(Component):
   image = "electric/red_led_off.png"
   icon  = "electric/red_led_icon.png"
+  # Our 'led1' Diode model
+  gnucap_model = \
+      ".model led1 d ( is=93.p rs=42M n=4.61 bv=4 ibv=10U" \
+      " cjo=2.97P vj=.75 M=.333 TT=4.32U )\n"
+
   def __init__(self, electric,
                x, y, dummy):
     super(RedLed, self).__init__(electric,
@@ -1038,20 +1136,6 @@ class RedLed(Component):
     self.move(x, y)
     self.show()
 
-  # Return the gnucap definition for this component
-  # Here we just add the diode model
-  def to_gnucap(self, model):
-    # Our 'ddd' Diode model
-    # Idealized diode: ~0V treshold voltage. Characteristic graph
-    # passes through the two points (10 mV, 10 mA) and (20 mV, 2000
-    # mA) => N  = 0.072 IS = 5x10-5 A
-    model = ".model led1 d ( is=93.p rs=42M n=4.61 bv=4 ibv=10U"
-    model += " cjo=2.97P vj=.75 M=.333 TT=4.32U )\n"
-
-    gnucap = []
-    gnucap = super(RedLed, self).to_gnucap(model)
-    return gnucap
-
   # Return False if we need more value to complete our component
   # This is usefull in case where one Component is made of several gnucap component
   def set_voltage_intensity(self, valid_value, voltage, intensity):
@@ -1115,7 +1199,7 @@ class Switch(Component):
         pixmap = gcompris.utils.load_pixmap("electric/switch_off.png")
 
       self.component_item.set_properties(pixbuf = pixmap)
-      self.electric.run_simulation()
+      self.electric.run_simulation(self)
 
     return False
 
@@ -1199,7 +1283,7 @@ class Switch2(Component):
 
       self.component_item.set_properties(y = self.y + self.component_item_offset_y)
       self.component_item.set_properties(pixbuf = pixmap)
-      self.electric.run_simulation()
+      self.electric.run_simulation(self)
 
     return False
 
@@ -1232,30 +1316,19 @@ class Switch2(Component):
 
     return False
 
-  # Return the gnucap definition for a single resitor of the switch2
-  # node_id1 and node_id2 are the index in the list of nodes
-  def to_gnucap_res(self, gnucap_name, node_id1, node_id2, gnucap_value):
-    gnucap = gnucap_name
-    gnucap += " "
-
-    for i in (node_id1, node_id2):
-      node = self.nodes[i]
-      if node.get_wires():
-        gnucap += str(node.get_wires()[0].get_wire_id())
+  # Return the gnucap resistor between the nodes node_id1 and node_id2
+  # which are the index in the list of nodes
+  def get_resistor(self, nets, gnucap_name, node_id1, node_id2, gnucap_value):
+    return (gnucap_name,
+            nets[self.nodes[node_id1]],
+            nets[self.nodes[node_id2]],
+            gnucap_value)
 
-      gnucap += " "
-
-    gnucap += " "
-    gnucap += str(gnucap_value)
-    gnucap += "\n"
-
-    return [gnucap, ".print dc + v(%s) i(%s)\n" %(gnucap_name, gnucap_name)]
-
-  # Return the gnucap definition for this component
+  # Return the gnucap components of this component
   # depending of the connected nodes, it create one or two resistor
-  def to_gnucap(self, model):
+  def get_elements(self, nets):
 
-    gnucap = ["", ""]
+    elements = []
 
     # reset set_voltage_intensity counter
     self.gnucap_current_resistor = 0
@@ -1264,22 +1337,18 @@ class Switch2(Component):
     # top resistor
     if self.nodes[0].get_wires() and \
        self.nodes[1].get_wires():
-      gnucap_resp = self.to_gnucap_res(self.gnucap_name + "_top", 0, 1,
-                                        self.value_top)
-      gnucap[0] += gnucap_resp[0]
-      gnucap[1] += gnucap_resp[1]
+      elements.append(self.get_resistor(nets, self.gnucap_name + "_top", 0, 1,
+                                              self.value_top))
       self.gnucap_nb_resistor += 1
 
     # bottom resistor
     if self.nodes[0].get_wires() and \
        self.nodes[2].get_wires():
-      gnucap_resp = self.to_gnucap_res(self.gnucap_name + "_bot", 0, 2,
-                                       self.value_bottom)
-      gnucap[0] += gnucap_resp[0]
-      gnucap[1] += gnucap_resp[1]
+      elements.append(self.get_resistor(nets, self.gnucap_name + "_bot", 0, 2,
+                                              self.value_bottom))
       self.gnucap_nb_resistor += 1
 
-    return [gnucap[0], gnucap[1]]
+    return elements
 
   # Return False if we need more value to complete our component
   # This is usefull in case where one Component is made of several gnucap component
@@ -1366,7 +1435,7 @@ class Rheostat(Component):
       y = self.y + self.wiper_ofset_y,
       )
     self.update_wiper_wire()
-    self.electric.run_simulation()
+    self.electric.run_simulation(self)
 
   # Fixme: can't connect "scroll-event" to this function
   def component_scroll(self, widget, target, event):
@@ -1416,37 +1485,19 @@ class Rheostat(Component):
 
     return False
 
-  # Return the gnucap definition for a single resitor of the rheostat
-  # node_id1 and node_id2 are the index in the list of nodes
-  def to_gnucap_res(self, gnucap_name, node_id1, node_id2, gnucap_value):
-    # Ignore the component if there is some unconnected nodes.
-    for i in (node_id1, node_id2):
-      node = self.nodes[i]
-      if not node.get_wires():
-        gnucap = "* %s: component ignored: not connected\n" %(gnucap_name)
-        return [gnucap, ""]
-
-    gnucap = gnucap_name
-    gnucap += " "
-
-    for i in (node_id1, node_id2):
-      node = self.nodes[i]
-      if node.get_wires():
-        gnucap += str(node.get_wires()[0].get_wire_id())
-
-      gnucap += " "
-
-    gnucap += " "
-    gnucap += str(gnucap_value)
-    gnucap += "\n"
-
-    return [gnucap, ".print dc + v(%s) i(%s)\n" %(gnucap_name, gnucap_name)]
+  # Return the gnucap resistor between the nodes node_id1 and node_id2
+  # which are the index in the list of nodes
+  def get_resistor(self, nets, gnucap_name, node_id1, node_id2, gnucap_value):
+    return (gnucap_name,
+            nets[self.nodes[node_id1]],
+            nets[self.nodes[node_id2]],
+            gnucap_value)
 
-  # Return the gnucap definition for this component
+  # Return the gnucap components of this component
   # depending of the connected nodes, it create one or two resistor
-  def to_gnucap(self, model):
+  def get_elements(self, nets):
 
-    gnucap = ["", ""]
+    elements = []
 
     # reset set_voltage_intensity counter
     self.gnucap_current_resistor = 0
@@ -1460,11 +1511,9 @@ class Rheostat(Component):
        not self.nodes[1].get_wires() and \
        self.nodes[2].get_wires():
       self.gnucap_nb_resistor = 1
-      gnucap_resp = self.to_gnucap_res(self.gnucap_name + "_all", 0, 2,
-                                       self.resitance)
-      gnucap[0] += gnucap_resp[0]
-      gnucap[1] += gnucap_resp[1]
-      return [gnucap[0], gnucap[1]]
+      elements.append(self.get_resistor(nets, self.gnucap_name + "_all", 0, 2,
+                                              self.resitance))
+      return elements
 
 
     self.gnucap_nb_resistor = 0
@@ -1473,21 +1522,17 @@ class Rheostat(Component):
     if self.nodes[0].get_wires() and \
        self.nodes[1].get_wires():
       self.gnucap_nb_resistor += 1
-      gnucap_resp  = self.to_gnucap_res(self.gnucap_name + "_top", 0, 1,
-                                        gnucap_value)
-      gnucap[0] += gnucap_resp[0]
-      gnucap[1] += gnucap_resp[1]
+      elements.append(self.get_resistor(nets, self.gnucap_name + "_top", 0, 1,
+                                              gnucap_value))
 
     # bottom resistor
     if self.nodes[1].get_wires() and \
        self.nodes[2].get_wires():
       self.gnucap_nb_resistor += 1
-      gnucap_resp = self.to_gnucap_res(self.gnucap_name + "_bot", 1, 2,
-                                       self.resitance - gnucap_value)
-      gnucap[0] += gnucap_resp[0]
-      gnucap[1] += gnucap_resp[1]
+      elements.append(self.get_resistor(nets, self.gnucap_name + "_bot", 1, 2,
+                                              self.resitance - gnucap_value))
 
-    return [gnucap[0], gnucap[1]]
+    return elements
 
   # Return False if we need more value to complete our component
   # This is usefull in case one Component is made of several gnucap component
@@ -1562,7 +1607,7 @@ class Bulb(Component):
     if image_index == 11:
       self.gnucap_value = self.resistor_blown
       self.is_blown = True
-      self.electric.run_simulation()
+      self.electric.run_simulation(self)
 
     return True
 
@@ -1576,7 +1621,7 @@ class Bulb(Component):
       if self.is_blown:
         self.is_blown = False
         self.gnucap_value = self.internal_resistor
-        self.electric.run_simulation()
+        self.electric.run_simulation(self)
 
     elif (event.state & gtk.gdk.BUTTON3_MASK) and self.electric.get_current_tools()=="SELECT":
       if not self.is_blown:
@@ -0,0 +1,152 @@
+#  gcompris - electric_gnucap.py
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# A gnucap process kept running for the whole activity.
+#
+# Instead of writing a netlist file and starting gnucap in batch mode on
+# each change of the circuit, the netlist is typed in an interactive
+# gnucap through a pipe and the result of the dc analysis is read back
+# on its output. If gnucap dies or stops answering, it is restarted.
+#
+# The output is read by a thread into a queue, select() does not work on
+# pipes on Windows. The UI waits for the result, a gnucap that stops
+# answering freezes it at most timeout seconds per attempt.
+
+import os
+import subprocess
+import threading
+import time
+import Queue
+
+class SimulationError(Exception):
+  pass
+
+class GnucapSession:
+  """ Drives an interactive gnucap over pipes """
+
+  # Seconds to wait for the result of an analysis
+  timeout = 1.0
+
+  # Number of times a simulation is tried again on a fresh gnucap
+  retries = 1
+
+  def __init__(self, binary, debug=False):
+    self.binary = binary
+    self.debug = debug
+    self.process = None
+    self.lines = None
+
+  def start(self):
+    if self.debug: print "gnucap session: starting %s" %(self.binary,)
+    self.process = subprocess.Popen([self.binary],
+                                    stdin = subprocess.PIPE,
+                                    stdout = subprocess.PIPE,
+                                    stderr = subprocess.STDOUT,
+                                    close_fds = (os.name == 'posix'))
+    # Each process has its own queue, a reader left from a previous one
+    # cannot mix its lines with ours
+    self.lines = Queue.Queue()
+    reader = threading.Thread(target = read_lines,
+                              args = (self.process.stdout, self.lines))
+    reader.daemon = True
+    reader.start()
+
+  def stop(self):
+    if not self.process:
+      return
+    if self.debug: print "gnucap session: stopping"
+    try:
+      if self.process.poll() == None:
+        self.process.stdin.write("quit\n")
+        self.process.stdin.close()
+        # Give it a chance to leave on its own
+        for i in range(10):
+          if self.process.poll() != None:
+            break
+          time.sleep(0.01)
+        else:
+          self.process.kill()
+      self.process.wait()
+    except (IOError, OSError):
+      pass
+    self.process = None
+
+  def is_running(self):
+    return self.process and self.process.poll() == None
+
+  def simulate(self, netlist, probes):
+    """
+    Run a dc analysis and return the values printed by gnucap, as
+    strings, in the order of the probes.
+      netlist : the list of the component lines
+      probes : the list of the values to print, like 'v(R1)'
+    Raise SimulationError if gnucap cannot give them.
+    """
+    for attempt in range(self.retries + 1):
+      if not self.is_running():
+        self.start()
+      try:
+        return self._simulate(netlist, probes)
+      except (SimulationError, IOError, OSError), e:
+        if self.debug: print "gnucap session: %s" %(e,)
+        # Whatever state it is in, the process is no more in sync with us
+        self.stop()
+    raise SimulationError("gnucap failed %d times" %(self.retries + 1,))
+
+  def _simulate(self, netlist, probes):
+    commands = ["clear", "print clear", "build"]
+    commands += netlist
+    # An empty line ends the build mode
+    commands.append("")
+    commands.append("print dc " + " ".join(probes))
+    commands.append("dc")
+    text = "\n".join(commands) + "\n"
+    if self.debug: print text
+
+    self.process.stdin.write(text)
+    self.process.stdin.flush()
+
+    # Like in batch mode, the dc result is the line starting with '0.',
+    # the sweep value, followed by the probed values
+    deadline = time.time() + self.timeout
+    while True:
+      line = self._readline(deadline)
+      if self.debug: print "gnucap session: %s" %(line.rstrip(),)
+      values = line.split()
+      if values and values[0] == "0.":
+        return values[1:]
+
+  def _readline(self, deadline):
+    remaining = deadline - time.time()
+    if remaining <= 0:
+      raise SimulationError("timeout")
+    try:
+      line = self.lines.get(True, remaining)
+    except Queue.Empty:
+      raise SimulationError("timeout")
+    if line == None:
+      raise SimulationError("gnucap exited")
+    return line
+
+# Put the lines of file in queue until its end, then None
+def read_lines(file, queue):
+  try:
+    for line in iter(file.readline, ""):
+      queue.put(line)
+  except (IOError, OSError, ValueError):
+    pass
+  queue.put(None)
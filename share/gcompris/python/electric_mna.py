@@ -0,0 +1,297 @@
+#  gcompris - electric_mna.py
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# A small DC simulator for the electric activity.
+#
+# The circuit is described with the same elements as the gnucap netlist
+# (R, V and D with a .model line) and solved with a modified nodal
+# analysis: one equation per net, plus one per voltage source and per
+# 0 ohm resistor for their current. Diodes are replaced by their tangent
+# at the current operating point and the system is solved again until the
+# operating point does not move anymore (Newton iteration).
+
+import math
+import re
+
+class SolverError(Exception):
+  pass
+
+# Thermal voltage at 27 degrees
+VT = 0.025852
+
+# A tiny conductance put from each net to the ground, it keeps the
+# system solvable when a diode is blocked
+GMIN = 1e-12
+
+# The resistance of the voltage sources and of the 0 ohm resistors, so
+# that a short circuit or two of them in parallel can still be solved
+RMIN = 1e-6
+
+MAX_ITERATIONS = 200
+
+# SPICE value suffixes, M being milli and MEG mega
+SUFFIXES = (("MEG", 1e6), ("T", 1e12), ("G", 1e9), ("K", 1e3),
+            ("M", 1e-3), ("U", 1e-6), ("N", 1e-9), ("P", 1e-12),
+            ("F", 1e-15))
+
+def parse_value(value):
+  """ Return the float value of a number or of a SPICE value string
+  like '10k' or '50.u' """
+  if not isinstance(value, basestring):
+    return float(value)
+  text = value.strip().upper()
+  for (suffix, unit) in SUFFIXES:
+    if text.endswith(suffix):
+      return float(text[:-len(suffix)]) * unit
+  return float(text)
+
+def solve_linear(rows, rhs):
+  """
+  Solve the system whose rows are dictionaries {column: coefficient}
+  with a Gaussian elimination. rows and rhs are modified.
+  """
+  size = len(rhs)
+  remaining = range(size)
+  order = []
+  for column in range(size):
+    # Partial pivoting among the rows not yet used
+    pivot = None
+    best = 0.0
+    for r in remaining:
+      a = abs(rows[r].get(column, 0.0))
+      if a > best:
+        best = a
+        pivot = r
+    if pivot == None or best < 1e-30:
+      raise SolverError("singular circuit")
+    remaining.remove(pivot)
+    order.append(pivot)
+
+    pivot_row = rows[pivot]
+    pivot_value = pivot_row[column]
+    for r in remaining:
+      row = rows[r]
+      if not column in row:
+        continue
+      factor = row.pop(column) / pivot_value
+      for (c, a) in pivot_row.iteritems():
+        if c != column:
+          row[c] = row.get(c, 0.0) - factor * a
+      rhs[r] -= factor * rhs[pivot]
+
+  solution = [0.0] * size
+  for column in range(size - 1, -1, -1):
+    row = rows[order[column]]
+    total = rhs[order[column]]
+    for (c, a) in row.iteritems():
+      if c != column:
+        total -= a * solution[c]
+    solution[column] = total / row[column]
+  return solution
+
+class Diode:
+  """ The diode model of a .model line """
+  def __init__(self, is_=1e-14, n=1.0, rs=0.0):
+    self.is_ = is_
+    self.nvt = n * VT
+    self.rs = rs
+    self.vcrit = self.nvt * math.log(self.nvt / (math.sqrt(2) * self.is_))
+
+  def current(self, vd):
+    """ Return the current and the conductance at the voltage vd """
+    e = math.exp(min(vd / self.nvt, 500))
+    return (self.is_ * (e - 1), self.is_ * e / self.nvt + GMIN)
+
+  def limit(self, vnew, vold):
+    """ Damp a voltage step so the exponential does not explode
+    (the pnjlim of SPICE) """
+    if vnew > self.vcrit and abs(vnew - vold) > 2 * self.nvt:
+      if vold > 0:
+        arg = 1 + (vnew - vold) / self.nvt
+        if arg > 0:
+          return vold + self.nvt * math.log(arg)
+        return self.vcrit
+      return self.nvt * math.log(vnew / self.nvt)
+    return vnew
+
+class Circuit:
+  """ A DC circuit made of resistors, voltage sources and diodes. Nets can
+  be any hashable value, like the gnucap wire ids. """
+
+  def __init__(self):
+    self.elements = []
+    self.models = {}
+
+  def add_model(self, text):
+    """ Add a '.model <name> d ( <param>=<value> ... )' line """
+    words = text.replace("(", " ").replace(")", " ").split()
+    if len(words) < 3 or words[0].lower() != ".model" \
+          or words[2].lower() != "d":
+      raise SolverError("unsupported model: %s" %(text,))
+    params = {}
+    for (key, value) in re.findall(r"(\w+)\s*=\s*([^\s()]+)", text):
+      params[key.lower()] = parse_value(value)
+    self.models[words[1]] = Diode(params.get("is", 1e-14),
+                                  params.get("n", 1.0),
+                                  params.get("rs", 0.0))
+
+  def add(self, name, node1, node2, value):
+    """ Add an element named like in SPICE, the first letter giving its
+    kind. The value of a diode is its model name and its area. """
+    kind = name[0].upper()
+    if kind == "D":
+      model = str(value).split()[0]
+      if not model in self.models:
+        raise SolverError("unknown model %s" %(model,))
+      value = self.models[model]
+    elif kind in ("R", "V"):
+      value = parse_value(value)
+    else:
+      raise SolverError("unsupported element %s" %(name,))
+    self.elements.append((name, kind, node1, node2, value))
+
+  def solve(self):
+    """
+    Return a dictionary giving for each element name the tuple
+    (voltage, current), the current flowing from node1 to node2 through
+    the element. Raise SolverError if the circuit cannot be solved.
+    """
+    # The series resistor of a diode gets its own internal net
+    elements = []
+    for (name, kind, node1, node2, value) in self.elements:
+      if kind == "D" and value.rs > 0:
+        internal = (name, "internal")
+        elements.append((None, "R", node1, internal, value.rs))
+        elements.append((name, "D", internal, node2, value))
+      else:
+        elements.append((name, kind, node1, node2, value))
+
+    # Each independent circuit gets its own ground, net 0 if it has one
+    parent = {}
+    def find(net):
+      while parent[net] != net:
+        parent[net] = parent[parent[net]]
+        net = parent[net]
+      return net
+    for (name, kind, node1, node2, value) in elements:
+      parent.setdefault(node1, node1)
+      parent.setdefault(node2, node2)
+      (root1, root2) = (find(node1), find(node2))
+      if root1 != root2:
+        if root2 == 0:
+          (root1, root2) = (root2, root1)
+        parent[root2] = root1
+
+    index = {}
+    for net in parent:
+      if find(net) != net:
+        index[net] = len(index)
+
+    # The voltage sources and 0 ohm resistors need their current as an
+    # unknown
+    branches = {}
+    for (i, (name, kind, node1, node2, value)) in enumerate(elements):
+      if kind == "V" or (kind == "R" and value < RMIN):
+        branches[i] = len(index) + len(branches)
+    size = len(index) + len(branches)
+
+    rows = [dict() for i in range(size)]
+    rhs = [0.0] * size
+    for i in range(len(index)):
+      rows[i][i] = GMIN
+
+    def stamp_conductance(rows, node1, node2, g):
+      a = index.get(node1)
+      b = index.get(node2)
+      if a != None:
+        rows[a][a] = rows[a].get(a, 0.0) + g
+      if b != None:
+        rows[b][b] = rows[b].get(b, 0.0) + g
+      if a != None and b != None:
+        rows[a][b] = rows[a].get(b, 0.0) - g
+        rows[b][a] = rows[b].get(a, 0.0) - g
+
+    diodes = []
+    for (i, (name, kind, node1, node2, value)) in enumerate(elements):
+      if i in branches:
+        k = branches[i]
+        volts = value if kind == "V" else 0.0
+        for (node, sign) in ((node1, 1.0), (node2, -1.0)):
+          if node in index:
+            rows[index[node]][k] = sign
+            rows[k][index[node]] = sign
+        rows[k][k] = -RMIN
+        rhs[k] = volts
+      elif kind == "R":
+        stamp_conductance(rows, node1, node2, 1.0 / value)
+      else:
+        diodes.append(i)
+
+    def voltage(solution, node):
+      if node in index:
+        return solution[index[node]]
+      return 0.0
+
+    # Newton iteration on the diodes voltages
+    vds = dict([(i, 0.0) for i in diodes])
+    for iteration in range(MAX_ITERATIONS):
+      system = [dict(row) for row in rows]
+      system_rhs = list(rhs)
+      for i in diodes:
+        (name, kind, node1, node2, diode) = elements[i]
+        (current, g) = diode.current(vds[i])
+        stamp_conductance(system, node1, node2, g)
+        equivalent = current - g * vds[i]
+        if node1 in index:
+          system_rhs[index[node1]] -= equivalent
+        if node2 in index:
+          system_rhs[index[node2]] += equivalent
+
+      solution = solve_linear(system, system_rhs)
+
+      converged = True
+      for i in diodes:
+        (name, kind, node1, node2, diode) = elements[i]
+        vd = voltage(solution, node1) - voltage(solution, node2)
+        if abs(vd - vds[i]) > 1e-9 + 1e-6 * abs(vd):
+          converged = False
+        vds[i] = diode.limit(vd, vds[i])
+      if converged:
+        break
+    else:
+      raise SolverError("no convergence")
+
+    results = {}
+    for (i, (name, kind, node1, node2, value)) in enumerate(elements):
+      if i in branches:
+        current = solution[branches[i]]
+      elif kind == "R":
+        current = (voltage(solution, node1) - voltage(solution, node2)) / value
+      else:
+        current = value.current(vds[i])[0]
+      if name == None:
+        continue
+      results[name] = (voltage(solution, node1) - voltage(solution, node2),
+                       current)
+
+    # A diode voltage includes its series resistor
+    for (name, kind, node1, node2, value) in self.elements:
+      if kind == "D":
+        results[name] = (voltage(solution, node1) - voltage(solution, node2),
+                         results[name][1])
+
+    return results
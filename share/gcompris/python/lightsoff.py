@@ -26,6 +26,8 @@ import goocanvas
 
 from gcompris import gcompris_gettext as _
 
+from lightsoff_solver import Solver
+
 class Gcompris_lightsoff:
   """Empty gcompris python class"""
 
@@ -42,6 +44,9 @@ class Gcompris_lightsoff:
     self.board_paused  = False;
     self.gamewon       = False;
 
+    # The solvers, by board size
+    self.solvers = {}
+
     self.data = [
       [[0,0,0,0,0],
        [0,0,1,0,0],
@@ -523,27 +528,42 @@ class Gcompris_lightsoff:
 
     return 1
 
-  def create_empty_list(self):
+  def create_empty_list(self, rows, columns):
     items = []
-    for x in range(5):
-      items.append(range(5))
-    for y in range(len(items)):
-      for x in range(len(items[0])):
-        items[y][x] = 0
+    for y in range(rows):
+      items.append([0] * columns)
     return items
 
+  def get_solver(self, rows, columns):
+    if not (rows, columns) in self.solvers:
+      self.solvers[(rows, columns)] = Solver(rows, columns)
+    return self.solvers[(rows, columns)]
+
   # Display the board game
   def display_game(self):
+      data = self.data[self.gcomprisBoard.level - 1]
+      rows = len(data)
+      columns = len(data[0])
+      self.solver = self.get_solver(rows, columns)
+
       # The grid we display
       # It contains all the graphic items
-      self.items = self.create_empty_list()
+      self.items = self.create_empty_list(rows, columns)
 
       # The grid of hints items
-      self.hints = self.create_empty_list()
+      self.hints = self.create_empty_list(rows, columns)
 
       # Do we display the hints
       self.hints_mode = False
 
+      # The lights that are on, the clicks of a solution and the
+      # hints currently visible, as solver masks
+      self.lights = self.solver.to_mask(data)
+      self.solvable = self.solver.is_solvable(self.lights)
+      self.solution = self.solver.particular(self.lights)
+      self.hints_shown = 0
+      self.solution_length = -1
+
       if self.rootitem:
         self.rootitem.remove()
 
@@ -563,16 +583,15 @@ class Gcompris_lightsoff:
       iheight = svghandle.props.height
 
       gap = 10
-      x_start = (gcompris.BOARD_WIDTH - len(self.items) * (iwidth + gap) ) / 2
-      y_start = (gcompris.BOARD_HEIGHT - len(self.items[0]) \
-                   * (iheight + gap) ) / 2 - 40
+      x_start = (gcompris.BOARD_WIDTH - columns * (iwidth + gap) ) / 2
+      y_start = (gcompris.BOARD_HEIGHT - rows * (iheight + gap) ) / 2 - 40
 
       goocanvas.Rect(
         parent = self.rootitem,
         x = x_start - gap,
         y = y_start - gap,
-        width = len(self.items) * (iwidth + gap) + gap,
-        height = len(self.items[0]) * (iheight + gap) + gap,
+        width = columns * (iwidth + gap) + gap,
+        height = rows * (iheight + gap) + gap,
         fill_color_rgba = 0x445533AAL,
         stroke_color_rgba = 0xC0C0C0AAL,
         radius_x = 10,
@@ -580,9 +599,8 @@ class Gcompris_lightsoff:
         line_width = 2
         )
 
-      data = self.data[self.gcomprisBoard.level - 1]
-      for y in range(len(self.items)):
-        for x in range(len(self.items[0])):
+      for y in range(rows):
+        for x in range(columns):
           item = goocanvas.Rect(
             parent = self.rootitem,
             x = x_start + (iwidth + gap) * x - gap/2,
@@ -634,7 +652,7 @@ class Gcompris_lightsoff:
     return self.items[y-1][x]
 
   def get_item_down(self, y, x):
-    if y == len(self.items[0])-1:
+    if y == len(self.items)-1:
       return None
     return self.items[y+1][x]
 
@@ -644,18 +662,13 @@ class Gcompris_lightsoff:
     return self.items[y][x-1]
 
   def get_item_right(self, y, x):
-    if x == len(self.items)-1:
+    if x == len(self.items[0])-1:
       return None
     return self.items[y][x+1]
 
   # Returns True when complete
   def is_done(self):
-    for y in range(len(self.items)):
-      for x in range(len(self.items[0])):
-        if self.is_on(self.items[y][x]):
-          return False
-
-    return True
+    return self.lights == 0
 
   def button_press_event(self, widget, target, event, spot):
     self.switch(target)
@@ -664,6 +677,11 @@ class Gcompris_lightsoff:
     self.switch(self.get_item_right(spot[0], spot[1]))
     self.switch(self.get_item_down(spot[0], spot[1]))
 
+    # Pressing a light adds its fixed press vector to the board and to
+    # the solution
+    index = spot[0] * self.solver.columns + spot[1]
+    self.lights ^= self.solver.presses[index]
+    self.solution ^= self.solver.press_solutions[index]
     self.solve_it()
 
     if self.is_done():
@@ -674,153 +692,14 @@ class Gcompris_lightsoff:
       self.gamewon = True
       gcompris.bonus.display(gcompris.bonus.WIN, gcompris.bonus.FLOWER)
 
-  def solution_switch(self, items, clicks, y, x):
-    items[y][x] = not items[y][x]
-    clicks[y][x] = not clicks[y][x]
-    if y >= 1:
-      items[y-1][x] = not items[y-1][x]
-    if y <= 3:
-      items[y+1][x] = not items[y+1][x]
-    if x >= 1:
-      items[y][x-1] = not items[y][x-1]
-    if x <= 3:
-      items[y][x+1] = not items[y][x+1]
-
-
-  def chase_light(self, items, clicks):
-    for y in range(1, len(items)):
-      for x in range(len(items[0])):
-        if items[y-1][x]:
-          self.solution_switch(items, clicks, y, x)
-
-  def is_solution_pattern(self, s, a, b, c, d, e):
-    if s[4][0] == a and \
-          s[4][1] == b and \
-          s[4][2] == c and \
-          s[4][3] == d and \
-          s[4][4] == e:
-      return True
-    return False
-
-
-  # Return False if the is no solution
-  def solution_wrap(self, solution, clicks):
-    if self.is_solution_pattern(solution, 1, 0, 0 , 0, 1):
-      self.solution_switch(solution, clicks, 0, 0)
-      self.solution_switch(solution, clicks, 0, 1)
-    elif self.is_solution_pattern(solution, 0, 1, 0, 1, 0):
-      self.solution_switch(solution, clicks, 0, 0)
-      self.solution_switch(solution, clicks, 0, 3)
-    elif self.is_solution_pattern(solution, 1, 1, 1, 0, 0):
-      self.solution_switch(solution, clicks, 0, 1)
-    elif self.is_solution_pattern(solution, 0, 0, 1, 1 , 1):
-      self.solution_switch(solution, clicks, 0, 3)
-    elif self.is_solution_pattern(solution, 1, 0, 1, 1, 0):
-      self.solution_switch(solution, clicks, 0, 4)
-    elif self.is_solution_pattern(solution, 0, 1, 1, 0, 1):
-      self.solution_switch(solution, clicks, 0, 0)
-    elif self.is_solution_pattern(solution, 1, 1, 0, 1, 1):
-      self.solution_switch(solution, clicks, 0, 2)
-    else:
-      return False
-    return True
-
-  def items2list(self, items):
-    list = []
-    for y in range(len(items[0])):
-      line = []
-      for x in range(len(items)):
-        if self.is_on(items[y][x]):
-          line.append(1)
-        else:
-          line.append(0)
-      list.append(line)
-    return list
-
-  # We check only the last line
-  def solution_found(self, solution):
-    for x in range(len(solution[0])):
-      if solution[4][x]:
-        return False
-    return True
-
-  def solution_length(self, clicks):
-    click = 0
-    for y in range(0, len(clicks)):
-      for x in range(len(clicks[0])):
-        if clicks[y][x]:
-          click += 1
-    return click
-
-  def solve_one(self, solution, clicks):
-    found = False
-    for index in range(0, 5):
-
-      self.chase_light( solution, clicks )
-
-      if self.solution_found(solution):
-        found = True
-        break
-
-      if not self.solution_wrap(solution, clicks):
-        break
-
-    if found:
-      return clicks
-    else:
-      return None
-
-  # Solving algorithm is the one described here:
-  # http://www.haar.clara.co.uk/Lights/solving.html To begin, you turn
-  # out all the lights on the top row, by pressing the buttons on the
-  # second row that are directly underneath any lit buttons on the top
-  # row. The top row will then have all it's lights off.  Repeat this
-  # step for the second, third and fourth row. (i.e. chase the lights
-  # all the way down to the bottom row). This may have solved the
-  # puzzle already ( click here for an example of this ), but is more
-  # likely that there will now be some lights left on in the bottom
-  # row. If so, there are only 7 posible configurations. Depending on
-  # which configuration you are left with, you need to press some
-  # buttons in the top row. You can determine which buttons you need
-  # to press from the following table.
-  # Light on bottom row     Press on this on top row
-  # 10001                   11000
-  # 01010                   10010
-  # 11100                   01000
-  # 00111                   00010
-  # 10110                   00001
-  # 01101                   10000
-  # 11011                   00100
-
+  # The board is solved as a linear system over GF(2), see
+  # lightsoff_solver. self.solution is kept up to date on each click,
+  # here we only look for the shortest equivalent solution so that
+  # the proposed one stays stable when one light changes.
   def solve_it(self):
-    clicks = None
-
-    # Our solving algorithm does not find the shortest solution. We
-    # don't really care but we'd like to keep the proposed solution
-    # stable (not propose a complete new solution when one light
-    # changes).  To achieve this (closely), we test here all the
-    # combination of the first line, trying to find the shortest
-    # solution.
-    for x in range(64):
-      solution = self.items2list(self.items)
-      clicks2 = self.create_empty_list()
-      if x & 1:
-        self.solution_switch(solution, clicks2, 0, 0)
-      if x & 2:
-        self.solution_switch(solution, clicks2, 0, 1)
-      if x & 4:
-        self.solution_switch(solution, clicks2, 0, 2)
-      if x & 8:
-        self.solution_switch(solution, clicks2, 0, 3)
-      if x & 16:
-        self.solution_switch(solution, clicks2, 0, 4)
-
-      clicks2 = self.solve_one(solution, clicks2)
-      if clicks == None and clicks2:
-        clicks = clicks2
-      elif clicks2 and \
-            self.solution_length(clicks2) < self.solution_length(clicks):
-        clicks = clicks2
+    clicks = 0
+    if self.solvable:
+      clicks = self.solver.shortest(self.solution)
 
     if self.hints_mode:
       self.show_hints(clicks)
@@ -829,16 +708,18 @@ class Gcompris_lightsoff:
 
 
   def solve_event(self, widget, target, event):
-    clicks = self.create_empty_list()
     self.hints_mode = not self.hints_mode
     if not self.hints_mode:
-      self.show_hints(clicks)
+      self.show_hints(0)
     else:
       self.solve_it()
 
 
   def update_background(self, clicks):
-    length = self.solution_length(clicks)
+    length = bin(clicks).count('1')
+    if length == self.solution_length:
+      return
+    self.solution_length = length
     c = int(length * 0xFF / 18.0)
     color = 0X33 << 24 | 0x11 << 16 | c << 8 | 0xFFL
     self.background.set_properties(fill_color_rgba = color)
@@ -848,15 +729,22 @@ class Gcompris_lightsoff:
     self.sunitem.translate(0, self.sunitem_offset * -1)
 
 
+  # Only the hints that changed since the last call are updated
   def show_hints(self, clicks):
-    for y in range(len(clicks)):
-      for x in range(len(clicks[0])):
-        if clicks[y][x]:
+    changed = clicks ^ self.hints_shown
+    self.hints_shown = clicks
+    for y in range(len(self.hints)):
+      for x in range(len(self.hints[0])):
+        bit = self.solver.bit(y, x)
+        if not changed & bit:
+          continue
+        if clicks & bit:
           self.hints[y][x].props.visibility = goocanvas.ITEM_VISIBLE
         else:
           self.hints[y][x].props.visibility = goocanvas.ITEM_INVISIBLE
 
   def print_sol(self, clicks):
+    clicks = self.solver.to_grid(clicks)
     for y in range(len(clicks)):
       s = ""
       for x in range(len(clicks[0])):
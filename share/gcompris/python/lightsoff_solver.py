@@ -0,0 +1,186 @@
+#  gcompris - lightsoff_solver.py
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# Lights off solver.
+#
+# A board of rows x columns lights is stored as an integer, the light
+# (y, x) being the bit y * columns + x. Pressing a light toggles a fixed
+# set of lights, so finding the presses that switch off the board is
+# solving a linear system over GF(2). The system only depends on the
+# board size, it is reduced once with a Gaussian elimination and then
+# every board is solved with a few bit operations.
+
+class Solver:
+  """ Solves lights off boards of a given size """
+
+  # Boards whose system has more free presses than this are not
+  # searched for the shortest solution
+  MAX_NULLITY = 16
+
+  def __init__(self, rows, columns, torus=False):
+    """
+    Constructor:
+      rows, columns : size of the board
+      torus : when True, the lights on a border are neighbours of the
+              lights on the opposite border
+    """
+    self.rows = rows
+    self.columns = columns
+    self.torus = torus
+    self.size = rows * columns
+
+    self.presses = [self.press_mask(y, x)
+                    for y in range(rows) for x in range(columns)]
+    self.reduce()
+
+  def bit(self, y, x):
+    return 1 << (y * self.columns + x)
+
+  def press_mask(self, y, x):
+    """ Return the lights toggled by pressing the light (y, x) """
+    mask = self.bit(y, x)
+    for (dy, dx) in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+      ny = y + dy
+      nx = x + dx
+      if self.torus:
+        ny %= self.rows
+        nx %= self.columns
+      elif not (0 <= ny < self.rows and 0 <= nx < self.columns):
+        continue
+      mask |= self.bit(ny, nx)
+    return mask
+
+  def reduce(self):
+    """
+    Gaussian elimination of the press matrix. It computes:
+      self.light_solutions : for each light, presses that switch off a
+                             board where only this light is on, if any
+                             combination of presses can do it
+      self.press_solutions : for each light, the change of the
+                             particular() solution when it is pressed
+      self.checks : a board is solvable if it has an even number of
+                    lights in common with each of these masks
+      self.kernel : the independent combinations of presses that
+                    change nothing
+    """
+    # Row i of the system tells which presses toggle the light i. Each
+    # row carries the combination of original rows it is made of.
+    rows = []
+    for light in range(self.size):
+      mask = 0
+      for press in range(self.size):
+        if self.presses[press] >> light & 1:
+          mask |= 1 << press
+      rows.append([mask, 1 << light])
+
+    pivots = []
+    rank = 0
+    for column in range(self.size):
+      bit = 1 << column
+      for i in range(rank, self.size):
+        if rows[i][0] & bit:
+          break
+      else:
+        continue
+      rows[rank], rows[i] = rows[i], rows[rank]
+      for i in range(self.size):
+        if i != rank and rows[i][0] & bit:
+          rows[i][0] ^= rows[rank][0]
+          rows[i][1] ^= rows[rank][1]
+      pivots.append(column)
+      rank += 1
+
+    # With the free presses left off, the pivot press of row k is on when
+    # the board has an odd number of lights in the combination of row k
+    self.light_solutions = [0] * self.size
+    for k in range(rank):
+      combination = rows[k][1]
+      for light in range(self.size):
+        if combination >> light & 1:
+          self.light_solutions[light] |= 1 << pivots[k]
+
+    self.checks = [rows[k][1] for k in range(rank, self.size)]
+
+    # Pressing a light changes the solution by a fixed vector
+    self.press_solutions = [self.particular(press) for press in self.presses]
+
+    self.kernel = []
+    for free in range(self.size):
+      if free in pivots:
+        continue
+      vector = 1 << free
+      for k in range(rank):
+        if rows[k][0] >> free & 1:
+          vector |= 1 << pivots[k]
+      self.kernel.append(vector)
+
+  def is_solvable(self, lights):
+    for check in self.checks:
+      if bin(check & lights).count('1') & 1:
+        return False
+    return True
+
+  def particular(self, lights):
+    """ Return a combination of presses that switches off lights """
+    presses = 0
+    light = 0
+    while lights:
+      if lights & 1:
+        presses ^= self.light_solutions[light]
+      lights >>= 1
+      light += 1
+    return presses
+
+  def shortest(self, presses):
+    """ Return the shortest solution equivalent to the presses one """
+    if len(self.kernel) > self.MAX_NULLITY:
+      return presses
+    best = presses
+    best_length = bin(presses).count('1')
+    for combination in range(1, 1 << len(self.kernel)):
+      candidate = presses
+      for i in range(len(self.kernel)):
+        if combination >> i & 1:
+          candidate ^= self.kernel[i]
+      length = bin(candidate).count('1')
+      if length < best_length:
+        best = candidate
+        best_length = length
+    return best
+
+  def solve(self, lights):
+    """
+    Return the shortest presses mask that switches off the lights mask,
+    None if there is no solution
+    """
+    if not self.is_solvable(lights):
+      return None
+    return self.shortest(self.particular(lights))
+
+  def to_mask(self, grid):
+    """ Convert a list of rows of booleans into a mask """
+    mask = 0
+    for y in range(self.rows):
+      for x in range(self.columns):
+        if grid[y][x]:
+          mask |= self.bit(y, x)
+    return mask
+
+  def to_grid(self, mask):
+    """ Convert a mask into a list of rows of booleans """
+    return [[bool(mask & self.bit(y, x)) for x in range(self.columns)]
+            for y in range(self.rows)]
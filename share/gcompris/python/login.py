@@ -38,6 +38,66 @@ backgrounds = [
 
 MAX_USERS_AT_ONCE = 10
 
+class LoginTrie:
+  """
+  The users indexed by the letters of their login, so that the users
+  and the next letters for the first letters of a login are found
+  without looking at the other users.
+  A node is a tuple (children by letter, letters in order, users).
+  Letters are UTF-8 strings of one character.
+  """
+
+  def __init__(self, users, uppercase_only):
+    self.uppercase_only = uppercase_only
+    self.root = ({}, [], [])
+    self.by_login = {}
+
+    for user in users:
+      login = self.login_of(user)
+      self.by_login.setdefault(login, user)
+
+      node = self.root
+      node[2].append(user)
+      for letter in login.decode('utf8'):
+        letter = letter.encode('utf8')
+        if not letter in node[0]:
+          node[0][letter] = ({}, [], [])
+          node[1].append(letter)
+        node = node[0][letter]
+        node[2].append(user)
+
+  # The login as it is displayed and typed
+  def login_of(self, user):
+    if self.uppercase_only:
+      return user.login.decode('utf8').upper().encode('utf8')
+    return user.login
+
+  def find(self, prefix):
+    node = self.root
+    for letter in prefix.decode('utf8'):
+      node = node[0].get(letter.encode('utf8'))
+      if not node:
+        return None
+    return node
+
+  def users(self, prefix):
+    """ Return the users whose login starts with prefix """
+    node = self.find(prefix)
+    if not node:
+      return []
+    return node[2]
+
+  def next_letters(self, prefix):
+    """ Return the letters following prefix in the logins """
+    node = self.find(prefix)
+    if not node:
+      return []
+    return node[1]
+
+  def get(self, login):
+    """ Return the user of the login, None if there is none """
+    return self.by_login.get(login)
+
 class Gcompris_login:
   """Login screen for gcompris"""
 
@@ -72,6 +132,8 @@ class Gcompris_login:
 
     # change configured values
     self.config_dict.update(gcompris.get_board_conf())
+    self.uppercase_only = eval(self.config_dict['uppercase_only'])
+    self.entry_text_mode = eval(self.config_dict['entry_text'])
 
     # Create and Initialize the rootitem.
     self.init_rootitem(self.Prop)
@@ -83,8 +145,9 @@ class Gcompris_login:
         users.extend( gcompris.admin.get_users_from_group(group_id))
 
     self.users = self.check_unique_id(users)
+    self.trie = LoginTrie(self.users, self.uppercase_only)
 
-    if eval(self.config_dict['entry_text']):
+    if self.entry_text_mode:
       self.entry_text()
     else:
       self.display_user_by_letter(self.users, "")
@@ -141,7 +204,7 @@ class Gcompris_login:
 
     self.init_rootitem(self.Prop)
 
-    if eval(self.config_dict['entry_text']):
+    if self.entry_text_mode:
       self.entry_text()
     else:
       self.display_user_by_letter(self.users, "")
@@ -184,30 +247,15 @@ class Gcompris_login:
   #
   def display_user_by_letter(self, users, start_filter):
 
-    first_letters = []
-    current_letter = None
-    remaining_users=0
+    remaining_users = self.trie.users(start_filter)
 
-    for user in users:
-      if eval(self.config_dict['uppercase_only']):
-        login = user.login.decode('utf8').upper().encode('utf8')
-      else:
-        login = user.login
-      if login.startswith(start_filter):
-        remaining_users += 1
-        if(len(start_filter)<len(login)):
-          if(not current_letter or
-             current_letter != login[len(start_filter)]):
-            current_letter = login[len(start_filter)]
-            first_letters.append(current_letter)
-
-    # Fine we have the list of first letters
-    if(remaining_users<MAX_USERS_AT_ONCE):
+    if(len(remaining_users)<MAX_USERS_AT_ONCE):
       # We now can display the list of users
-      self.display_user_list(users, start_filter)
+      self.display_user_list(remaining_users, start_filter)
     else:
       # Display only the letters
-      self.display_letters(first_letters, users, start_filter)
+      self.display_letters(self.trie.next_letters(start_filter),
+                           users, start_filter)
 
   #
   # Display the letters in 'letters'
@@ -254,10 +302,11 @@ class Gcompris_login:
     for letter in letters:
 
       # Display both cases for the letter
-      if eval(self.config_dict['uppercase_only']):
+      if self.uppercase_only:
         text = letter
       else:
-        text = letter.upper() + letter.lower()
+        uletter = letter.decode('utf8')
+        text = (uletter.upper() + uletter.lower()).encode('utf8')
 
       # The text
       item =goocanvas.Text(
@@ -313,7 +362,8 @@ class Gcompris_login:
 
   # Display the user list so the user can click on it's name
   #
-  # param users is the list of users to display
+  # param users is the list of users to display, their login starting
+  #       with start_filter
   #
   def display_user_list(self, users, start_filter):
 
@@ -324,13 +374,7 @@ class Gcompris_login:
     step_y = 90
 
     for user in users:
-      if eval(self.config_dict['uppercase_only']):
-        login = user.login.decode('utf8').upper().encode('utf8')
-      else:
-        login = user.login
-
-      if not login.startswith(start_filter):
-        continue
+      login = self.trie.login_of(user)
 
       # The text
       item = goocanvas.Text(
@@ -438,25 +482,18 @@ class Gcompris_login:
     self.entry.grab_focus()
 
   def enter_char_callback(self, widget):
-    if eval(self.config_dict['uppercase_only']):
+    if self.uppercase_only:
       text = widget.get_text()
       widget.set_text(text.decode('utf8').upper().encode('utf8'))
 
   def enter_callback(self, widget):
     text = widget.get_text()
 
-    found = False
-    for user in self.users:
-      if eval(self.config_dict['uppercase_only']):
-        login = user.login.decode('utf8').upper().encode('utf8')
-      else:
-        login = user.login
-      if text == login:
-        self.widget.remove()
-        self.logon(user)
-        found = True
-
-    if not found:
+    user = self.trie.get(text)
+    if user:
+      self.widget.remove()
+      self.logon(user)
+    else:
       widget.set_text('')
 
   def config_start(self, profile):
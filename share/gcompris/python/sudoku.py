@@ -28,6 +28,8 @@ import random
 import pango
 from gcompris import gcompris_gettext as _
 
+import sudoku_model
+
 class Gcompris_sudoku:
   """Sudoku game"""
 
@@ -64,9 +66,19 @@ class Gcompris_sudoku:
 
     self.root_sudo = None
 
-    self.sudoku = None          # The current sudoku data
+    self.sudoku = None          # The sudoku_model.PuzzleStore of all the levels
     self.sudo_size = 0          # the size of the current sudoku
-    self.sudo_region = None     # the modulo region in the current sudoku
+
+    # It's hard coded that sudoku of size x have y region.
+    # If not defined there, it means no region
+    #
+    # Sudoku size : Number of region
+    #
+    self.sudo_region = {
+      9: 3,
+      4: 2
+      }
+    self.grid = None            # The sudoku_model.Grid of the current sudoku
 
     self.timer = 0              # The timer that highlights errors
 
@@ -86,11 +98,13 @@ class Gcompris_sudoku:
 
   def start(self):
 
-    # Init the sudoku dataset
-    self.sudoku = self.init_item_list()
+    # Init the sudoku dataset, the sudokus are read from it only when
+    # they are displayed
+    self.sudoku = sudoku_model.PuzzleStore(gcompris.DATA_DIR +
+                                           '/sudoku/sudoku.dat')
 
     self.gcomprisBoard.level=1
-    self.gcomprisBoard.maxlevel=len(self.sudoku)
+    self.gcomprisBoard.maxlevel=self.sudoku.levels()
     self.gcomprisBoard.sublevel=1
 
     gcompris.bar_set(gcompris.BAR_LEVEL|gcompris.BAR_REPEAT)
@@ -120,7 +134,8 @@ class Gcompris_sudoku:
 
 
   def repeat(self):
-    self.display_sudoku(self.sudoku[self.gcomprisBoard.level-1][self.gcomprisBoard.sublevel-1])
+    self.display_sudoku(self.sudoku.get(self.gcomprisBoard.level-1,
+                                        self.gcomprisBoard.sublevel-1))
 
   def config(self):
     print("Gcompris_sudoku config.")
@@ -139,6 +154,7 @@ class Gcompris_sudoku:
       if self.is_legal(strn):
         self.sudo_number[self.cursqre[0]][self.cursqre[1]].props.text = \
             strn.encode('UTF-8')
+        self.grid.set(self.cursqre[0], self.cursqre[1], strn)
 
         # Maybe it's all done
         if self.is_solved():
@@ -152,6 +168,7 @@ class Gcompris_sudoku:
           (keyval == gtk.keysyms.Delete) or
           (keyval == gtk.keysyms.space)):
         self.sudo_number[self.cursqre[0]][self.cursqre[1]].props.text = ""
+        self.grid.clear(self.cursqre[0], self.cursqre[1])
 
       else:
         # No key processing done
@@ -199,10 +216,11 @@ class Gcompris_sudoku:
         self.symbols[j] = self.symbols[new_pos]
         self.symbols[new_pos] = old_symbol
 
-    self.display_sudoku(self.sudoku[self.gcomprisBoard.level-1][self.gcomprisBoard.sublevel-1])
+    self.display_sudoku(self.sudoku.get(self.gcomprisBoard.level-1,
+                                        self.gcomprisBoard.sublevel-1))
 
     gcompris.score.start(gcompris.score.STYLE_NOTE, 610, 485,
-                         len(self.sudoku[self.gcomprisBoard.level-1]))
+                         self.sudoku.count(self.gcomprisBoard.level-1))
     gcompris.score.set(self.gcomprisBoard.sublevel)
 
     return True
@@ -213,7 +231,16 @@ class Gcompris_sudoku:
   def increment_level(self):
     self.gcomprisBoard.sublevel += 1
 
-    if(self.gcomprisBoard.sublevel > len(self.sudoku[self.gcomprisBoard.level-1])):
+    level = self.gcomprisBoard.level-1
+    count = self.sudoku.count(level)
+    if(self.gcomprisBoard.sublevel > count and
+       self.gcomprisBoard.level == self.gcomprisBoard.maxlevel):
+      # All our sudokus are done, continue with new ones as hard as
+      # the last one
+      self.sudoku.add(level,
+                      self.generate_sudoku(self.sudoku.get(level, count - 1)))
+
+    if(self.gcomprisBoard.sublevel > self.sudoku.count(level)):
       # Try the next level
       self.gcomprisBoard.sublevel=1
       self.gcomprisBoard.level += 1
@@ -225,6 +252,21 @@ class Gcompris_sudoku:
 
     return True
 
+  # Return a new sudoku of the same size and with as many empty squares
+  # as the given one
+  def generate_sudoku(self, sudoku):
+    size = len(sudoku)
+    holes = 0
+    for row in sudoku:
+      holes += row.count('.')
+
+    symbols = None
+    if len(self.valid_chars) == size:
+      symbols = sorted(self.valid_chars)
+
+    return sudoku_model.generate(size, self.sudo_region.get(size), holes,
+                                 symbols)
+
   #
   # Set a symbol in the sudoku
   #
@@ -235,6 +277,7 @@ class Gcompris_sudoku:
     self.sudo_symbol[x][y].props.visibility = goocanvas.ITEM_VISIBLE
 
     self.sudo_number[x][y].props.text = text
+    self.grid.set(x, y, text)
 
   #
   # Event on a placed symbol. Means that we remove it
@@ -247,6 +290,7 @@ class Gcompris_sudoku:
     if event.type == gtk.gdk.BUTTON_PRESS:
       item.props.visibility = goocanvas.ITEM_INVISIBLE
       self.sudo_number[data[0]][data[1]].props.text = ""
+      self.grid.clear(data[0], data[1])
 
   #
   # This function is being called uppon a click on a symbol on the left
@@ -337,75 +381,24 @@ class Gcompris_sudoku:
     self.timer = gobject.timeout_add(3000, self.unset_on_error, items)
 
   # Return True or False if the given number is possible
+  # The check is done on the model, the canvas is only used to
+  # highlight the squares that prevent it.
   #
   def is_legal(self, number):
 
-    if((self.cursqre[0] == None) or
-       (self.cursqre[1] == None)):
-      return
-
-    possible = True
-    bad_square = []
-
     if(self.cursqre == None):
-      return possible
-
-    # Check this number is not already in a row
-    for x in range(0, self.sudo_size):
-
-      if x == self.cursqre[0]:
-         continue
-
-      item = self.sudo_number[x][self.cursqre[1]]
-      othernumber = item.get_property('text').decode('UTF-8')
-
-      if(number == othernumber):
-        bad_square.append(self.sudo_square[x][self.cursqre[1]])
-        possible = False
-
-    # Check this number is not already in a column
-    for y in range(0, self.sudo_size):
-
-      if y == self.cursqre[1]:
-        continue
-
-      item = self.sudo_number[self.cursqre[0]][y]
-      othernumber = item.get_property('text').decode('UTF-8')
-
-      if(number == othernumber):
-        bad_square.append(self.sudo_square[self.cursqre[0]][y])
-        possible = False
-
-    #
-    # Check this number is in a region
-    #
-
-    # Region is the modulo place to set region if defined
-    region = None
-    if(self.sudo_region.has_key(self.sudo_size)):
-      region=self.sudo_region[self.sudo_size]
-
-    if(region):
-      # First, find the top-left square of the region
-      top_left=[self.cursqre[0]/region*region, self.cursqre[1]/region*region]
-      for x in range(0,region):
-        for y in range(0,region):
-          # Do not check the current square
-          if (top_left[0] + x == self.cursqre[0] and
-          top_left[1] + y == self.cursqre[1]):
-            continue
-
-          item = self.sudo_number[top_left[0] + x][top_left[1] + y]
-          othernumber = item.get_property('text').decode('UTF-8')
+      return True
 
-          if(number == othernumber):
-            bad_square.append(self.sudo_square[top_left[0] + x][top_left[1] + y])
-            possible = False
+    (x, y) = self.cursqre
+    if self.grid.is_legal(x, y, number):
+      return True
 
-    if not possible:
-      self.set_on_error(bad_square)
+    bad_square = []
+    for (i, j) in self.grid.conflicts(x, y, number):
+      bad_square.append(self.sudo_square[i][j])
+    self.set_on_error(bad_square)
 
-    return possible
+    return False
 
   # Return True or False if the given sudoku is solved
   # We don't really check it's solved, only that all squares
@@ -413,15 +406,7 @@ class Gcompris_sudoku:
   # be entered up front.
   #
   def is_solved(self):
-
-    for x in range(0,self.sudo_size):
-      for y in range(0,self.sudo_size):
-        item = self.sudo_number[x][y]
-        number = item.get_property('text').decode('UTF-8')
-        if(number == ""):
-          return False
-
-    return True
+    return self.grid.is_full()
 
   #
   # Display valid number (or chars)
@@ -637,1051 +622,7 @@ class Gcompris_sudoku:
     if(self.gcomprisBoard.level >= self.symbolize_level_max):
       self.valid_chars.sort()
 
-    self.display_valid_chars(self.sudo_size, self.valid_chars)
-
-  # return the list of items (data) for this game
-  def init_item_list(self):
-
-    # It's hard coded that sudoku of size x have y region.
-    # If not defined there, it means no region
-    #
-    # Sudoku size : Number of region
-    #
-    self.sudo_region = {
-      9: 3,
-      4: 2
-      }
-
-    # It's a list of level which is a list of sudoku data
-    sudoku_list = \
-      [
-       [ # Level 1
-        [
-         ['.','C','B'],
-         ['.','B','A'],
-         ['.','A','C']
-        ],
-        [
-         ['C','A','B'],
-         ['.','.','.'],
-         ['B','C','A']
-        ],
-        [
-         ['C','A','B'],
-         ['A','B','C'],
-         ['.','.','.']
-        ],
-        [
-         ['A','.','C'],
-         ['C','.','B'],
-         ['B','.','A']
-        ],
-        [
-         ['A','.','C'],
-         ['B','C','.'],
-         ['.','A','B']
-        ],
-        [
-         ['A','B','C'],
-         ['B','.','A'],
-         ['.','A','.']
-        ],
-        [
-         ['.','B','A'],
-         ['B','.','C'],
-         ['A','C','.']
-        ],        [
-         ['A','B','C'],
-         ['.','C','A'],
-         ['.','A','.']
-        ],
-      ],
-       [ # Level 2
-        [
-         ['A','.','.'],
-         ['D','.','.'],
-         ['C','A','.'],
-        ],
-        [
-         ['C','.','D'],
-         ['.','.','B'],
-         ['.','D','C'],
-        ],
-        [
-         ['.','B','D'],
-         ['D','.','.'],
-         ['B','.','C'],
-        ],
-        [
-         ['A','.','.'],
-         ['.','D','A'],
-         ['D','.','C'],
-        ],
-        [
-         ['C','.','D'],
-         ['.','C','.'],
-         ['B','.','C'],
-        ],
-       ],
-       [ # Level 3
-        [
-         ['.','A','.'],
-         ['A','C','.'],
-         ['.','B','.'],
-        ],
-        [
-         ['B','A','.'],
-         ['A','C','.'],
-         ['.','.','.'],
-        ],
-        [
-         ['.','A','C'],
-         ['.','.','B'],
-         ['C','.','.'],
-        ],
-        [
-         ['.','.','C'],
-         ['D','.','A'],
-         ['C','.','.'],
-        ],
-        [
-         ['.','.','C'],
-         ['D','.','A'],
-         ['.','A','.'],
-        ],
-       ],
-       [ # Level 4
-        [
-         ['.','B','C','D'],
-         ['D','C','.','A'],
-         ['.','D','A','B'],
-         ['B','A','.','C'],
-        ],
-        [
-         ['A','.','.','D'],
-         ['D','C','B','.'],
-         ['C','D','A','.'],
-         ['.','.','D','C'],
-        ],
-        [
-         ['.','B','.','.'],
-         ['.','C','B','A'],
-         ['C','D','A','.'],
-         ['.','.','D','.'],
-        ],
-
-        [
-         ['.','B','A','.'],
-         ['D','.','B','C'],
-         ['A','C','.','B'],
-         ['.','D','C','.']
-        ],
-        [
-         ['.','.','.','.'],
-         ['D','A','B','C'],
-         ['A','C','D','B'],
-         ['.','.','.','.']
-        ],
-       ],
-       [ # Level 5
-        [
-         ['.','.','.','.'],
-         ['D','A','B','.'],
-         ['C','.','A','B'],
-         ['.','.','.','D']
-        ],
-        [
-         ['A','B','C','D'],
-         ['.','.','.','.'],
-         ['.','.','.','.'],
-         ['B','C','D','A']
-        ],
-        [
-         ['.','.','A','D'],
-         ['D','.','.','C'],
-         ['A','.','.','B'],
-         ['B','D','.','.']
-        ],
-        [
-         ['.','.','A','.'],
-         ['D','A','B','.'],
-         ['.','C','D','B'],
-         ['.','D','.','.']
-        ],
-        [
-         ['C','B','.','D'],
-         ['.','.','.','C'],
-         ['A','.','.','.'],
-         ['B','.','C','A']
-        ],
-       ],
-       [ # Level 6
-        [
-         ['C','.','.','D'],
-         ['.','.','B','.'],
-         ['A','.','.','.'],
-         ['.','.','D','.']
-        ],
-        [
-         ['.','B','.','A'],
-         ['.','.','B','.'],
-         ['C','.','D','.'],
-         ['.','.','.','C']
-        ],
-        [
-         ['A','.','B','.'],
-         ['.','C','.','A'],
-         ['.','.','.','D'],
-         ['D','.','C','.']
-        ],
-        [
-         ['.','A','.','.'],
-         ['C','.','A','B'],
-         ['.','.','C','.'],
-         ['D','.','.','A']
-        ],
-        [
-         ['C','.','.','D'],
-         ['B','.','A','.'],
-         ['.','B','.','A'],
-         ['.','.','.','.']
-        ],
-        [
-         ['.','A','C','.'],
-         ['.','.','.','D'],
-         ['C','.','.','A'],
-         ['.','B','.','.']
-        ],
-        [
-         ['.','C','.','D'],
-         ['B','.','.','.'],
-         ['.','.','.','.'],
-         ['C','A','.','B']
-        ],
-        [
-         ['B','.','.','C'],
-         ['.','A','.','.'],
-         ['.','.','D','.'],
-         ['.','B','.','.']
-        ],
-       ],
-       [ # Level 7
-        [
-         ['A','B','C','D','E'],
-         ['.','A','B','C','D'],
-         ['.','.','A','B','C'],
-         ['.','.','.','A','B'],
-         ['.','.','.','.','A']
-        ],
-        [
-         ['A','B','.','D','.'],
-         ['.','.','D','E','A'],
-         ['C','.','.','A','.'],
-         ['D','E','.','.','C'],
-         ['.','A','B','.','D']
-        ],
-        [
-         ['.','C','.','A','.'],
-         ['A','.','B','.','C'],
-         ['.','B','.','C','.'],
-         ['D','.','C','.','A'],
-         ['.','A','E','.','B']
-        ],
-        [
-         ['C','B','.','.','D'],
-         ['.','.','D','C','.'],
-         ['D','.','B','.','E'],
-         ['.','A','.','D','C'],
-         ['E','.','.','B','.']
-        ],
-        [
-         ['D','.','.','B','E'],
-         ['.','E','A','.','.'],
-         ['A','C','.','.','B'],
-         ['.','.','B','C','.'],
-         ['C','B','.','A','.']
-        ],
-        [
-         ['.','.','C','D','.'],
-         ['B','.','.','.','C'],
-         ['.','C','.','B','D'],
-         ['C','.','D','A','.'],
-         ['D','E','.','.','A']
-        ],
-       ],
-       [ # Level 8
-        [
-         ['1','2','3','4','5'],
-         ['.','1','2','3','4'],
-         ['.','.','1','2','3'],
-         ['.','.','.','1','2'],
-         ['.','.','.','.','1']
-        ],
-        [
-         ['1','2','.','4','.'],
-         ['.','.','4','5','1'],
-         ['3','.','.','1','.'],
-         ['4','5','.','.','3'],
-         ['.','1','2','.','4']
-        ],
-        [
-         ['.','3','.','1','.'],
-         ['1','.','2','.','3'],
-         ['.','2','.','3','.'],
-         ['4','.','3','.','1'],
-         ['.','1','5','.','2']
-        ],
-        [
-         ['3','2','.','.','4'],
-         ['.','.','4','3','.'],
-         ['4','.','2','.','5'],
-         ['.','1','.','4','3'],
-         ['5','.','.','2','.']
-        ],
-        [
-         ['4','.','.','2','5'],
-         ['.','5','1','.','.'],
-         ['1','3','.','.','2'],
-         ['.','.','2','3','.'],
-         ['3','2','.','1','.']
-        ],
-        [
-         ['.','.','3','4','.'],
-         ['2','.','.','.','3'],
-         ['.','3','.','2','4'],
-         ['3','.','4','1','.'],
-         ['4','5','.','.','1']
-        ],
-       ],
-       [ # Level 9
-        [
-         ['3','.','.','.','.','5','6','.','2'],
-         ['.','6','2','7','1','.','.','4','.'],
-         ['1','.','.','9','.','.','.','5','.'],
-         ['8','.','.','.','.','.','2','6','.'],
-         ['.','3','.','.','8','.','.','7','.'],
-         ['.','9','7','.','.','.','.','.','1'],
-         ['.','5','.','.','.','.','.','.','6'],
-         ['.','8','.','.','6','7','4','2','.'],
-         ['6','.','3','1','.','.','.','.','8']
-        ],
-        [
-         ['9','3','1','.','.','7','.','2','8'],
-         ['.','.','.','.','3','6','.','.','.'],
-         ['4','.','6','.','.','2','.','.','.'],
-         ['6','2','.','.','.','.','9','1','.'],
-         ['1','.','.','.','2','.','.','.','4'],
-         ['.','4','8','.','.','.','.','6','5'],
-         ['.','.','.','9','.','.','3','.','2'],
-         ['.','.','.','2','7','.','.','.','.'],
-         ['3','7','.','4','.','.','5','9','1']
-        ],
-        [
-         ['.','.','9','.','6','.','.','.','.'],
-         ['2','.','6','4','.','.','1','.','.'],
-         ['.','.','3','1','8','.','5','.','.'],
-         ['.','.','2','.','.','.','.','.','1'],
-         ['7','9','.','.','.','.','.','6','8'],
-         ['1','.','.','.','.','.','3','.','.'],
-         ['.','.','7','.','9','2','8','.','.'],
-         ['.','.','1','.','.','8','6','.','5'],
-         ['.','.','.','.','3','.','4','.','.']
-         ],
-        [
-         ['.','7','6','.','.','5','.','.','8'],
-         ['.','8','.','.','.','.','.','5','.'],
-         ['.','.','2','.','6','1','4','3','.'],
-         ['8','.','.','.','1','.','.','.','.'],
-         ['.','.','.','6','.','3','.','.','.'],
-         ['.','.','.','.','7','.','.','.','1'],
-         ['.','9','5','4','8','.','3','.','.'],
-         ['.','2','.','.','.','.','.','8','.'],
-         ['7','.','.','9','.','.','1','6','.']
-        ],
-        [
-         ['.','7','6','3','.','.','9','.','.'],
-         ['3','8','.','7','4','.','.','5','.'],
-         ['9','.','2','.','.','.','.','.','.'],
-         ['.','.','9','.','.','.','.','.','.'],
-         ['.','1','.','6','.','3','.','4','.'],
-         ['.','.','.','.','.','.','6','.','.'],
-         ['.','.','.','.','.','.','3','.','2'],
-         ['.','2','.','.','3','7','.','8','9'],
-         ['.','.','8','.','.','2','1','6','.']
-        ],
-        [
-         ['.','7','6','.','.','5','.','1','.'],
-         ['.','8','.','.','4','.','.','.','6'],
-         ['9','.','2','.','.','.','4','.','.'],
-         ['.','.','.','5','.','.','.','2','.'],
-         ['.','1','7','.','.','.','8','4','.'],
-         ['.','4','.','.','.','8','.','.','.'],
-         ['.','.','5','.','.','.','3','.','2'],
-         ['6','.','.','.','3','.','.','8','.'],
-         ['.','3','.','9','.','.','1','6','.']
-        ],
-        [
-         ['.','7','.','.','2','5','.','1','8'],
-         ['3','.','.','.','.','9','2','.','.'],
-         ['.','.','.','.','6','.','4','3','.'],
-         ['.','.','.','.','.','4','7','2','.'],
-         ['.','.','.','.','.','.','.','.','.'],
-         ['.','4','3','2','.','.','.','.','.'],
-         ['.','9','5','.','8','.','.','.','.'],
-         ['.','.','4','1','.','.','.','.','9'],
-         ['7','3','.','9','5','.','.','6','.']
-        ],
-        [
-         ['.','.','.','3','.','5','9','.','.'],
-         ['3','8','.','.','.','.','2','.','6'],
-         ['9','5','.','.','6','.','.','.','.'],
-         ['.','.','9','.','1','4','.','.','3'],
-         ['.','.','.','.','.','.','.','.','.'],
-         ['5','.','.','2','7','.','6','.','.'],
-         ['.','.','.','.','8','.','.','7','2'],
-         ['6','.','4','.','.','.','.','8','9'],
-         ['.','.','8','9','.','2','.','.','.']
-        ],
-        [
-         ['.','.','6','.','2','5','.','.','8'],
-         ['.','8','.','.','.','9','.','.','6'],
-         ['9','.','.','.','.','.','4','.','.'],
-         ['.','6','.','.','1','.','.','2','3'],
-         ['.','.','.','6','.','3','.','.','.'],
-         ['5','4','.','.','7','.','.','9','.'],
-         ['.','.','5','.','.','.','.','.','2'],
-         ['6','.','.','1','.','.','.','8','.'],
-         ['7','.','.','9','5','.','1','.','.']
-        ],
-        [
-         ['.','.','6','.','.','5','9','1','8'],
-         ['.','.','.','7','4','.','.','5','.'],
-         ['9','.','.','.','6','.','.','3','.'],
-         ['.','.','.','5','.','.','7','.','.'],
-         ['2','.','.','.','.','.','.','.','5'],
-         ['.','.','3','.','.','8','.','.','.'],
-         ['.','9','.','.','8','.','.','.','2'],
-         ['.','2','.','.','3','7','.','.','.'],
-         ['7','3','8','9','.','.','1','.','.']
-        ],
-        [
-         ['.','.','.','5','.','4','.','.','.'],
-         ['2','3','4','8','.','.','.','1','.'],
-         ['.','.','.','.','1','3','8','.','2'],
-         ['.','5','.','4','7','2','.','.','1'],
-         ['.','7','.','.','.','.','.','6','.'],
-         ['4','.','.','6','9','5','.','2','.'],
-         ['7','.','1','3','5','.','.','.','.'],
-         ['.','9','.','.','.','1','4','5','7'],
-         ['.','.','.','7','.','9','.','.','.']
-        ],
-        [
-         ['.','.','.','.','.','.','6','.','.'],
-         ['2','.','.','8','6','.','9','.','5'],
-         ['5','.','7','.','1','3','8','.','2'],
-         ['6','.','8','.','7','.','.','.','1'],
-         ['.','7','.','.','3','.','.','6','.'],
-         ['4','.','.','.','9','.','7','.','8'],
-         ['7','.','1','3','5','.','2','.','9'],
-         ['3','.','6','.','8','1','.','.','7'],
-         ['.','.','5','.','.','.','.','.','.']
-        ],
-        [
-         ['.','8','9','5','.','4','.','7','3'],
-         ['2','.','.','.','6','7','.','.','5'],
-         ['.','.','.','9','.','.','.','4','2'],
-         ['6','5','.','.','.','.','.','.','.'],
-         ['.','7','2','1','3','8','5','6','.'],
-         ['.','.','.','.','.','.','.','2','8'],
-         ['7','4','.','.','.','6','.','.','.'],
-         ['3','.','.','2','8','.','.','.','7'],
-         ['8','2','.','7','.','9','1','3','.']
-        ],
-        [
-         ['.','8','9','.','2','4','.','.','3'],
-         ['.','.','.','.','.','.','.','1','.'],
-         ['5','.','.','.','1','3','8','.','2'],
-         ['6','.','.','4','.','2','.','.','.'],
-         ['.','7','2','1','.','8','5','6','.'],
-         ['.','.','.','6','.','5','.','.','8'],
-         ['7','.','1','3','5','.','.','.','9'],
-         ['.','9','.','.','.','.','.','.','.'],
-         ['8','.','.','7','4','.','1','3','.']
-        ],
-        [
-         ['.','.','.','.','.','.','.','9','8'],
-         ['.','.','.','.','.','4','1','.','.'],
-         ['8','4','3','6','.','.','2','.','.'],
-         ['9','.','5','.','.','3','.','.','.'],
-         ['3','2','.','.','.','.','.','8','7'],
-         ['.','.','.','9','.','.','3','.','1'],
-         ['.','.','2','.','.','5','7','3','6'],
-         ['.','.','7','1','.','.','.','.','.'],
-         ['5','9','.','.','.','.','.','.','.']
-        ],
-        [
-         ['2','.','.','3','5','7','.','.','.'],
-         ['7','.','9','2','.','.','.','6','.'],
-         ['.','.','.','.','.','.','.','.','.'],
-         ['9','.','.','.','.','.','.','2','4'],
-         ['.','.','6','5','4','1','9','.','.'],
-         ['4','7','.','.','.','.','.','.','1'],
-         ['.','.','.','.','.','.','.','.','.'],
-         ['.','3','.','.','.','8','5','.','9'],
-         ['.','.','.','7','3','6','.','.','2']
-        ],
-        [
-         ['.','.','1','.','5','7','4','.','.'],
-         ['.','.','9','2','.','.','.','.','.'],
-         ['8','4','.','6','.','.','.','7','.'],
-         ['.','.','5','.','.','3','.','2','.'],
-         ['3','.','.','.','.','.','.','.','7'],
-         ['.','7','.','9','.','.','3','.','.'],
-         ['.','8','.','.','.','5','.','3','6'],
-         ['.','.','.','.','.','8','5','.','.'],
-         ['.','.','4','7','3','.','8','.','.']
-        ],
-        [
-         ['2','6','.','3','.','.','.','9','.'],
-         ['7','.','.','2','.','4','.','6','.'],
-         ['.','.','.','.','.','9','.','.','.'],
-         ['9','.','5','.','7','.','6','.','4'],
-         ['.','.','.','.','.','.','.','.','.'],
-         ['4','.','8','.','6','.','3','.','1'],
-         ['.','.','.','4','.','.','.','.','.'],
-         ['.','3','.','1','.','8','.','.','9'],
-         ['.','9','.','.','.','6','.','1','2']
-        ],
-        [
-         ['4','9','.','.','.','.','.','1','.'],
-         ['.','8','.','.','.','2','5','.','.'],
-         ['1','.','5','.','.','.','6','.','.'],
-         ['7','.','.','6','4','.','.','.','.'],
-         ['5','.','.','7','.','3','.','.','8'],
-         ['.','.','.','.','2','1','.','.','4'],
-         ['.','.','8','.','.','.','3','.','1'],
-         ['.','.','1','9','.','.','.','7','.'],
-         ['.','7','.','.','.','.','.','2','5']
-        ],
-        [
-         ['9','6','.','4','1','7','.','2','3'],
-         ['.','.','8','.','9','5','6','.','1'],
-         ['.','.','.','6','.','.','.','.','9'],
-         ['.','.','.','.','2','.','9','.','.'],
-         ['4','7','.','.','5','.','.','8','6'],
-         ['.','.','6','.','4','.','.','.','.'],
-         ['8','.','.','.','.','3','.','.','.'],
-         ['6','.','3','1','7','.','5','.','.'],
-         ['1','9','.','5','8','4','.','6','2']
-        ],
-        [
-         ['.','.','.','4','.','7','8','.','.'],
-         ['7','3','.','.','.','5','6','.','.'],
-         ['.','1','4','.','3','.','7','.','.'],
-         ['5','8','.','.','.','6','.','.','.'],
-         ['4','.','.','3','.','1','.','.','6'],
-         ['.','.','.','8','.','.','.','7','5'],
-         ['.','.','2','.','6','.','4','1','.'],
-         ['.','.','3','1','.','.','.','9','8'],
-         ['.','.','7','5','.','4','.','.','.']
-        ],
-        [
-         ['9','.','5','.','.','7','8','2','.'],
-         ['7','.','.','2','.','.','.','4','.'],
-         ['.','1','.','6','3','.','.','.','9'],
-         ['.','.','1','7','2','.','9','.','.'],
-         ['.','.','.','3','.','1','.','.','.'],
-         ['.','.','6','.','4','9','1','.','.'],
-         ['8','.','.','.','6','3','.','1','.'],
-         ['.','4','.','.','.','2','.','.','8'],
-         ['.','9','7','5','.','.','3','.','2']
-        ],
-        [
-         ['9','6','.','4','1','7','8','.','3'],
-         ['.','.','8','2','9','5','.','.','.'],
-         ['2','.','.','6','3','.','.','.','9'],
-         ['.','.','.','7','.','.','.','3','4'],
-         ['4','.','.','.','5','.','.','.','6'],
-         ['3','2','.','.','.','9','.','.','.'],
-         ['8','.','.','.','6','3','.','.','7'],
-         ['.','.','.','1','7','2','5','.','.'],
-         ['1','.','7','5','8','4','.','6','2']
-        ],
-        [
-         ['.','.','1','.','.','4','7','.','3'],
-         ['7','.','.','.','6','.','.','5','.'],
-         ['.','.','2','7','.','8','.','.','6'],
-         ['.','9','.','.','4','.','.','.','.'],
-         ['.','.','.','3','.','9','.','.','.'],
-         ['.','.','.','.','5','.','.','2','.'],
-         ['6','.','.','9','.','7','4','.','.'],
-         ['.','7','.','.','8','.','.','.','1'],
-         ['4','.','8','6','.','.','3','.','.']
-        ],
-        [
-         ['.','.','1','.','.','.','.','9','.'],
-         ['7','.','.','1','.','3','.','5','.'],
-         ['.','.','.','.','9','8','1','.','6'],
-         ['.','9','.','.','4','.','.','.','.'],
-         ['.','8','4','.','.','.','6','1','.'],
-         ['.','.','.','.','5','.','.','2','.'],
-         ['6','.','5','9','3','.','.','.','.'],
-         ['.','7','.','4','.','2','.','.','1'],
-         ['.','2','.','.','.','.','3','.','.']
-        ],
-        [
-         ['8','.','.','.','2','4','.','.','.'],
-         ['7','.','9','1','.','.','.','.','.'],
-         ['.','5','.','.','9','.','.','4','.'],
-         ['.','.','6','.','.','.','8','3','.'],
-         ['2','.','4','.','.','.','6','.','5'],
-         ['.','3','7','.','.','.','9','.','.'],
-         ['.','1','.','.','3','.','.','8','.'],
-         ['.','.','.','.','.','2','5','.','1'],
-         ['.','.','.','6','1','.','.','.','9']
-        ],
-        [
-         ['.','.','1','.','2','.','.','.','.'],
-         ['.','.','9','.','6','3','.','.','.'],
-         ['3','.','.','.','.','8','1','4','.'],
-         ['.','9','.','.','.','.','8','3','.'],
-         ['.','.','4','.','7','.','6','.','.'],
-         ['.','3','7','.','.','.','.','2','.'],
-         ['.','1','5','9','.','.','.','.','2'],
-         ['.','.','.','4','8','.','5','.','.'],
-         ['.','.','.','.','1','.','3','.','.']
-        ],
-        [
-         ['.','6','.','5','.','4','7','.','3'],
-         ['.','.','9','.','.','.','.','5','.'],
-         ['3','.','2','.','9','.','.','.','.'],
-         ['5','.','6','.','.','.','8','.','.'],
-         ['.','8','.','.','.','.','.','1','.'],
-         ['.','.','7','.','.','.','9','.','4'],
-         ['.','.','.','.','3','.','4','.','2'],
-         ['.','7','.','.','.','.','5','.','.'],
-         ['4','.','8','6','.','5','.','7','.']
-        ],
-        [
-         ['.','.','.','.','2','.','.','9','.'],
-         ['.','.','.','.','6','3','.','.','8'],
-         ['3','.','.','.','.','8','1','4','.'],
-         ['.','.','.','.','4','.','8','.','7'],
-         ['.','8','4','.','.','.','6','1','.'],
-         ['1','.','7','.','5','.','.','.','.'],
-         ['.','1','5','9','.','.','.','.','2'],
-         ['9','.','.','4','8','.','.','.','.'],
-         ['.','2','.','.','1','.','.','.','.']
-        ],
-        [
-         ['8','.','1','.','.','4','.','.','.'],
-         ['.','.','.','.','6','.','.','5','.'],
-         ['3','.','2','7','.','.','.','.','6'],
-         ['.','9','.','.','4','.','.','.','7'],
-         ['2','.','.','3','.','9','.','.','5'],
-         ['1','.','.','.','5','.','.','2','.'],
-         ['6','.','.','.','.','7','4','.','2'],
-         ['.','7','.','.','8','.','.','.','.'],
-         ['.','.','.','6','.','.','3','.','9']
-        ],
-        [
-         ['.','.','.','.','2','.','9','4','3'],
-         ['5','3','.','9','.','.','.','8','.'],
-         ['.','.','.','.','.','1','6','.','7'],
-         ['.','.','.','3','.','.','8','.','4'],
-         ['.','.','.','2','7','9','.','.','.'],
-         ['9','.','3','.','.','5','.','.','.'],
-         ['7','.','9','6','.','.','.','.','.'],
-         ['.','6','.','.','.','4','.','7','5'],
-         ['1','4','5','.','8','.','.','.','.']
-        ],
-        [
-         ['.','7','1','5','.','.','9','4','.'],
-         ['5','.','.','9','6','.','.','8','2'],
-         ['.','9','.','.','.','.','.','.','.'],
-         ['2','5','.','3','.','.','8','9','.'],
-         ['.','.','.','2','7','9','.','.','.'],
-         ['.','1','3','.','.','5','.','2','6'],
-         ['.','.','.','.','.','.','.','1','.'],
-         ['3','6','.','.','9','4','.','.','5'],
-         ['.','4','5','.','.','2','3','6','.']
-        ],
-        [
-         ['6','7','1','5','2','.','.','.','.'],
-         ['5','.','.','9','6','7','.','.','2'],
-         ['.','.','.','.','.','.','6','.','.'],
-         ['.','.','7','3','.','6','8','9','.'],
-         ['4','.','6','2','.','9','5','.','1'],
-         ['.','1','3','8','.','5','7','.','.'],
-         ['.','.','9','.','.','.','.','.','.'],
-         ['3','.','.','1','9','4','.','.','5'],
-         ['.','.','.','.','8','2','3','6','9']
-        ],
-        [
-         ['.','7','.','5','2','.','.','4','3'],
-         ['5','.','.','.','.','7','1','8','2'],
-         ['.','9','.','.','.','1','6','.','.'],
-         ['.','5','.','3','1','6','8','9','.'],
-         ['.','.','.','.','.','.','.','.','.'],
-         ['.','1','3','8','4','5','.','2','.'],
-         ['.','.','9','6','.','.','.','1','.'],
-         ['3','6','8','1','.','.','.','.','5'],
-         ['1','4','.','.','8','2','.','6','.']
-        ],
-        [
-         ['.','.','.','1','6','.','.','2','7'],
-         ['.','.','7','.','8','9','.','6','.'],
-         ['1','.','6','.','5','.','.','8','9'],
-         ['.','.','.','5','.','.','2','3','8'],
-         ['.','.','.','8','2','3','.','.','.'],
-         ['8','2','3','.','.','1','.','.','.'],
-         ['5','1','.','.','3','.','9','.','2'],
-         ['.','8','.','7','1','.','4','.','.'],
-         ['6','7','.','.','9','5','.','.','.']
-        ],
-        [
-         ['.','.','8','1','.','.','.','2','7'],
-         ['.','.','7','.','8','9','.','.','.'],
-         ['.','.','6','2','.','.','3','8','.'],
-         ['7','.','1','5','.','6','.','3','8'],
-         ['.','.','.','.','.','.','.','.','.'],
-         ['8','2','.','9','.','1','6','.','5'],
-         ['.','1','4','.','.','8','9','.','.'],
-         ['.','.','.','7','1','.','4','.','.'],
-         ['6','7','.','.','.','5','8','.','.']
-        ],
-        [
-         ['.','3','.','.','.','4','.','2','.'],
-         ['2','.','.','.','8','9','1','.','4'],
-         ['1','.','.','2','.','.','3','8','.'],
-         ['7','.','1','.','.','6','.','.','8'],
-         ['.','6','.','.','.','.','.','9','.'],
-         ['8','.','.','9','.','.','6','.','5'],
-         ['.','1','4','.','.','8','.','.','2'],
-         ['3','.','9','7','1','.','.','.','6'],
-         ['.','7','.','4','.','.','.','1','.']
-        ],
-        [
-         ['9','.','8','.','.','.','5','2','.'],
-         ['.','.','7','3','.','.','.','6','.'],
-         ['.','4','.','.','.','.','.','8','9'],
-         ['7','.','.','5','.','6','2','3','.'],
-         ['.','.','5','.','2','.','7','.','.'],
-         ['.','2','3','9','.','1','.','.','5'],
-         ['5','1','.','.','.','.','.','7','.'],
-         ['.','8','.','.','.','2','4','.','.'],
-         ['.','7','2','.','.','.','8','.','3']
-        ],
-        [
-         ['8','.','.','2','4','.','.','.','.'],
-         ['7','.','.','.','1','3','.','8','2'],
-         ['6','5','.','.','8','9','1','.','4'],
-         ['.','.','.','.','.','7','2','1','6'],
-         ['.','1','7','.','3','.','4','5','.'],
-         ['5','9','6','1','.','.','.','.','.'],
-         ['3','.','5','8','9','.','.','4','1'],
-         ['1','7','.','3','6','.','.','.','8'],
-         ['.','.','.','.','7','1','.','.','5']
-        ],
-        [
-         ['8','.','.','2','.','6','.','.','.'],
-         ['.','.','9','.','1','3','.','.','2'],
-         ['6','.','2','7','8','.','.','3','.'],
-         ['.','.','3','.','.','.','.','1','6'],
-         ['.','.','7','6','.','8','4','.','.'],
-         ['5','9','.','.','.','.','8','.','.'],
-         ['.','6','.','.','9','2','7','.','1'],
-         ['1','.','.','3','6','.','9','.','.'],
-         ['.','.','.','4','.','1','.','.','5']
-        ],
-        [
-         ['8','3','.','2','.','.','.','9','.'],
-         ['.','4','.','.','.','3','.','8','.'],
-         ['.','.','.','.','8','9','1','.','4'],
-         ['.','8','.','9','.','.','2','.','.'],
-         ['2','.','.','6','.','8','.','.','9'],
-         ['.','.','6','.','.','4','.','7','.'],
-         ['3','.','5','8','9','.','.','.','.'],
-         ['.','7','.','3','.','.','.','2','.'],
-         ['.','2','.','.','.','1','.','6','5']
-        ],
-        [
-         ['.','3','1','2','4','.','.','.','.'],
-         ['.','.','9','5','1','.','6','8','.'],
-         ['6','.','.','.','.','.','.','3','.'],
-         ['.','8','.','9','.','7','2','.','.'],
-         ['2','.','7','.','.','.','4','.','9'],
-         ['.','.','6','1','.','4','.','7','.'],
-         ['.','6','.','.','.','.','.','.','1'],
-         ['.','7','4','.','6','5','9','.','.'],
-         ['.','.','.','.','7','1','3','6','.']
-        ],
-        [
-         ['.','.','7','.','.','.','.','5','.'],
-         ['1','.','4','.','.','3','7','.','6'],
-         ['.','6','5','7','4','2','9','.','3'],
-         ['2','.','.','4','.','5','6','3','9'],
-         ['.','.','.','3','.','7','.','.','.'],
-         ['4','8','3','9','.','6','.','.','5'],
-         ['9','.','8','2','5','4','1','6','.'],
-         ['5','.','2','6','.','.','3','.','8'],
-         ['.','1','.','.','.','.','5','.','.']
-        ],
-        [
-         ['.','.','7','.','.','.','.','.','2'],
-         ['.','2','.','.','.','3','.','8','6'],
-         ['.','6','5','7','4','.','9','.','3'],
-         ['.','.','.','4','.','.','6','.','.'],
-         ['.','5','9','.','.','.','8','4','.'],
-         ['.','.','3','.','.','6','.','.','.'],
-         ['9','.','8','.','5','4','1','6','.'],
-         ['5','4','.','6','.','.','.','9','.'],
-         ['7','.','.','.','.','.','5','.','.']
-        ],
-        [
-         ['.','.','7','1','.','8','4','5','2'],
-         ['1','.','4','.','.','3','.','.','6'],
-         ['.','.','5','.','.','2','9','.','3'],
-         ['.','.','.','.','.','5','.','3','.'],
-         ['.','.','9','3','.','7','8','.','.'],
-         ['.','8','.','9','.','.','.','.','.'],
-         ['9','.','8','2','.','.','1','.','.'],
-         ['5','.','.','6','.','.','3','.','8'],
-         ['7','1','6','8','.','9','5','.','.']
-        ],
-        [
-         ['3','.','7','.','.','.','.','5','.'],
-         ['.','2','.','5','9','.','.','.','.'],
-         ['8','6','.','.','.','2','.','1','.'],
-         ['2','.','.','.','8','5','.','.','9'],
-         ['.','5','.','.','2','.','.','4','.'],
-         ['4','.','.','9','1','.','.','.','5'],
-         ['.','3','.','2','.','.','.','6','7'],
-         ['.','.','.','.','7','1','.','9','.'],
-         ['.','1','.','.','.','.','5','.','4']
-        ],
-        [
-         ['6','8','.','2','.','7','.','3','.'],
-         ['.','2','9','.','.','6','8','7','.'],
-         ['5','.','.','.','8','4','.','.','.'],
-         ['3','.','5','.','.','.','.','8','.'],
-         ['.','.','.','7','.','8','.','.','.'],
-         ['.','7','.','.','.','.','4','.','3'],
-         ['.','.','.','8','4','.','.','.','7'],
-         ['.','5','8','1','.','.','9','4','.'],
-         ['.','6','.','5','.','9','.','1','8']
-        ],
-        [
-         ['6','.','4','2','1','7','.','.','.'],
-         ['.','2','.','.','.','6','.','.','.'],
-         ['5','3','7','9','.','.','2','.','1'],
-         ['3','.','.','.','.','.','7','8','6'],
-         ['.','4','6','.','.','.','1','9','.'],
-         ['8','7','1','.','.','.','.','.','3'],
-         ['9','.','3','.','.','2','6','5','7'],
-         ['.','.','.','1','.','.','.','4','.'],
-         ['.','.','.','5','7','9','3','.','8']
-        ],
-        [
-         ['6','8','.','.','1','.','.','3','.'],
-         ['1','.','.','3','.','6','.','7','4'],
-         ['.','.','7','9','.','4','2','.','1'],
-         ['3','.','5','4','.','.','.','.','6'],
-         ['.','.','.','.','.','.','.','.','.'],
-         ['8','.','.','.','.','5','4','.','3'],
-         ['9','.','3','8','.','2','6','.','.'],
-         ['7','5','.','1','.','3','.','.','2'],
-         ['.','6','.','.','7','.','.','1','8']
-        ],
-        [
-         ['6','.','4','.','.','.','5','.','9'],
-         ['1','.','.','.','.','.','8','7','.'],
-         ['5','3','.','9','8','.','.','.','1'],
-         ['.','.','5','.','.','1','.','8','.'],
-         ['.','4','.','7','3','8','.','9','.'],
-         ['.','7','.','6','.','.','4','.','.'],
-         ['9','.','.','.','4','2','.','5','7'],
-         ['.','5','8','.','.','.','.','.','2'],
-         ['4','.','2','.','.','.','3','.','8']
-        ],
-        [
-         ['.','.','.','.','5','6','1','.','.'],
-         ['.','.','.','8','1','.','.','6','4'],
-         ['6','4','.','7','9','.','.','5','.'],
-         ['9','.','7','.','8','.','5','4','.'],
-         ['4','.','.','.','.','.','.','.','8'],
-         ['.','5','6','.','2','.','7','.','3'],
-         ['.','6','.','.','3','7','.','8','5'],
-         ['3','9','.','.','4','8','.','.','.'],
-         ['.','.','2','5','6','.','.','.','.']
-        ],
-        [
-         ['.','.','.','.','.','.','1','.','9'],
-         ['5','.','9','.','.','2','.','6','.'],
-         ['6','.','.','7','9','.','8','5','.'],
-         ['9','.','7','3','8','.','5','.','6'],
-         ['.','.','.','6','.','5','.','.','.'],
-         ['8','.','6','.','2','4','7','.','3'],
-         ['.','6','4','.','3','7','.','.','5'],
-         ['.','9','.','1','.','.','6','.','7'],
-         ['7','.','2','.','.','.','.','.','.']
-        ],
-        [
-         ['2','.','8','4','.','.','.','.','9'],
-         ['5','.','9','8','1','2','.','.','.'],
-         ['.','.','1','.','9','.','.','5','.'],
-         ['.','.','7','.','.','.','5','4','6'],
-         ['.','1','3','6','.','5','2','9','.'],
-         ['8','5','6','.','.','.','7','.','.'],
-         ['.','6','.','.','3','.','9','.','.'],
-         ['.','.','.','1','4','8','6','.','7'],
-         ['7','.','.','.','.','9','4','.','1']
-        ],
-        [
-         ['2','.','8','4','5','.','.','7','.'],
-         ['.','.','9','.','1','2','3','.','4'],
-         ['6','.','.','7','.','.','8','5','.'],
-         ['.','.','.','.','8','.','5','4','6'],
-         ['4','1','.','.','.','.','.','9','8'],
-         ['8','5','6','.','2','.','.','.','.'],
-         ['.','6','4','.','.','7','.','.','5'],
-         ['3','.','5','1','4','.','6','.','.'],
-         ['.','8','.','.','6','9','4','.','1']
-        ],
-        [
-         ['7','9','.','5','.','1','.','.','.'],
-         ['.','5','1','.','.','.','.','.','6'],
-         ['.','8','.','.','.','9','.','.','2'],
-         ['.','.','.','2','5','.','.','8','1'],
-         ['.','.','.','.','.','.','.','.','.'],
-         ['8','4','.','.','7','3','.','.','.'],
-         ['1','.','.','6','.','.','.','7','.'],
-         ['5','.','.','.','.','.','8','1','.'],
-         ['.','.','.','3','.','2','.','6','5']
-        ],
-        [
-         ['.','.','.','.','6','.','.','.','.'],
-         ['.','.','1','.','.','.','.','9','6'],
-         ['.','.','4','.','3','9','.','.','.'],
-         ['.','6','7','.','.','4','3','8','.'],
-         ['2','.','.','8','.','6','.','.','7'],
-         ['.','4','5','1','.','.','6','2','.'],
-         ['.','.','.','6','8','.','2','.','.'],
-         ['5','2','.','.','.','.','8','.','.'],
-         ['.','.','.','.','1','.','.','.','.']
-        ],
-        [
-         ['.','.','.','.','6','1','.','3','.'],
-         ['.','.','.','.','.','.','7','9','.'],
-         ['.','.','4','7','3','.','.','.','2'],
-         ['.','6','.','.','5','.','.','8','.'],
-         ['2','.','3','.','.','.','5','.','7'],
-         ['.','4','.','.','7','.','.','2','.'],
-         ['1','.','.','.','8','5','2','.','.'],
-         ['.','2','6','.','.','.','.','.','.'],
-         ['.','7','.','3','1','.','.','.','.']
-        ],
-        [
-         ['.','.','.','.','.','1','4','3','8'],
-         ['.','.','.','.','.','.','.','9','6'],
-         ['.','.','.','.','.','9','1','.','2'],
-         ['.','.','.','.','.','4','3','.','1'],
-         ['2','.','.','8','.','6','.','.','7'],
-         ['8','.','5','1','.','.','.','.','.'],
-         ['1','.','9','6','.','.','.','.','.'],
-         ['5','2','.','.','.','.','.','.','.'],
-         ['4','7','8','3','.','.','.','.','.']
-        ],
-        [
-         ['.','7','1','6','.','.','9','.','.'],
-         ['4','.','.','.','.','.','3','.','1'],
-         ['.','.','.','8','.','2','.','7','.'],
-         ['.','5','.','.','.','.','4','.','.'],
-         ['2','.','.','1','.','5','.','.','3'],
-         ['.','.','3','.','.','.','.','9','.'],
-         ['.','1','.','2','.','4','.','.','.'],
-         ['6','.','8','.','.','.','.','.','2'],
-         ['.','.','4','.','.','9','1','5','.']
-        ],
-        [
-         ['2','.','7','.','6','.','.','.','.'],
-         ['4','3','.','.','.','9','2','.','.'],
-         ['.','6','5','4','.','.','.','.','.'],
-         ['.','7','.','.','.','.','1','.','2'],
-         ['.','.','6','8','1','7','5','.','.'],
-         ['5','.','3','.','.','.','.','9','.'],
-         ['.','.','.','.','.','8','3','5','.'],
-         ['.','.','1','9','.','.','.','2','7'],
-         ['.','.','.','.','3','.','6','.','1']
-        ],
-        [
-         ['.','9','.','.','.','1','4','8','5'],
-         ['.','.','8','7','.','.','2','.','6'],
-         ['.','6','.','.','.','2','9','.','3'],
-         ['8','7','.','.','9','.','1','.','.'],
-         ['.','2','.','8','.','7','.','3','.'],
-         ['.','.','3','.','2','.','.','9','8'],
-         ['6','.','2','1','.','.','.','5','.'],
-         ['3','.','1','.','.','6','8','.','.'],
-         ['7','8','9','2','.','.','.','4','.']
-        ],
-        [
-         ['2','.','.','3','.','.','.','8','.'],
-         ['.','.','.','7','.','.','2','.','6'],
-         ['.','6','.','4','8','.','9','7','3'],
-         ['8','.','.','.','9','.','1','.','2'],
-         ['9','.','.','8','1','7','.','.','4'],
-         ['5','.','3','.','2','.','.','.','8'],
-         ['6','4','2','.','7','8','.','5','.'],
-         ['3','.','1','.','.','6','.','.','.'],
-         ['.','8','.','.','.','5','.','.','1']
-        ],
-        [
-         ['.','.','.','.','.','1','.','8','.'],
-         ['4','.','.','.','.','.','2','1','6'],
-         ['.','6','.','4','8','.','.','.','3'],
-         ['.','.','4','5','9','.','.','6','.'],
-         ['9','.','6','.','1','.','5','.','4'],
-         ['.','1','.','.','2','4','7','.','.'],
-         ['6','.','.','.','7','8','.','5','.'],
-         ['3','5','1','.','.','.','.','.','7'],
-         ['.','8','.','2','.','.','.','.','.']
-        ],
-        [
-         ['.','.','9','2','.','.','.','.','4'],
-         ['.','.','6','.','.','3','1','.','.'],
-         ['4','.','.','1','.','.','5','.','.'],
-         ['.','3','.','8','.','.','9','.','1'],
-         ['.','.','.','3','.','4','.','.','.'],
-         ['1','.','4','.','.','6','.','5','.'],
-         ['.','.','7','.','.','2','.','.','3'],
-         ['.','.','1','7','.','.','6','.','.'],
-         ['9','.','.','.','.','1','4','.','.']
-        ],
-        [
-         ['.','.','9','.','6','.','.','.','.'],
-         ['2','.','6','4','.','.','1','.','.'],
-         ['.','.','3','1','8','.','5','.','.'],
-         ['.','.','2','.','.','.','.','.','1'],
-         ['7','9','.','.','.','.','.','6','8'],
-         ['1','.','.','.','.','.','3','.','.'],
-         ['.','.','7','.','9','2','8','.','.'],
-         ['.','.','1','.','.','8','6','.','5'],
-         ['.','.','.','.','3','.','4','.','.']
-        ],
-       ]
-      ]
-
-
-    # Randomize each level in the list
-    for l in range(0, len(sudoku_list)):
-      for j in range(0, len(sudoku_list[l])):
-        # Select a random new position to set the J sudoku
-        old_sudo = sudoku_list[l][j]
-        new_pos = random.randint(0,len(sudoku_list[l])-1)
-        sudoku_list[l][j] = sudoku_list[l][new_pos]
-        sudoku_list[l][new_pos] = old_sudo
-
-
-    return sudoku_list
+    self.grid = sudoku_model.Grid(self.sudo_size, region, self.valid_chars)
+    self.grid.load(sudoku)
 
+    self.display_valid_chars(self.sudo_size, self.valid_chars)
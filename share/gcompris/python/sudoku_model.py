@@ -0,0 +1,325 @@
+#  gcompris - sudoku_model.py
+#
+# Copyright (C) 2012 The GCompris Team
+#
+#   This program is free software; you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation; either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program; if not, see <http://www.gnu.org/licenses/>.
+#
+# Sudoku model, solver and generator.
+#
+# The symbols of a sudoku are numbered from 0 to size - 1 and each row,
+# column and region keeps the set of symbols it holds as a bitmask, so
+# that checking a move does not need to look at the other squares.
+
+import mmap
+import random
+
+class Grid:
+  """ The squares of a sudoku and the symbols used in each row, column
+  and region. Squares are addressed as (x, y) like in the activity. """
+
+  def __init__(self, size, region=None, symbols=None):
+    """
+    Constructor:
+      size : number of squares on each side
+      region : size of a region side, None if there is no region
+      symbols : the list of the symbols texts, the symbol i is
+                symbols[i]. Defaults to '1', '2', ...
+    """
+    self.size = size
+    self.region = region
+    if symbols == None:
+      symbols = [str(i + 1) for i in range(size)]
+    self.symbols = list(symbols)
+
+    self.values = [[None] * size for x in range(size)]
+    self.columns = [0] * size
+    self.rows = [0] * size
+    self.regions = [0] * size
+    self.filled = 0
+
+  def region_index(self, x, y):
+    if not self.region:
+      return 0
+    return (y / self.region) * (self.size / self.region) + x / self.region
+
+  def used(self, x, y):
+    """ Return the mask of the symbols seen from the square (x, y) """
+    mask = self.columns[x] | self.rows[y]
+    if self.region:
+      mask |= self.regions[self.region_index(x, y)]
+    return mask
+
+  def get(self, x, y):
+    """ Return the symbol text of the square, "" if it is empty """
+    value = self.values[x][y]
+    if value == None:
+      return ""
+    return self.symbols[value]
+
+  def set(self, x, y, text):
+    """ Put the symbol text in the square, "" empties it """
+    self.clear(x, y)
+    if not text:
+      return
+    value = self.symbols.index(text)
+    bit = 1 << value
+    self.values[x][y] = value
+    self.columns[x] |= bit
+    self.rows[y] |= bit
+    if self.region:
+      self.regions[self.region_index(x, y)] |= bit
+    self.filled += 1
+
+  def clear(self, x, y):
+    value = self.values[x][y]
+    if value == None:
+      return
+    bit = ~(1 << value)
+    self.values[x][y] = None
+    self.columns[x] &= bit
+    self.rows[y] &= bit
+    if self.region:
+      self.regions[self.region_index(x, y)] &= bit
+    self.filled -= 1
+
+  def is_legal(self, x, y, text):
+    """ Return True if text can be put in the square (x, y) """
+    if not text in self.symbols:
+      return False
+    value = self.symbols.index(text)
+    if self.values[x][y] == value:
+      return True
+    return not self.used(x, y) & (1 << value)
+
+  def conflicts(self, x, y, text):
+    """ Return the squares that prevent text from being put in (x, y) """
+    if not text in self.symbols:
+      return []
+    value = self.symbols.index(text)
+    squares = []
+    for i in range(self.size):
+      if i != x and self.values[i][y] == value:
+        squares.append((i, y))
+      if i != y and self.values[x][i] == value:
+        squares.append((x, i))
+    if self.region:
+      left = x / self.region * self.region
+      top = y / self.region * self.region
+      for i in range(left, left + self.region):
+        for j in range(top, top + self.region):
+          if i != x and j != y and self.values[i][j] == value:
+            squares.append((i, j))
+    return squares
+
+  def is_full(self):
+    return self.filled == self.size * self.size
+
+  def load(self, sudoku):
+    """ Set the squares from the rows of a dataset sudoku, '.' being an
+    empty square """
+    for y in range(self.size):
+      for x in range(self.size):
+        if sudoku[y][x] == '.':
+          self.clear(x, y)
+        else:
+          self.set(x, y, sudoku[y][x])
+
+  def dump(self):
+    """ Return the squares as the rows of a dataset sudoku """
+    return [[self.get(x, y) or '.' for x in range(self.size)]
+            for y in range(self.size)]
+
+#
+# Solver
+#
+
+def count_solutions(grid, limit=2):
+  """ Return the number of solutions of grid, counting at most limit of
+  them. grid is left unchanged. """
+  full = (1 << grid.size) - 1
+  empty = [(x, y) for x in range(grid.size) for y in range(grid.size)
+           if grid.values[x][y] == None]
+
+  def search():
+    if not empty:
+      return 1
+    # Fill first the square with the fewest candidates
+    best = None
+    best_count = grid.size + 1
+    for (index, (x, y)) in enumerate(empty):
+      candidates = full & ~grid.used(x, y)
+      count = bin(candidates).count('1')
+      if count < best_count:
+        best = index
+        best_count = count
+        best_candidates = candidates
+        if count <= 1:
+          break
+    if best_count == 0:
+      return 0
+
+    (x, y) = empty.pop(best)
+    found = 0
+    candidates = best_candidates
+    while candidates and found < limit:
+      bit = candidates & -candidates
+      candidates ^= bit
+      grid.set(x, y, grid.symbols[bit.bit_length() - 1])
+      found += search()
+      grid.clear(x, y)
+    empty.insert(best, (x, y))
+    return found
+
+  return search()
+
+def solve(grid):
+  """ Fill grid with its first solution, return False if it has none """
+  full = (1 << grid.size) - 1
+  for x in range(grid.size):
+    for y in range(grid.size):
+      if grid.values[x][y] != None:
+        continue
+      candidates = full & ~grid.used(x, y)
+      while candidates:
+        bit = candidates & -candidates
+        candidates ^= bit
+        grid.set(x, y, grid.symbols[bit.bit_length() - 1])
+        if solve(grid):
+          return True
+      grid.clear(x, y)
+      return False
+  return True
+
+#
+# Generator
+#
+
+def generate(size, region, holes, symbols=None, rand=random):
+  """
+  Return the rows of a new dataset sudoku with a unique solution.
+    holes : the number of empty squares wanted, the more the harder.
+            Fewer may be left if no more square can be emptied without
+            losing the uniqueness of the solution.
+  """
+  grid = Grid(size, region, symbols)
+
+  # A random full grid: shuffled symbols on the first row, then solved
+  first_row = list(grid.symbols)
+  rand.shuffle(first_row)
+  for x in range(size):
+    grid.set(x, 0, first_row[x])
+  solve(grid)
+
+  squares = [(x, y) for x in range(size) for y in range(size)]
+  rand.shuffle(squares)
+  removed = 0
+  for (x, y) in squares:
+    if removed >= holes:
+      break
+    text = grid.get(x, y)
+    grid.clear(x, y)
+    if count_solutions(grid) == 1:
+      removed += 1
+    else:
+      grid.set(x, y, text)
+
+  return grid.dump()
+
+#
+# Puzzle store
+#
+# The sudokus of the activity are kept in a data file, read only for
+# the sudoku being displayed:
+#
+#   SUDOKU 1 <number of levels>
+#   <size> <count> <offset>          one line per level
+#   <size * size squares>            one line per sudoku
+#
+# offset is the position in the file of the first sudoku of the level,
+# all the sudokus of a level having the same size their records have a
+# fixed width. Empty squares are '.'.
+
+class PuzzleStore:
+  """ The sudokus of a data file, by level """
+
+  def __init__(self, filename, shuffle=True):
+    f = open(filename, 'rb')
+    try:
+      self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+      f.close()
+
+    (magic, version, levels) = self.data.readline().split()
+    if magic != 'SUDOKU' or version != '1':
+      raise ValueError('%s is not a sudoku data file' % filename)
+
+    self.index = []
+    for level in range(int(levels)):
+      (size, count, offset) = self.data.readline().split()
+      self.index.append((int(size), int(count), int(offset)))
+
+    # The sudokus added at run time, by level
+    self.extra = [[] for level in self.index]
+
+    # The order in which the sudokus of each level are played
+    self.order = []
+    for (size, count, offset) in self.index:
+      order = range(count)
+      if shuffle:
+        random.shuffle(order)
+      self.order.append(order)
+
+  def levels(self):
+    return len(self.index)
+
+  def count(self, level):
+    """ Return the number of sudokus of the level, from 0 """
+    return self.index[level][1] + len(self.extra[level])
+
+  def get(self, level, number):
+    """ Return the rows of the sudoku number of the level, both from 0 """
+    (size, count, offset) = self.index[level]
+    if number >= count:
+      return self.extra[level][number - count]
+    start = offset + self.order[level][number] * (size * size + 1)
+    record = self.data[start:start + size * size]
+    return [list(record[y * size:(y + 1) * size]) for y in range(size)]
+
+  def add(self, level, sudoku):
+    """ Add a sudoku at the end of the level, it is not saved """
+    self.extra[level].append(sudoku)
+
+def write_store(filename, levels):
+  """ Write a data file for PuzzleStore, levels being a list of lists of
+  sudoku rows """
+  header = 'SUDOKU 1 %d\n' % len(levels)
+  index_line = '%2d %6d %10d\n'
+  offset = len(header) + len(index_line % (0, 0, 0)) * len(levels)
+
+  lines = []
+  records = []
+  for level in levels:
+    size = len(level[0])
+    lines.append(index_line % (size, len(level), offset))
+    for sudoku in level:
+      records.append(''.join([''.join(row) for row in sudoku]) + '\n')
+    offset += len(level) * (size * size + 1)
+
+  f = open(filename, 'wb')
+  try:
+    f.write(header)
+    f.writelines(lines)
+    f.writelines(records)
+  finally:
+    f.close()